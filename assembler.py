@@ -1,17 +1,40 @@
+import glob
+import sys
 from argparse import ArgumentParser
 
-from src.compiler import Program
-from src.linker import Linker
-from src.output import print_output
+from src.basic import save_basic, write_basic
+from src.build import (
+    BASIC_FORMATS,
+    artifact_path,
+    assemble_file,
+    build_batch,
+    compile_file,
+    link_files,
+)
+from src.cache import AssemblyCache, default_directory
+from src.cycles import page_warnings, print_cycles
+from src.daemon import default_socket, forward, serve
+from src.emulator import MAX_CYCLES, emulate, print_profile
+from src.layout import place
+from src.output import print_output, save_binary, write_binary
+from src.pack import LOAD_ADDRESS, pack
+from src.peephole import diff
+from src.stats import DISABLED, Stats
+from src.watch import Watcher, watch
 
 
-def arguments():
+def arguments(argv=None):
     parser = ArgumentParser(
         prog="Danmos Assembler",
         description=" A simple, basic, uncompleted 6502 assembler",
     )
 
-    parser.add_argument('filename')
+    parser.add_argument(
+        'filenames',
+        metavar='filename',
+        help="Source file, several files or glob patterns for batch mode",
+        nargs='*'
+    )
     parser.add_argument(
         '-s',
         '--start-position',
@@ -24,37 +47,388 @@ def arguments():
         help="Number of bytes per line in instructions output [default: 8]",
         default="8"
     )
+    parser.add_argument(
+        '-f',
+        '--format',
+        help="Output format: text listing, PRG with load address, raw "
+        "binary, a BASIC loader packing the program in DATA lines, "
+        "decoded by a machine code bootstrap with basic-fast, or an "
+        "unlinked object file for --link [default: text]",
+        choices=['text', 'prg', 'bin', 'basic', 'basic-fast', 'object'],
+        default='text'
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        help="Output file for prg/bin/basic formats, '-' for stdout "
+        "[default: filename with the format extension]",
+    )
+    parser.add_argument(
+        '--link',
+        help="Link all the sources and object files into one program, "
+        "reusing the object file of each source unchanged since it was "
+        "compiled",
+        action='store_true'
+    )
+    parser.add_argument(
+        '--pack',
+        help="Compress prg/bin output into a self-extracting program loaded "
+        f"at ${LOAD_ADDRESS:04X} and started with RUN",
+        action='store_true'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        help="Directory of the assembly cache [default: ~/.cache/danmos]",
+    )
+    parser.add_argument(
+        '--no-cache',
+        help="Always assemble from source, without reading or writing the "
+        "cache",
+        action='store_true'
+    )
+
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        help="Assemble in batch mode with this many worker processes, "
+        "writing each output next to its source [default: CPU count]",
+        type=int
+    )
+    parser.add_argument(
+        '-p',
+        '--parallel',
+        help="Split a single large source into chunks parsed by --jobs "
+        "worker processes",
+        action='store_true'
+    )
+
+    parser.add_argument(
+        '-O',
+        '--optimize',
+        help="Apply peephole rewrites (tail calls, jumps to the next "
+        "instruction, redundant loads), logging them on stderr",
+        action='store_true'
+    )
+    parser.add_argument(
+        '-l',
+        '--long-branches',
+        help="Replace branches out of range with an inverted branch over a "
+        "JMP instead of failing",
+        action='store_true'
+    )
 
-    return parser.parse_args()
+    parser.add_argument(
+        '--cycles',
+        help="Print the cycles of each instruction and label block, with "
+        "taken branch and page crossing penalties",
+        action='store_true'
+    )
+    parser.add_argument(
+        '--critical',
+        metavar='LABEL',
+        help="Warn when a branch in the block of this label crosses a page "
+        "(can be repeated)",
+        action='append',
+        default=[]
+    )
+
+    parser.add_argument(
+        '--run',
+        help="Run the program in the built-in 6502 emulator and print its "
+        "instruction counts, cycles and hottest label blocks",
+        action='store_true'
+    )
+    parser.add_argument(
+        '--input',
+        help="Keys returned by the GETIN and CHRIN KERNAL calls in --run, "
+        "with C escapes such as \\r for RETURN",
+        default=''
+    )
+    parser.add_argument(
+        '--max-cycles',
+        help=f"Stop --run after this many cycles [default: {MAX_CYCLES}]",
+        type=int,
+        default=MAX_CYCLES
+    )
 
+    parser.add_argument(
+        '--stats',
+        help="Report time, memory and counters of each stage on stderr",
+        action='store_true'
+    )
+    parser.add_argument(
+        '--profile',
+        help="Write a cProfile dump of the whole run to this file",
+    )
 
-def parse_file(file) -> Program:
-    program = Program()
+    parser.add_argument(
+        '-w',
+        '--watch',
+        help="Re-assemble the file whenever it changes, rewriting --output "
+        "[default: filename with the format extension]",
+        action='store_true'
+    )
 
-    with open(file, "r") as source:
-        line = source.readline()
+    parser.add_argument(
+        '--serve',
+        help="Keep a warm assembler listening for requests on --socket",
+        action='store_true'
+    )
+    parser.add_argument(
+        '--client',
+        help="Forward this command line to an assembler started with --serve",
+        action='store_true'
+    )
+    parser.add_argument(
+        '--socket',
+        help="Unix socket of the --serve/--client mode "
+        "[default: $DANMOS_SOCKET or danmos-<uid>.sock in the temp directory]",
+    )
 
-        while line:
-            program.next_instruction(line)
-            line = source.readline()
+    options = parser.parse_args(argv)
+    if not options.filenames and not options.serve:
+        parser.error('the following arguments are required: filename')
+    if options.pack and options.format not in ('prg', 'bin'):
+        parser.error('--pack only applies to the prg and bin formats')
+    if options.pack and options.watch:
+        parser.error('--pack is not supported in watch mode')
+    if options.format == 'object':
+        for option in ('link', 'parallel', 'cycles', 'run', 'watch'):
+            if getattr(options, option):
+                parser.error(f'--{option} needs a linked program')
 
-    return program
+    return options
 
 
-if __name__ == '__main__':
-    arguments = arguments()
+def expand_filenames(patterns: list[str]) -> list[str]:
+    filenames = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        filenames.extend(matches or [pattern])
 
-    program = parse_file(arguments.filename)
-    labels = program.labels()
-    bytecode = program.bytecode()
+    return filenames
 
+
+def cache_directory(arguments) -> str | None:
+    if arguments.no_cache:
+        return None
+
+    return arguments.cache_dir or default_directory()
+
+
+def assemble(arguments, filenames: list[str], stats=DISABLED) -> int:
+    # A single source, or every module with --link
+    filename = filenames[0]
     start_pos = int(arguments.start_position, 16)
+    binary_stdout = arguments.format != 'text' and arguments.output == '-'
+    assert not (arguments.cycles and binary_stdout), '--cycles needs stdout'
+    assert not (arguments.run and binary_stdout), '--run needs stdout'
+
+    rewrites = []
+    if arguments.format == 'object':
+        assert not binary_stdout, '--output cannot be stdout for objects'
+        output = arguments.output or artifact_path(filename, 'object')
+        with stats.stage('compile'):
+            compile_file(filename, output, arguments.optimize, rewrites)
+        sys.stderr.write(''.join(diff(rewrites)))
+        return 0
+
+    if arguments.link:
+        assembly, image = link_files(
+            filenames,
+            start_pos,
+            stats=stats,
+            optimize=arguments.optimize,
+            rewrites=rewrites,
+            long_branches=arguments.long_branches
+        )
+    else:
+        cache = None
+        if directory := cache_directory(arguments):
+            cache = AssemblyCache(directory)
+
+        assembly, image = assemble_file(
+            filename,
+            start_pos,
+            cache,
+            parallel=arguments.parallel,
+            jobs=arguments.jobs,
+            stats=stats,
+            optimize=arguments.optimize,
+            rewrites=rewrites,
+            long_branches=arguments.long_branches
+        )
+    sys.stderr.write(''.join(diff(rewrites)))
+
+    with stats.stage('output'):
+        _output(arguments, filename, assembly, image, start_pos)
+
+    if arguments.cycles:
+        with stats.stage('cycles'):
+            print_cycles(assembly, image, start_pos)
+
+    if arguments.run:
+        with stats.stage('run'):
+            cpu = emulate(
+                image,
+                start_pos,
+                input=_keys(arguments.input),
+                max_cycles=arguments.max_cycles,
+                layout=place(assembly, start_pos)
+            )
+        stats.count('cycles run', cpu.cycles)
+        print_profile(assembly, cpu, start_pos)
+
+    warnings = page_warnings(assembly, image, start_pos, arguments.critical)
+    for warning in warnings:
+        print(warning, file=sys.stderr)
+
+    return 0
+
+
+def _keys(text: str) -> bytes:
+    return text.encode('latin-1').decode('unicode_escape').encode('latin-1')
+
+
+def _output(arguments, filename: str, assembly, image, start_pos: int):
+    if arguments.format == 'text':
+        print_output(
+            assembly,
+            image,
+            start_pos,
+            bytes_per_line=int(arguments.bytes_per_line)
+        )
+        return
+
+    output = arguments.output or artifact_path(filename, arguments.format)
+    layout = place(assembly, start_pos)
+
+    if arguments.format in BASIC_FORMATS:
+        fast = arguments.format == 'basic-fast'
+        image, start_pos = layout.flatten(image)
+        if output == '-':
+            write_basic(image, start_pos, sys.stdout, fast=fast)
+        else:
+            save_basic(image, start_pos, output, fast=fast)
+    else:
+        prg = arguments.format == 'prg'
+        if arguments.pack:
+            image, start_pos = layout.flatten(image)
+            image, start_pos = pack(image, start_pos), LOAD_ADDRESS
+            layout = None
+
+        if output == '-':
+            write_binary(
+                image,
+                start_pos,
+                sys.stdout.buffer,
+                prg=prg,
+                layout=layout
+            )
+        else:
+            save_binary(image, start_pos, output, prg=prg, layout=layout)
+
+
+def batch(arguments, filenames: list[str], stats=DISABLED) -> int:
+    assert arguments.output is None, '--output is not supported in batch mode'
+    assert not arguments.cycles, '--cycles is not supported in batch mode'
+    assert not arguments.run, '--run is not supported in batch mode'
+
+    failures = 0
+    rewrites = {}
+    results = build_batch(
+        filenames,
+        int(arguments.start_position, 16),
+        arguments.format,
+        jobs=arguments.jobs,
+        cache_directory=cache_directory(arguments),
+        bytes_per_line=int(arguments.bytes_per_line),
+        optimize=arguments.optimize,
+        long_branches=arguments.long_branches,
+        pack=arguments.pack,
+        rewrites=rewrites
+    )
+
+    with stats.stage('batch'):
+        for filename, output, error in results:
+            if error is None:
+                print(f"{filename} -> {output}")
+                _log_rewrites(filename, rewrites[filename])
+            else:
+                failures += 1
+                print(f"{filename}: {error}", file=sys.stderr)
 
-    bytecode = Linker(start_pos).parse(labels, bytecode)
+    stats.count('files', len(filenames))
 
-    print_output(
-        labels,
-        bytecode,
-        start_pos,
-        bytes_per_line=int(arguments.bytes_per_line)
+    print(f"{len(filenames) - failures} assembled, {failures} failed")
+
+    return 1 if failures else 0
+
+
+def _log_rewrites(filename: str, rewrites):
+    if rewrites:
+        sys.stderr.write(f"--- {filename}\n" + ''.join(diff(rewrites)))
+
+
+def watch_file(arguments, filename: str) -> int:
+    output = arguments.output or artifact_path(filename, arguments.format)
+    assert output != '-', '--output cannot be stdout in watch mode'
+
+    watcher = Watcher(
+        filename,
+        int(arguments.start_position, 16),
+        arguments.format,
+        output,
+        bytes_per_line=int(arguments.bytes_per_line),
+        optimize=arguments.optimize,
+        long_branches=arguments.long_branches
     )
+
+    print(f"Watching {filename} -> {output}", file=sys.stderr)
+    try:
+        return watch(watcher)
+    except KeyboardInterrupt:
+        return 0
+
+
+def main(argv=None) -> int:
+    options = arguments(argv)
+
+    if options.serve:
+        return serve(options.socket or default_socket(), main)
+
+    if options.client:
+        argv = sys.argv[1:] if argv is None else argv
+        forwarded = [argument for argument in argv if argument != '--client']
+
+        return forward(forwarded, options.socket or default_socket())
+
+    filenames = expand_filenames(options.filenames)
+
+    if options.watch:
+        assert len(filenames) == 1, 'Only a single file can be watched'
+        return watch_file(options, filenames[0])
+
+    if not options.stats and options.profile is None:
+        return build(options, filenames)
+
+    with Stats(memory=options.stats, profile=options.profile) as stats:
+        status = build(options, filenames, stats)
+
+    if options.stats:
+        sys.stderr.write(''.join(stats.report()))
+
+    return status
+
+
+def build(options, filenames: list[str], stats=DISABLED) -> int:
+    if options.link or (
+        len(filenames) == 1 and (options.parallel or options.jobs is None)
+    ):
+        return assemble(options, filenames, stats)
+
+    return batch(options, filenames, stats)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import random
+import sys
+from argparse import ArgumentParser
+from typing import Generator, Iterator
+
+# Operand mix of instructions without a label, modelled on samples/danmos.s:
+# kernal calls, compares against characters, zero page and screen stores
+_INSTRUCTIONS = (
+    (8, lambda r: f"JSR ${r.choice(('FFE4', 'FFD2', 'FFCF'))}"),
+    (12, lambda r: f"CMP #${r.randrange(0x100):02X}"),
+    (10, lambda r: f"LDA #${r.randrange(0x100):02X}"),
+    (6, lambda r: f"LDX #${r.randrange(0x100):02X}"),
+    (8, lambda r: f"STA ${r.randrange(0x100):02X}"),
+    (6, lambda r: f"LDA ${r.randrange(0x100):02X}"),
+    (6, lambda r: f"STA ${0x0400 + r.randrange(0x400):04X},X"),
+    (4, lambda r: f"LDA ${0xD000 + r.randrange(0x400):04X}"),
+    (4, lambda r: f"STA ${0xD020 + r.randrange(2):04X}"),
+    (3, lambda r: f"LDA (${r.randrange(0x100):02X}),Y"),
+    (5, lambda r: r.choice(('INX', 'INY', 'DEX', 'DEY'))),
+    (4, lambda r: r.choice(('TSX', 'TXA', 'TAX', 'PHA', 'PLA'))),
+    (2, lambda r: r.choice(('ASL', 'LSR', 'ROL'))),
+)
+
+_COMMENTS = (
+    'Get a character (GETIN)',
+    'Is the character RETURN (ENTER)?',
+    'Store the operation in memory register',
+    "Let's try again",
+    'Ignore spaces',
+)
+
+_BRANCHES = ('BEQ', 'BNE', 'BCC', 'BCS', 'BMI', 'BPL')
+
+# Instructions between two labels: branches reach their own block's label
+# backwards or the next one forwards, so they always stay within range
+_BLOCK_SIZE = (3, 10)
+
+# Lines of a program fitting in the 16 KB from $C000: larger sources are a
+# sequence of such programs, each only referring to its own labels
+PROGRAM_LINES = 8_000
+
+
+def generate(lines: int, seed: int = 0) -> Iterator[str]:
+    rng = random.Random(seed)
+    block = 0
+    for first in range(0, lines, PROGRAM_LINES):
+        block = yield from _program(
+            rng,
+            min(PROGRAM_LINES, lines - first),
+            block
+        )
+
+
+def _program(
+    rng: random.Random,
+    lines: int,
+    block: int
+) -> Generator[str, None, int]:
+    # Yields the lines of one program, returns the number of its next label
+    weights = [weight for weight, _ in _INSTRUCTIONS]
+    operands = [operand for _, operand in _INSTRUCTIONS]
+    first_block = block
+    emitted = 0
+
+    while emitted < lines - 1:
+        yield f"BLOCK_{block}:"
+        emitted += 1
+
+        for _ in range(rng.randint(*_BLOCK_SIZE)):
+            if emitted >= lines - 1:
+                break
+
+            emitted += 1
+            kind = rng.random()
+            if kind < 0.12:
+                yield rng.choice(('', f"  ; {rng.choice(_COMMENTS)}"))
+                continue
+
+            if kind < 0.24:
+                target = block + rng.randrange(2)
+                instruction = f"{rng.choice(_BRANCHES)} BLOCK_{target}"
+            elif kind < 0.30:
+                target = rng.randrange(first_block, block + 2)
+                instruction = f"{rng.choice(('JMP', 'JSR'))} BLOCK_{target}"
+            else:
+                instruction = rng.choices(operands, weights)[0](rng)
+
+            if rng.random() < 0.25:
+                instruction = f"{instruction:26} ; {rng.choice(_COMMENTS)}"
+
+            yield f"  {instruction}"
+
+        block += 1
+
+    # Jumps and branches can target the block after the last one
+    yield f"BLOCK_{block}:"
+
+    return block + 1
+
+
+def main(argv=None) -> int:
+    parser = ArgumentParser(
+        prog="Danmos source generator",
+        description="Generate a synthetic 6502 source for benchmarks",
+    )
+    parser.add_argument('lines', help="Number of lines", type=int)
+    parser.add_argument(
+        '--seed',
+        help="Random seed [default: 0]",
+        type=int,
+        default=0
+    )
+
+    options = parser.parse_args(argv)
+    for line in generate(options.lines, options.seed):
+        sys.stdout.write(line + '\n')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from src import __version__
+from src.address import AddressResolver, classify
+from src.build import parse_lines
+from src.layout import place
+from src.linker import Linker
+from src.output import write_binary, write_output
+from src.pack import compress
+
+from .generate import PROGRAM_LINES, generate
+
+SIZES = (1_000, 100_000, 1_000_000)
+START_POS = 0xC000
+
+# Binary asset copied by the incbin stage, next to the generated source
+ASSET = 'asset.bin'
+ASSET_SIZE = 0xC000
+
+
+def _read(state):
+    with open(state['file'], 'r') as source:
+        state['lines'] = source.read().splitlines()
+
+
+def _parse(state):
+    # Sources too large for the address space are a sequence of programs
+    lines = state['lines']
+    state['assemblies'] = [
+        parse_lines(lines[first:first + PROGRAM_LINES]).assembly()
+        for first in range(0, len(lines), PROGRAM_LINES)
+    ]
+
+
+def _resolve(state):
+    # Operands are classified once per distinct text: start from a cold cache
+    classify.cache_clear()
+    for assembly in state['assemblies']:
+        for line, source in enumerate(assembly.sources, 1):
+            AddressResolver(source[3:].strip(), line)
+
+
+def _link(state):
+    state['images'] = [
+        Linker(START_POS).parse(assembly)
+        for assembly in state['assemblies']
+    ]
+
+
+def _layout(state):
+    for assembly in state['assemblies']:
+        place(assembly, START_POS)
+
+
+def _listing(state):
+    with open(os.devnull, 'w') as stream:
+        for assembly, image in zip(state['assemblies'], state['images']):
+            write_output(assembly, image, START_POS, stream)
+
+
+def _binary(state):
+    for image in state['images']:
+        write_binary(image, START_POS, io.BytesIO(), prg=True)
+
+
+def _pack(state):
+    for image in state['images']:
+        compress(image, START_POS)
+
+
+def _incbin(state):
+    parse_lines([f'.incbin "{ASSET}"'], state['file']).assembly()
+
+
+STAGES = {
+    'read': _read,
+    'parse': _parse,
+    'resolve': _resolve,
+    'link': _link,
+    'layout': _layout,
+    'listing': _listing,
+    'binary': _binary,
+    'pack': _pack,
+    'incbin': _incbin,
+}
+
+
+def _timings(file: str, repeat: int) -> dict[str, float]:
+    best = {}
+    for _ in range(repeat):
+        state = {'file': file}
+        for name, stage in STAGES.items():
+            start = time.perf_counter()
+            stage(state)
+            elapsed = time.perf_counter() - start
+            best[name] = min(best.get(name, elapsed), elapsed)
+
+    return best
+
+
+def _peaks(file: str) -> dict[str, int]:
+    # A separate pass, tracemalloc slows allocations down considerably
+    peaks = {}
+    state = {'file': file}
+
+    tracemalloc.start()
+    try:
+        for name, stage in STAGES.items():
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            stage(state)
+            peaks[name] = tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+
+    return peaks
+
+
+def benchmark(lines: int, repeat: int = 1, memory: bool = True) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        file = os.path.join(directory, f'generated_{lines}.s')
+        with open(file, 'w') as source:
+            for line in generate(lines):
+                source.write(line + '\n')
+        with open(os.path.join(directory, ASSET), 'wb') as asset:
+            asset.write(os.urandom(ASSET_SIZE))
+
+        timings = _timings(file, repeat)
+        peaks = _peaks(file) if memory else {}
+
+        state = {'file': file}
+        for stage in (_read, _parse, _link):
+            stage(state)
+
+    assemblies = state['assemblies']
+
+    return {
+        'lines': lines,
+        'programs': len(assemblies),
+        'instructions': sum(map(len, assemblies)),
+        'bytes': sum(map(len, state['images'])),
+        'fixups': sum(len(assembly.fixup_offsets) for assembly in assemblies),
+        'lines_per_second': round(lines / timings['parse']),
+        'stages': {
+            name: {'seconds': seconds, 'peak_bytes': peaks.get(name)}
+            for name, seconds in timings.items()
+        },
+    }
+
+
+def main(argv=None) -> int:
+    parser = ArgumentParser(
+        prog="Danmos benchmarks",
+        description="Time each assembler stage on generated sources",
+    )
+    parser.add_argument(
+        '--sizes',
+        help="Comma separated numbers of lines [default: 1000,100000,1000000]",
+        default=','.join(str(size) for size in SIZES)
+    )
+    parser.add_argument(
+        '--repeat',
+        help="Runs per size, the fastest one is reported [default: 1]",
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        '--no-memory',
+        help="Skip the tracemalloc pass measuring peak memory per stage",
+        action='store_true'
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        help="JSON results file [default: stdout]",
+    )
+
+    options = parser.parse_args(argv)
+    results = {
+        'version': __version__,
+        'python': platform.python_version(),
+        'results': [
+            benchmark(int(size), options.repeat, not options.no_memory)
+            for size in options.sizes.split(',')
+        ],
+    }
+
+    if options.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,95 +1,170 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+from .opcodes import (
+    ABSOLUTE,
+    ABSOLUTE_X,
+    ABSOLUTE_Y,
+    ACCUMULATOR,
+    IMMEDIATE,
+    IMPLIED,
+    INDIRECT,
+    INDIRECT_X,
+    INDIRECT_Y,
+    ZERO_PAGE,
+    ZERO_PAGE_X,
+    ZERO_PAGE_Y,
+)
+
+_INDEXED = {
+    (ZERO_PAGE, 'X'): ZERO_PAGE_X,
+    (ZERO_PAGE, 'Y'): ZERO_PAGE_Y,
+    (ABSOLUTE, 'X'): ABSOLUTE_X,
+    (ABSOLUTE, 'Y'): ABSOLUTE_Y,
+}
+
+
+class Operand(NamedTuple):
+    mode: str
+    value: int | None = None
+    label: str | None = None
+
+
+_MISSING = Operand(IMPLIED)
+_ACCUMULATOR = Operand(ACCUMULATOR)
+
+
+@lru_cache(maxsize=4096)
+def classify(parameters: str) -> Operand:
+    if not parameters:
+        return _MISSING
+
+    first = parameters[0]
+
+    if first == '#':
+        assert len(parameters) <= 4, 'Bad parameter length'
+        assert parameters[1:2] == '$', 'Only hex values supported'
+
+        return Operand(IMMEDIATE, _hex(parameters[2:], 2))
+
+    if first == '(':
+        return _indirect(parameters)
+
+    if parameters == 'A':
+        return _ACCUMULATOR
+
+    base, comma, index = parameters.partition(',')
+    operand = _direct(base.rstrip())
+    if not comma:
+        return operand
+
+    register = index.strip().upper()
+    mode = _INDEXED.get((operand.mode, register))
+    assert mode is not None, f'Invalid index "{register}"'
+
+    return operand._replace(mode=mode)
+
+
+def _indirect(parameters: str) -> Operand:
+    compact = parameters.replace(' ', '')
+
+    if compact.upper().endswith(',X)'):
+        operand = _direct(compact[1:-3])
+        assert operand.mode == ZERO_PAGE or operand.label, 'Bad indirect'
+        return operand._replace(mode=INDIRECT_X)
+
+    if compact.upper().endswith('),Y'):
+        operand = _direct(compact[1:-3])
+        assert operand.mode == ZERO_PAGE or operand.label, 'Bad indirect'
+        return operand._replace(mode=INDIRECT_Y)
+
+    assert compact.endswith(')'), 'Unterminated indirect address'
+    operand = _direct(compact[1:-1])
+
+    return operand._replace(mode=INDIRECT)
+
+
+def _direct(parameters: str) -> Operand:
+    if parameters[:1] == '$':
+        assert len(parameters) <= 5, 'Bad parameter length'
+
+        digits = parameters[1:]
+        if len(digits) <= 2:
+            return Operand(ZERO_PAGE, _hex(digits, 2))
+
+        return Operand(ABSOLUTE, _hex(digits, 4))
+
+    assert parameters, 'Missing address'
+
+    return Operand(ABSOLUTE, label=parameters)
+
+
+def _hex(digits: str, length: int) -> int:
+    assert 0 < len(digits) <= length, 'Bad parameter length'
+
+    try:
+        return int(digits, 16)
+    except ValueError:
+        assert False, f'Invalid hex value "{digits}"'
+
+
 class AddressResolver:
     _parameters: str
     _line_number: int
-    _type: str
-    _value: list[str | int]
+    _operand: Operand
 
     def __init__(self, parameters: str, line_number: int):
         self._parameters = parameters
         self._line_number = line_number
 
-        self._value = []
-        self._type = ''
-        modes = [
-            self._as_immediate,
-            self._as_absolute,
-            self._as_label,
-        ]
+        try:
+            self._operand = classify(parameters)
+        except AssertionError as error:
+            self._assert(False, str(error))
 
-        for mode in modes:
-            resolved = mode()
-            if (resolved):
-                break
+    def operand(self) -> Operand:
+        return self._operand
 
     def value(self) -> list:
-        return self._value
+        operand = self._operand
+
+        if operand.label is not None:
+            return [operand.label]
+
+        if operand.value is None:
+            return []
+
+        if operand.mode in (IMMEDIATE, ZERO_PAGE):
+            return [operand.value]
+
+        return [operand.value & 0xFF, operand.value >> 8]
 
     def is_absolute(self) -> bool:
-        return self._type == 'absolute' and len(self._value) == 2
+        return self._operand.mode == ABSOLUTE and not self.is_label()
 
     def is_zero_page(self) -> bool:
-        return self._type == 'absolute' and len(self._value) == 1
+        return self._operand.mode == ZERO_PAGE
 
     def is_immediate(self) -> bool:
-        return self._type == 'immediate'
+        return self._operand.mode == IMMEDIATE
 
     def is_label(self) -> bool:
-        return self._type == 'label'
+        return self._operand.label is not None
 
     def is_missing(self):
-        return len(self._value) == 0 and len(self._type) == 0
+        return self._operand.mode == IMPLIED
 
     def relative_label(self) -> list[str | int]:
         if not self.is_label():
             return self.value()
 
-        return ['REL|' + str(self._value[0])]
+        return ['REL|' + self._operand.label]
 
     def absolute_label(self) -> list[str | int | None]:
         if not self.is_label():
             return self.value()
 
-        return ['ABS|' + str(self._value[0]), None]
-
-    def _as_absolute(self):
-        if len(self._parameters) == 0 or self._parameters[0] != "$":
-            return False
-
-        self._assert(len(self._parameters) <= 5, 'Bad parameter length')
-
-        self._type = 'absolute'
-        high_byte = self._parameters[1:3]
-
-        if len(self._parameters) == 3:
-            self._value = [int(high_byte, 16)]
-            return True
-
-        low_byte = self._parameters[3:]
-        self._value = [int(low_byte, 16), int(high_byte, 16)]
-
-        return True
-
-    def _as_immediate(self):
-        if len(self._parameters) == 0 or self._parameters[0] != "#":
-            return False
-
-        self._assert(len(self._parameters) <= 4, 'Bad parameter length')
-
-        self._assert(self._parameters[1] == '$', 'Only hex values supported')
-
-        self._type = 'immediate'
-        self._value = [int(self._parameters[2:], 16)]
-
-        return True
-
-    def _as_label(self):
-        if len(self._parameters) == 0:
-            return False
-
-        self._type = 'label'
-        self._value = [self._parameters]
-
-        return True
+        return ['ABS|' + self._operand.label, None]
 
     def _assert(self, condition, error):
         assert condition, f'[ERROR] Line {self._line_number}: {error}'
@@ -0,0 +1,144 @@
+from array import array
+from bisect import bisect_right
+from typing import Iterator
+
+REL = 0
+ABS = 1
+ZP = 2
+KINDS = ('REL', 'ABS', 'ZP')
+
+# Sources of data directives start with this, those of instructions with
+# their mnemonic
+DIRECTIVE = '.'
+
+
+class Assembly:
+    __slots__ = (
+        'code',
+        'offsets',
+        'lines',
+        'sources',
+        'symbols',
+        'symbol_ids',
+        'labels',
+        'fixup_offsets',
+        'fixup_kinds',
+        'fixup_symbols',
+    )
+
+    code: bytearray
+    offsets: array
+    lines: array
+    sources: list[str]
+    symbols: list[str]
+    symbol_ids: dict[str, int]
+    labels: dict[int, int]
+    fixup_offsets: array
+    fixup_kinds: array
+    fixup_symbols: array
+
+    def __init__(self):
+        self.code = bytearray()
+        self.offsets = array('I')
+        self.lines = array('I')
+        self.sources = []
+        self.symbols = []
+        self.symbol_ids = {}
+        self.labels = {}
+        self.fixup_offsets = array('I')
+        self.fixup_kinds = array('B')
+        self.fixup_symbols = array('I')
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def symbol(self, name: str) -> int:
+        symbol = self.symbol_ids.get(name)
+        if symbol is None:
+            symbol = len(self.symbols)
+            self.symbol_ids[name] = symbol
+            self.symbols.append(name)
+
+        return symbol
+
+    def define(self, name: str) -> int:
+        symbol = self.symbol(name)
+        self.labels[symbol] = len(self.code)
+
+        return symbol
+
+    def begin(self, line: int, source: str):
+        self.offsets.append(len(self.code))
+        self.lines.append(line)
+        self.sources.append(source)
+
+    def fixup(self, offset: int, kind: int, symbol: int):
+        self.fixup_offsets.append(offset)
+        self.fixup_kinds.append(kind)
+        self.fixup_symbols.append(symbol)
+
+    def fixups(self) -> Iterator[tuple[int, int, int]]:
+        return zip(self.fixup_offsets, self.fixup_kinds, self.fixup_symbols)
+
+    def extend(self, other: 'Assembly'):
+        base = len(self.code)
+        symbols = [self.symbol(name) for name in other.symbols]
+
+        self.code += other.code
+        self.offsets.extend(array('I', [
+            offset + base for offset in other.offsets
+        ]))
+        self.lines.extend(other.lines)
+        self.sources.extend(other.sources)
+
+        for symbol, offset in other.labels.items():
+            self.labels[symbols[symbol]] = offset + base
+
+        self.fixup_offsets.extend(array('I', [
+            offset + base for offset in other.fixup_offsets
+        ]))
+        self.fixup_kinds.extend(other.fixup_kinds)
+        self.fixup_symbols.extend(array('I', [
+            symbols[symbol] for symbol in other.fixup_symbols
+        ]))
+
+    def instruction(self, index: int) -> tuple[int, int]:
+        end = len(self.code)
+        if index + 1 < len(self.offsets):
+            end = self.offsets[index + 1]
+
+        return self.offsets[index], end
+
+    def is_data(self, index: int) -> bool:
+        return self.sources[index][:1] == DIRECTIVE
+
+    def instruction_at(self, offset: int) -> int:
+        return bisect_right(self.offsets, offset) - 1
+
+    def label_offsets(self) -> dict[str, int]:
+        return {
+            self.symbols[symbol]: offset
+            for symbol, offset in self.labels.items()
+        }
+
+    def bytecode(self) -> list[tuple[list[str | int | None], str]]:
+        references = {
+            offset: (KINDS[kind], self.symbols[symbol])
+            for offset, kind, symbol in self.fixups()
+        }
+        bytecode = []
+
+        for index, source in enumerate(self.sources):
+            start, end = self.instruction(index)
+            bytes_list = list(self.code[start:end])
+
+            for position in range(start, end):
+                if position in references:
+                    kind, label = references[position]
+                    bytes_list[position - start] = f'{kind}|{label}'
+                    if kind == 'ABS':
+                        bytes_list[position - start + 1] = None
+
+            bytecode.append((bytes_list, source))
+
+        return bytecode
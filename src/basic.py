@@ -0,0 +1,153 @@
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from .compiler import Program
+from .linker import Linker
+
+# Longest line the C64 screen editor accepts
+LINE_LIMIT = 80
+
+# The decoder runs from the cassette buffer
+BOOTSTRAP_ADDRESS = 0x033C
+
+# Payload lines are numbered from here: the decoder only decodes DATA lines
+# with a line number of 768 or more, skipping the loader lines before them
+_PAYLOAD_LINE = 1000
+
+# Walks the tokenized BASIC program from TXTTAB ($2B), decoding the hex digits
+# of every payload DATA line into the destination pointer at $FD
+_BOOTSTRAP = '''
+  LDA $2B
+  STA $FB
+  LDA $2C
+  STA $FC
+  LDA #${low:02X}
+  STA $FD
+  LDA #${high:02X}
+  STA $FE
+LINE:
+  LDY #$01
+  LDA ($FB),Y         ; Link to the next line, zero at the end
+  BEQ DONE
+  LDY #$03
+  LDA ($FB),Y         ; Line number high byte
+  CMP #$03
+  BCC NEXT
+  INY
+  LDA ($FB),Y
+  CMP #$83            ; DATA token
+  BNE NEXT
+  INY
+PAIR:
+  LDA ($FB),Y
+  BEQ NEXT            ; End of the line
+  JSR NIBBLE
+  ASL
+  ASL
+  ASL
+  ASL
+  STA $02
+  INY
+  LDA ($FB),Y
+  JSR NIBBLE
+  ORA $02
+  LDX #$00
+  STA ($FD,X)
+  INC $FD
+  BNE STORED
+  INC $FE
+STORED:
+  INY
+  BNE PAIR
+NEXT:
+  LDY #$00
+  LDA ($FB),Y
+  TAX
+  INY
+  LDA ($FB),Y
+  STX $FB
+  STA $FC
+  JMP LINE
+DONE:
+  RTS
+NIBBLE:
+  CMP #$41
+  BCC DIGIT
+  SBC #$37
+  RTS
+DIGIT:
+  AND #$0F
+  RTS
+'''
+
+
+@lru_cache(maxsize=16)
+def bootstrap(start_pos: int) -> bytes:
+    source = _BOOTSTRAP.format(low=start_pos & 0xFF, high=start_pos >> 8)
+
+    program = Program()
+    for line in source.splitlines():
+        program.next_instruction(line)
+
+    return bytes(Linker(BOOTSTRAP_ADDRESS).parse(program.assembly()))
+
+
+def _data_lines(
+    values: Iterable[str],
+    number: int,
+    separator: str
+) -> Iterator[str]:
+    # Packs as many values per DATA line as fit in the screen editor line
+    line = head = f"{number} DATA"
+    for value in values:
+        piece = value if line == head else separator + value
+        if line != head and len(line) + len(piece) > LINE_LIMIT:
+            yield line + '\n'
+            number += 1
+            line = head = f"{number} DATA"
+            piece = value
+
+        line += piece
+
+    if line != head:
+        yield line + '\n'
+
+
+def _poke_loader(image, start_pos: int) -> Iterator[str]:
+    end = start_pos + len(image) - 1
+
+    yield f"10 FOR I={start_pos} TO {end}:READ A:POKE I,A:NEXT\n"
+    yield _hint(20, start_pos)
+    yield from _data_lines((str(byte) for byte in image), _PAYLOAD_LINE, ',')
+
+
+def _fast_loader(image, start_pos: int) -> Iterator[str]:
+    decoder = bootstrap(start_pos)
+    end = BOOTSTRAP_ADDRESS + len(decoder) - 1
+
+    yield f"10 FOR I={BOOTSTRAP_ADDRESS} TO {end}:READ A:POKE I,A:NEXT\n"
+    yield f"20 SYS {BOOTSTRAP_ADDRESS}\n"
+    yield _hint(25, start_pos)
+    yield from _data_lines((str(byte) for byte in decoder), 30, ',')
+
+    # Hex digits are read straight from the program text, without commas
+    yield from _data_lines(
+        (f"{byte:02X}" for byte in image),
+        _PAYLOAD_LINE,
+        ''
+    )
+
+
+def _hint(number: int, start_pos: int) -> str:
+    # Once loaded, pressing RETURN on the printed line starts the program
+    return f'{number} PRINT "SYS {start_pos}"\n'
+
+
+def write_basic(image, start_pos: int, stream, fast: bool = False):
+    loader = _fast_loader if fast else _poke_loader
+    stream.write(''.join(loader(image, start_pos)))
+
+
+def save_basic(image, start_pos: int, path, fast: bool = False):
+    with open(path, 'w') as stream:
+        write_basic(image, start_pos, stream, fast=fast)
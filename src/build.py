@@ -0,0 +1,316 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+
+from . import pack as packer
+from . import peephole
+from .assembly import Assembly
+from .basic import save_basic
+from .cache import AssemblyCache
+from .compiler import Program, Stamp
+from .layout import place
+from .linker import Linker
+from .objects import (
+    EXTENSION,
+    is_object,
+    load_object,
+    save_object,
+    up_to_date,
+)
+from .output import save_binary, save_output
+from .pack import LOAD_ADDRESS
+from .parallel import parse_parallel
+from .relax import relax, relax_branches
+from .stats import DISABLED
+
+EXTENSIONS = {
+    'text': 'txt',
+    'prg': 'prg',
+    'bin': 'bin',
+    'basic': 'bas',
+    'basic-fast': 'bas',
+    'object': EXTENSION,
+}
+BASIC_FORMATS = ('basic', 'basic-fast')
+
+
+def parse_lines(lines, file=None) -> Program:
+    # Files included by the lines are found relative to file
+    program = Program(file=file)
+
+    for line in lines:
+        program.next_instruction(line)
+
+    return program
+
+
+def parse_file(file) -> Program:
+    with open(file, "r") as source:
+        return parse_lines(source, file)
+
+
+def assemble_file(
+    file,
+    start_pos: int,
+    cache: AssemblyCache | None = None,
+    parallel: bool = False,
+    jobs: int | None = None,
+    stats=DISABLED,
+    optimize: bool = False,
+    rewrites: list[peephole.Rewrite] | None = None,
+    long_branches: bool = False
+) -> tuple[Assembly, bytearray]:
+    content = None
+    if cache is not None or not parallel:
+        with stats.stage('read'), open(file, "rb") as source:
+            content = source.read()
+
+    key = None
+    if cache is not None:
+        with stats.stage('cache'):
+            key = cache.key(
+                content,
+                start_pos,
+                optimize,
+                long_branches,
+                file=file
+            )
+            cached = cache.get(key)
+        stats.count('cache hits', cache.hits)
+        stats.count('cache misses', cache.misses)
+        if cached:
+            assembly, image, applied = cached
+            if rewrites is not None:
+                rewrites.extend(applied)
+            _count(stats, content, assembly, image)
+            return assembly, image
+
+    includes = {}
+    with stats.stage('parse'):
+        assembly = _parse(file, content, parallel, jobs, includes)
+    if includes:
+        stats.count('includes', len(includes))
+
+    applied = []
+    if optimize:
+        with stats.stage('optimize'):
+            assembly, applied = peephole.optimize(assembly)
+        stats.count('rewrites', len(applied))
+        if rewrites is not None:
+            rewrites.extend(applied)
+
+    with stats.stage('link'):
+        assembly = relax(assembly, start_pos)
+        if long_branches:
+            assembly = relax_branches(assembly, start_pos)
+        image = Linker(start_pos).parse(assembly)
+
+    if cache is not None:
+        with stats.stage('cache'):
+            cache.put(key, assembly, image, includes, applied)
+
+    _count(stats, content, assembly, image)
+
+    return assembly, image
+
+
+def compile_file(
+    file,
+    output=None,
+    optimize: bool = False,
+    rewrites: list[peephole.Rewrite] | None = None
+) -> Assembly:
+    # Parses a module without linking it, writing its object file
+    program = parse_file(file)
+    assembly = program.assembly()
+    if optimize:
+        assembly, applied = peephole.optimize(assembly)
+        if rewrites is not None:
+            rewrites.extend(applied)
+
+    save_object(
+        assembly,
+        output or artifact_path(file, 'object'),
+        optimize,
+        includes=program.includes
+    )
+
+    return assembly
+
+
+def load_module(
+    file,
+    optimize: bool = False,
+    rewrites: list[peephole.Rewrite] | None = None
+) -> Assembly:
+    # Object files are linked as they are, and sources are only compiled
+    # again when they changed since their object file was written
+    if is_object(file):
+        return load_object(file)
+
+    output = artifact_path(file, 'object')
+    if up_to_date(output, file, optimize):
+        return load_object(output)
+
+    return compile_file(file, output, optimize, rewrites)
+
+
+def link_files(
+    files: list,
+    start_pos: int,
+    stats=DISABLED,
+    optimize: bool = False,
+    rewrites: list[peephole.Rewrite] | None = None,
+    long_branches: bool = False
+) -> tuple[Assembly, bytearray]:
+    with stats.stage('compile'):
+        modules = [
+            (file, load_module(file, optimize, rewrites)) for file in files
+        ]
+
+    with stats.stage('link'):
+        assembly = Linker.combine(modules)
+        assembly = relax(assembly, start_pos)
+        if long_branches:
+            assembly = relax_branches(assembly, start_pos)
+        image = Linker(start_pos).parse(assembly)
+
+    stats.count('modules', len(files))
+    _count(stats, None, assembly, image)
+
+    return assembly, image
+
+
+def _parse(
+    file,
+    content: bytes | None,
+    parallel: bool,
+    jobs: int | None,
+    includes: dict[str, Stamp]
+):
+    if parallel:
+        return parse_parallel(file, jobs, includes)
+
+    program = parse_lines(content.decode().splitlines(), file)
+    includes.update(program.includes)
+
+    return program.assembly()
+
+
+def _count(stats, content: bytes | None, assembly: Assembly, image):
+    if stats is DISABLED:
+        return
+
+    if content is not None:
+        stats.count('lines', len(content.splitlines()))
+    stats.count('instructions', len(assembly))
+    stats.count('labels', len(assembly.labels))
+    stats.count('fixups', len(assembly.fixup_offsets))
+    stats.count('bytes', len(image))
+
+
+def artifact_path(file, format: str) -> str:
+    return os.path.splitext(file)[0] + '.' + EXTENSIONS[format]
+
+
+def build_file(
+    file,
+    start_pos: int,
+    format: str,
+    cache_directory: str | None = None,
+    bytes_per_line: int = 8,
+    optimize: bool = False,
+    long_branches: bool = False,
+    pack: bool = False,
+    rewrites: list[peephole.Rewrite] | None = None
+) -> str:
+    if format == 'object':
+        output = artifact_path(file, format)
+        compile_file(file, output, optimize, rewrites)
+        return output
+
+    cache = None
+    if cache_directory is not None:
+        cache = AssemblyCache(cache_directory)
+
+    assembly, image = assemble_file(
+        file,
+        start_pos,
+        cache,
+        optimize=optimize,
+        rewrites=rewrites,
+        long_branches=long_branches
+    )
+    output = artifact_path(file, format)
+    layout = place(assembly, start_pos)
+
+    if format == 'text':
+        save_output(assembly, image, start_pos, output, bytes_per_line)
+    elif format in BASIC_FORMATS:
+        image, start_pos = layout.flatten(image)
+        save_basic(image, start_pos, output, fast=format == 'basic-fast')
+    else:
+        if pack:
+            image, start_pos = layout.flatten(image)
+            image, start_pos = packer.pack(image, start_pos), LOAD_ADDRESS
+            layout = None
+
+        save_binary(
+            image,
+            start_pos,
+            output,
+            prg=format == 'prg',
+            layout=layout
+        )
+
+    return output
+
+
+def _build_logged(*arguments) -> tuple[str, list[peephole.Rewrite]]:
+    # Workers send the rewrites back along with the output
+    rewrites = []
+    output = build_file(*arguments, rewrites=rewrites)
+
+    return output, rewrites
+
+
+def build_batch(
+    files: list[str],
+    start_pos: int,
+    format: str,
+    jobs: int | None = None,
+    cache_directory: str | None = None,
+    bytes_per_line: int = 8,
+    optimize: bool = False,
+    long_branches: bool = False,
+    pack: bool = False,
+    rewrites: dict[str, list[peephole.Rewrite]] | None = None
+) -> Iterator[tuple[str, str | None, str | None]]:
+    # The rewrites of each file are recorded before yielding its result
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                _build_logged,
+                file,
+                start_pos,
+                format,
+                cache_directory,
+                bytes_per_line,
+                optimize,
+                long_branches,
+                pack
+            ): file
+            for file in files
+        }
+
+        for future in as_completed(futures):
+            file = futures[future]
+            try:
+                output, applied = future.result()
+            except Exception as error:
+                yield file, None, str(error)
+                continue
+
+            if rewrites is not None:
+                rewrites[file] = applied
+            yield file, output, None
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from . import __version__
+from .assembly import Assembly
+from .compiler import Stamp, stamp
+from .peephole import Rewrite
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SUFFIX = '.pickle'
+
+
+def default_directory() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+
+    return os.path.join(base, 'danmos')
+
+
+class AssemblyCache:
+    _directory: str
+    _max_bytes: int
+    hits: int
+    misses: int
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(
+        self,
+        source: bytes,
+        start_pos: int,
+        *flags: bool,
+        file=None
+    ) -> str:
+        # Flags are the options changing the assembled program. Included
+        # files are found relative to the source file: the same text in
+        # another directory can assemble to another program
+        digest = hashlib.sha256()
+        digest.update(__version__.encode())
+        digest.update(start_pos.to_bytes(4, 'little'))
+        digest.update(bytes(flags))
+        if file is not None:
+            digest.update(os.path.realpath(file).encode())
+            digest.update(b'\0')
+        digest.update(source)
+
+        return digest.hexdigest()
+
+    def get(
+        self,
+        key: str
+    ) -> tuple[Assembly, bytearray, list[Rewrite]] | None:
+        # The key only covers the source: entries built from included files
+        # stamped differently now are stale. The peephole rewrites applied
+        # when assembling are kept, to be logged again
+        path = self._path(key)
+
+        try:
+            with open(path, 'rb') as entry:
+                assembly, image, includes, rewrites = pickle.load(entry)
+            if any(stamp(file) != value for file, value in includes.items()):
+                raise ValueError('Included file changed')
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Truncated or stale entries are dropped and rebuilt
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # The modification time keeps track of the least recently used entry
+        os.utime(path)
+        self.hits += 1
+
+        return assembly, image, rewrites
+
+    def put(
+        self,
+        key: str,
+        assembly: Assembly,
+        image: bytearray,
+        includes: dict[str, Stamp] | None = None,
+        rewrites: list[Rewrite] | None = None
+    ):
+        os.makedirs(self._directory, exist_ok=True)
+
+        descriptor, temporary = tempfile.mkstemp(dir=self._directory)
+        with os.fdopen(descriptor, 'wb') as entry:
+            pickle.dump(
+                (assembly, image, includes or {}, rewrites or []),
+                entry,
+                pickle.HIGHEST_PROTOCOL
+            )
+
+        os.replace(temporary, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+
+        for entry in os.scandir(self._directory):
+            if not entry.name.endswith(_SUFFIX):
+                continue
+
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Removed by a concurrent assembler sharing the directory
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+
+            self._remove(path)
+            total -= size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key + _SUFFIX)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
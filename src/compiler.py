@@ -1,44 +1,128 @@
-from .address import AddressResolver
+import mmap
+import os
+from array import array
+
+from .address import Operand, classify
+from .assembly import ABS, DIRECTIVE, REL, ZP, Assembly
+from .incremental import Edit, LineIndex
+from .layout import (
+    AREA,
+    AREA_KINDS,
+    CODE_AREA,
+    FILL,
+    ORG,
+    SEGMENT,
+    ZP_AREA,
+)
+from .opcodes import (
+    ABSOLUTE,
+    ACCUMULATOR,
+    BRANCHES,
+    IMPLIED,
+    MNEMONICS,
+    NARROW_MODES,
+    OPCODES,
+    RELATIVE,
+    WIDER_MODES,
+    ZERO_PAGE,
+)
+
+INCLUDE = '.include'
+INCBIN = '.incbin'
+
+# Stamp of a file: its modification time and size
+Stamp = tuple[int, int]
+
+# Included files parsed by this process, by real path, with the stamps of
+# every file they are made of: reused while none of them changes, across
+# the sources of a run and the requests of a daemon
+_included: dict[str, tuple[dict[str, Stamp], Assembly]] = {}
 
 
 class Program:
-    _labels: dict[str, bool]
-    _bytecode: list[tuple[list, str]]
-    _program_counter: int
+    # Files included so far, directly or not, with their stamp when parsed
+    includes: dict[str, Stamp]
+    _assembly: Assembly
     _line_number: int
-    _operands: dict[str, callable]
-
-    def __init__(self):
-        self._labels = {}
-        self._bytecode = []
-        self._program_counter = 0
-        self._line_number = 0
-        self._operands = {
-            'BEQ': self.op_beq,
-            'CMP': self.op_cmp,
-            'DEX': self.op_dex,
-            'JMP': self.op_jmp,
-            'JSR': self.op_jsr,
-            'LDX': self.op_ldx,
-            'NOP': self.op_nop,
-            'PHA': self.op_pha,
-            'RTS': self.op_rts,
-            'STA': self.op_sta,
-            'STX': self.op_stx,
-            'TSX': self.op_tsx,
-        }
-
-    def labels(self) -> dict[str, bool]:
-        return self._labels
+    _label_lines: dict[int, list[int]]
+    _index: LineIndex | None
+    _stale: bool
+    _file: str | None
+    # Real paths of the files including this one, this one last
+    _chain: tuple[str, ...]
+    _included: bool
+
+    def __init__(
+        self,
+        line_offset: int = 0,
+        file: str | None = None,
+        chain: tuple[str, ...] | None = None
+    ):
+        self.includes = {}
+        self._assembly = Assembly()
+        self._line_number = line_offset
+        self._label_lines = {}
+        self._index = None
+        self._stale = False
+        self._file = file
+        self._included = chain is not None
+        if chain is None and file is not None:
+            chain = (os.path.realpath(file),)
+        self._chain = chain or ()
+
+    def assembly(self) -> Assembly:
+        if self._stale:
+            self._assembly = self._index.assembly(
+                self._assembly.symbols,
+                self._assembly.symbol_ids
+            )
+            self._stale = False
+
+        return self._assembly
+
+    def update_line(self, line_no: int, text: str) -> Edit:
+        including = self.includes or includes_file(text)
+        assert not including, 'Included files are not updated in place'
+
+        if self._index is None:
+            self._index = LineIndex(
+                self._assembly,
+                self._label_lines,
+                self._line_number
+            )
+
+        assembly = self._assembly
+        line_number = self._line_number
+
+        # The line is parsed on its own, sharing the symbol table
+        update = Assembly()
+        update.symbols = assembly.symbols
+        update.symbol_ids = assembly.symbol_ids
+
+        self._assembly = update
+        self._line_number = line_no - 1
+        try:
+            self.next_instruction(text)
+        finally:
+            self._assembly = assembly
+            self._line_number = line_number
+
+        edit = self._index.update(line_no - 1, update)
+        self._stale = True
+
+        return edit
+
+    def labels(self) -> dict[str, int]:
+        return self._assembly.label_offsets()
 
     def bytecode(self) -> list[tuple[list[str | int | None], str]]:
-        return self._bytecode
+        return self._assembly.bytecode()
 
     def next_instruction(self, line: str):
         self._line_number += 1
         instruction = line.strip()
 
-        comment_position = line.find(';')
+        comment_position = _comment(line)
         if comment_position != -1:
             instruction = line[:comment_position].strip()
 
@@ -46,135 +130,350 @@ class Program:
             return
 
         if instruction.endswith(':'):
-            self._labels[instruction[:-1].strip()] = self._program_counter
+            symbol = self._assembly.define(instruction[:-1].strip())
+            self._label_lines.setdefault(symbol, []).append(self._line_number)
+        elif instruction[0] == DIRECTIVE:
+            self._directive(instruction)
         else:
-            parsed = self._parse_instruction(instruction)
-            self._program_counter += len(parsed)
-            self._bytecode.append((parsed, instruction))
+            self._assembly.begin(self._line_number, instruction)
+            self._parse_instruction(instruction)
 
     def _parse_instruction(self, instruction):
-        operand = instruction[0:3]
+        mnemonic = instruction[0:3]
         parameters = instruction[3:].strip()
-        parser = self._operands.get(operand)
-        self._assert(parser is not None, f'Unknown instruction "{operand}"')
-
-        address = AddressResolver(parameters, self._line_number)
-
-        return parser(address)
-
-    def op_beq(self, address: AddressResolver):
-        if address.is_label():
-            return [0xF0, *address.relative_label()]
-
-        self._error('[BEQ] Only labels allowed')
-
-    def op_cmp(self, address: AddressResolver):
-        # Immediate    CMP #$44     $C9
-        # Zero Page    CMP $44      $C5
-        # Zero Page,X  CMP $44,X    $D5
-        # Absolute     CMP $4400    $CD
-        # Absolute,X   CMP $4400,X  $DD
-        # Absolute,Y   CMP $4400,Y  $D9
-        # (Indirect,X) CMP ($44,X)  $C1
-        # (Indirect),Y CMP ($44),Y  $D1
-
-        if address.is_immediate():
-            return [0xC9, *address.value()]
-
-        self._error('[CMP] Invalid or unsupported addressing mode')
-
-    def op_dex(self, address: AddressResolver):
-        if address.is_missing():
-            return [0xCA]
-
-        self._error('[DEX] A parameter was provided, but was not expected')
-
-    def op_jmp(self, address: AddressResolver):
-        # Indirect JMP ($5597) $6C
-        if absolute := self._resolve_absolute(0x4C, address):
-            return absolute
-
-        self._error('[JMP] Invalid or unsupported addressing mode')
-
-    def op_jsr(self, address: AddressResolver):
-        if absolute := self._resolve_absolute(0x20, address):
-            return absolute
-
-        self._error('[JSR] Invalid or unsupported addressing mode')
-
-    def op_ldx(self, address: AddressResolver):
-        # Immediate   LDX #$44    $A2
-        # Zero Page   LDX $44     $A6
-        # Zero Page,Y LDX $44,Y   $B6
-        # Absolute    LDX $4400   $AE
-        # Absolute,Y  LDX $4400,Y $BE
-        if address.is_immediate():
-            return [0xA2, *address.value()]
+        self._assert(
+            mnemonic in MNEMONICS,
+            f'Unknown instruction "{mnemonic}"'
+        )
+
+        operand = self._classify(parameters)
+        mode = operand.mode
+
+        if operand.label is not None and mnemonic in BRANCHES:
+            mode = RELATIVE
+        elif mode == IMPLIED and (mnemonic, ACCUMULATOR) in OPCODES:
+            mode = ACCUMULATOR
+
+        encoding = None
+        if operand.value is not None and operand.value <= 0xFF:
+            encoding = OPCODES.get((mnemonic, NARROW_MODES.get(mode)))
+
+        encoding = encoding or OPCODES.get((mnemonic, mode))
+        if encoding is None and mode in WIDER_MODES:
+            encoding = OPCODES.get((mnemonic, WIDER_MODES[mode]))
+        if encoding is None and operand.label is not None:
+            # STX and STY only index labels in their zero page form
+            encoding = OPCODES.get((mnemonic, NARROW_MODES.get(mode)))
+
+        if encoding is None:
+            self._unsupported(mnemonic)
+
+        opcode, size, _ = encoding
+        assembly = self._assembly
+        code = assembly.code
+
+        if operand.label is not None:
+            # Labels in zero page only modes must resolve to $00-$FF
+            if mode == RELATIVE:
+                kind = REL
+            elif size == 3:
+                kind = ABS
+            elif size == 2:
+                kind = ZP
+            else:
+                self._unsupported(mnemonic)
+
+            assembly.fixup(len(code) + 1, kind, assembly.symbol(operand.label))
+            code.append(opcode)
+            code.extend(bytes(size - 1))
+        elif size == 1:
+            code.append(opcode)
+        elif size == 2:
+            code.append(opcode)
+            code.append(operand.value)
+        else:
+            code.append(opcode)
+            code.append(operand.value & 0xFF)
+            code.append(operand.value >> 8)
+
+    def _directive(self, instruction: str):
+        name, *arguments = instruction.split(None, 1)
+        directive = _DIRECTIVES.get(name.lower())
+        self._assert(directive is not None, f'Unknown directive "{name}"')
+
+        # Data is kept with its directive as its source
+        if directive is not Program._include:
+            self._assembly.begin(self._line_number, instruction)
+
+        directive(self, arguments[0].strip() if arguments else '')
+
+    def _byte(self, arguments: str):
+        values = [self._number(item, 0xFF) for item in self._list(arguments)]
+        self._assembly.code += bytes(values)
+
+    def _word(self, arguments: str):
+        assembly = self._assembly
+        for item in self._list(arguments):
+            operand = self._classify(item)
+            if operand.label is not None:
+                symbol = assembly.symbol(operand.label)
+                assembly.fixup(len(assembly.code), ABS, symbol)
+                assembly.code += bytes(2)
+            else:
+                value = self._number(item, 0xFFFF)
+                assembly.code += value.to_bytes(2, 'little')
+
+    def _fill(self, arguments: str):
+        items = self._list(arguments)
+        self._assert(len(items) <= 2, '.fill takes a count and a value')
+
+        count = self._number(items[0], 0xFFFF)
+        value = self._number(items[1], 0xFF) if len(items) > 1 else 0
+        self._assert(count > 0, '.fill needs a count of at least one byte')
+
+        self._assembly.code += bytes([value]) * count
+        if len(items) == 1:
+            # Read when placing the code: this only reserves memory
+            self._assembly.sources[-1] = f'{FILL} ${count:04X}'
+
+    def _text(self, arguments: str):
+        text, rest = self._quoted(arguments, '.text')
+        self._assert(text and not rest, '.text takes one non-empty string')
+        self._assert(text.isascii(), '.text only takes ASCII characters')
+
+        self._assembly.code += text.encode('ascii')
+
+    def _org(self, arguments: str):
+        # Placement directives are kept in a canonical form, read when linking
+        address = self._number(arguments, 0xFFFF)
+        self._assembly.sources[-1] = f'{ORG} ${address:04X}'
+
+    def _segment(self, arguments: str):
+        self._assert(
+            arguments.isidentifier(),
+            f'Invalid segment name "{arguments}"'
+        )
+        self._assembly.sources[-1] = f'{SEGMENT} {arguments}'
+
+    def _area(self, arguments: str):
+        items = self._list(arguments)
+        self._assert(
+            len(items) in (3, 4),
+            f'{AREA} takes a name, a first and a last address and a kind'
+        )
+
+        name = items[0]
+        self._assert(name.isidentifier(), f'Invalid area name "{name}"')
+        first = self._number(items[1], 0xFFFF)
+        last = self._number(items[2], 0xFFFF)
+        kind = items[3].lower() if len(items) > 3 else CODE_AREA
+        self._assert(
+            kind in AREA_KINDS,
+            f'Unknown area kind "{kind}" ({", ".join(AREA_KINDS)})'
+        )
+        self._assert(first <= last, f'Area {name} ends before it starts')
+        self._assert(
+            kind != ZP_AREA or last <= 0xFF,
+            f'Zero page area {name} ends at ${last:04X}'
+        )
+
+        self._assembly.sources[-1] = (
+            f'{AREA} {name} ${first:04X} ${last:04X} {kind}'
+        )
+
+    def _incbin(self, arguments: str):
+        written, rest = self._quoted(arguments, INCBIN)
+        offset, length = 0, None
+        if rest:
+            usage = f'{INCBIN} takes a file name, an offset and a length'
+            self._assert(rest[0] == ',', usage)
+            items = self._list(rest[1:])
+            self._assert(len(items) <= 2, usage)
+            offset = self._number(items[0], 0xFFFF)
+            if len(items) > 1:
+                length = self._number(items[1], 0xFFFF)
+
+        _, path = self._path(written)
+        stamped = stamp(path)
+        found = stamped is not None
+        self._assert(found, f'Included file "{written}" not found')
+
+        # Copied from the mapped file into the code in one slice
+        with open(path, 'rb') as source:
+            size = os.fstat(source.fileno()).st_size
+            end = size if length is None else offset + length
+            self._assert(
+                offset < end <= size,
+                f'{INCBIN} range ${offset:X}-${end:X} outside "{written}" '
+                f'(${size:X} bytes)'
+            )
+
+            with (
+                mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data,
+                memoryview(data) as view
+            ):
+                self._assembly.code += view[offset:end]
+
+        self.includes[path] = stamped
+
+    def _include(self, arguments: str):
+        written, rest = self._quoted(arguments, INCLUDE)
+        self._assert(not rest, f'{INCLUDE} takes a single file name')
+        name, path = self._path(written)
+
+        if path in self._chain:
+            chain = [*self._chain, path]
+            chain = chain[chain.index(path):]
+            cycle = ' -> '.join(os.path.basename(file) for file in chain)
+            self._error(f'Circular {INCLUDE} of "{written}" ({cycle})')
+
+        try:
+            includes, included = _parse_included(name, path, self._chain)
+        except FileNotFoundError:
+            self._error(f'Included file "{written}" not found')
+
+        # The included code belongs to this line, as far as the line numbers
+        # of this file go
+        assembly = self._assembly
+        start = len(assembly.lines)
+        assembly.extend(included)
+        assembly.lines[start:] = array(
+            'I',
+            [self._line_number] * (len(assembly.lines) - start)
+        )
+        self.includes.update(includes)
+
+    def _path(self, written: str) -> tuple[str, str]:
+        # Relative to the including file
+        self._assert(written, 'Missing file name')
+        name = written
+        if self._file is not None:
+            name = os.path.join(os.path.dirname(self._file), written)
+
+        return name, os.path.realpath(name)
+
+    def _quoted(self, arguments: str, directive: str) -> tuple[str, str]:
+        # A quoted string, and the arguments after it
+        end = arguments.find('"', 1)
+        self._assert(
+            arguments[:1] == '"' and end != -1,
+            f'{directive} needs a quoted string'
+        )
+
+        return arguments[1:end], arguments[end + 1:].strip()
+
+    def _list(self, arguments: str) -> list[str]:
+        items = [item.strip() for item in arguments.split(',')]
+        self._assert(all(items), 'Missing value')
+
+        return items
+
+    def _number(self, item: str, limit: int) -> int:
+        operand = self._classify(item)
+        self._assert(
+            operand.mode in (ZERO_PAGE, ABSOLUTE) and operand.label is None,
+            f'Expected a hex value, found "{item}"'
+        )
+        self._assert(
+            operand.value <= limit,
+            f'Value "{item}" out of range (${limit:X} at most)'
+        )
+
+        return operand.value
+
+    def _classify(self, parameters: str) -> Operand:
+        try:
+            return classify(parameters)
+        except AssertionError as error:
+            self._error(str(error))
+
+    def _unsupported(self, mnemonic: str):
+        if (mnemonic, IMPLIED) in OPCODES:
+            self._error(
+                f'[{mnemonic}] A parameter was provided, but was not expected'
+            )
+
+        if mnemonic in BRANCHES:
+            self._error(f'[{mnemonic}] Only labels allowed')
+
+        self._error(f'[{mnemonic}] Invalid or unsupported addressing mode')
 
-        self._error('[LDX] Invalid or unsupported addressing mode')
+    def _assert(self, condition: bool, error: str):
+        if self._included:
+            location = f'{self._file}, line {self._line_number}'
+        else:
+            location = f'Line {self._line_number}'
 
-    def op_nop(self, address: AddressResolver):
-        if address.is_missing():
-            return [0xEA]
+        assert condition, f'[ERROR] {location}: {error}'
 
-        self._error('[NOP] A parameter was provided, but was not expected')
+    def _error(self, error: str):
+        self._assert(False, error)
 
-    def op_pha(self, address: AddressResolver):
-        if address.is_missing():
-            return [0x48]
 
-        self._error('[PHA] A parameter was provided, but was not expected')
+def stamp(file) -> Stamp | None:
+    try:
+        stat = os.stat(file)
+    except FileNotFoundError:
+        return None
 
-    def op_rts(self, address: AddressResolver):
-        if address.is_missing():
-            return [0x60]
+    return stat.st_mtime_ns, stat.st_size
 
-        self._error('[RTS] A parameter was provided, but was not expected')
 
-    def op_sta(self, address: AddressResolver):
-        # Zero Page    STA $44      $85
-        # Zero Page,X  STA $44,X    $95
-        # Absolute     STA $4400    $8D
-        # Absolute,X   STA $4400,X  $9D
-        # Absolute,Y   STA $4400,Y  $99
-        # (Indirect,X) STA ($44,X)  $81
-        # (Indirect),Y STA ($44),Y  $91
+def _parse_included(
+    name: str,
+    path: str,
+    chain: tuple[str, ...]
+) -> tuple[dict[str, Stamp], Assembly]:
+    cached = _included.get(path)
+    if cached is not None:
+        includes, assembly = cached
+        current = all(stamp(file) == value for file, value in includes.items())
+        if current and not any(file in includes for file in chain):
+            return cached
 
-        if address.is_zero_page():
-            return [0x85, *address.value()]
+    # Stamped before reading: a change while parsing is seen next time
+    includes = {path: stamp(path)}
+    with open(path, 'r') as source:
+        lines = source.read().splitlines()
 
-        self._error('[STA] Invalid or unsupported addressing mode')
+    program = Program(file=name, chain=(*chain, path))
+    for line in lines:
+        program.next_instruction(line)
 
-    def op_stx(self, address: AddressResolver):
-        # Zero Page   STX $44   $86
-        # Zero Page,Y STX $44,Y $96
+    includes.update(program.includes)
+    _included[path] = includes, program.assembly()
 
-        if absolute := self._resolve_absolute(0x8E, address):
-            return absolute
+    return _included[path]
 
-        self._error('[STX] Invalid or unsupported addressing mode')
 
-    def op_tsx(self, address: AddressResolver):
-        if address.is_missing():
-            return [0xBA]
+_DIRECTIVES = {
+    '.byte': Program._byte,
+    '.word': Program._word,
+    FILL: Program._fill,
+    '.text': Program._text,
+    ORG: Program._org,
+    SEGMENT: Program._segment,
+    AREA: Program._area,
+    INCBIN: Program._incbin,
+    INCLUDE: Program._include,
+}
 
-        self._error('[TSX] A parameter was provided, but was not expected')
 
-    def _resolve_absolute(
-        self,
-        bytecode: int,
-        address: AddressResolver
-    ) -> list | None:
-        if address.is_absolute():
-            return [bytecode, *address.value()]
+def includes_file(line: str) -> bool:
+    return line.lstrip().lower().startswith((INCLUDE, INCBIN))
 
-        if address.is_label():
-            return [bytecode, *address.absolute_label()]
 
-        return None
+def _comment(line: str) -> int:
+    # Position of the comment, outside of quoted strings
+    position = line.find(';')
+    if position == -1 or '"' not in line[:position]:
+        return position
 
-    def _assert(self, condition: bool, error: str):
-        assert condition, f'[ERROR] Line {self._line_number}: {error}'
+    quoted = False
+    for position, character in enumerate(line):
+        if character == '"':
+            quoted = not quoted
+        elif character == ';' and not quoted:
+            return position
 
-    def _error(self, error: str):
-        self._assert(False, error)
+    return -1
@@ -0,0 +1,164 @@
+import sys
+from bisect import bisect_right
+from typing import Iterator, NamedTuple
+
+from .assembly import Assembly
+from .layout import place
+from .opcodes import (
+    ABSOLUTE_X,
+    ABSOLUTE_Y,
+    BRANCHES,
+    DECODE,
+    INDIRECT_Y,
+    PAGE_PENALTY,
+)
+
+_INDEXED = frozenset((ABSOLUTE_X, ABSOLUTE_Y, INDIRECT_Y))
+
+
+class Timing(NamedTuple):
+    index: int
+    address: int
+    cycles: int
+    # Extra cycles of a taken branch: 2 when the target is on another page
+    taken: int
+    # 1 when an indexed read can cross a page
+    page: int
+
+    @property
+    def longest(self) -> int:
+        return self.cycles + self.taken + self.page
+
+
+def timings(assembly: Assembly, image, start_pos: int) -> Iterator[Timing]:
+    layout = place(assembly, start_pos)
+    for index in range(len(assembly)):
+        # Data is never executed as laid out
+        if assembly.is_data(index):
+            continue
+
+        start, _ = assembly.instruction(index)
+        address = layout.address(start)
+        mnemonic, mode, size, cycles = DECODE[image[start]]
+
+        taken = page = 0
+        if mnemonic in BRANCHES:
+            target = _branch_target(address, image[start + 1])
+            taken = 1 if _same_page(address + size, target) else 2
+        elif mnemonic in PAGE_PENALTY and mode in _INDEXED:
+            # The index is only known at run time: a base address at the
+            # start of a page is the only one that never crosses
+            page = 1 if mode == INDIRECT_Y or image[start + 1] else 0
+
+        yield Timing(index, address, cycles, taken, page)
+
+
+def blocks(assembly: Assembly) -> tuple[list[int], list[str]]:
+    # Instruction offsets where each label block starts, and its name
+    names = {}
+    for label, offset in assembly.label_offsets().items():
+        names.setdefault(offset, []).append(label)
+
+    offsets = sorted(names)
+
+    return offsets, [', '.join(names[offset]) for offset in offsets]
+
+
+def page_warnings(
+    assembly: Assembly,
+    image,
+    start_pos: int,
+    critical: list[str]
+) -> Iterator[str]:
+    critical = set(critical)
+    if not critical:
+        return
+
+    offsets, names = blocks(assembly)
+
+    for timing in timings(assembly, image, start_pos):
+        if timing.taken < 2:
+            continue
+
+        start, _ = assembly.instruction(timing.index)
+        block = bisect_right(offsets, start) - 1
+        if block < 0 or critical.isdisjoint(names[block].split(', ')):
+            continue
+
+        target = _branch_target(timing.address, image[start + 1])
+        source = assembly.sources[timing.index]
+        line = assembly.lines[timing.index]
+
+        yield (
+            f'[WARNING] Line {line}: "{source}" in {names[block]} crosses '
+            f'a page boundary (${timing.address:04X} -> ${target:04X})'
+        )
+
+
+def _cycles(assembly: Assembly, image, start_pos: int):
+    offsets, names = blocks(assembly)
+    view = memoryview(image)
+    block = None
+    shortest = longest = 0
+
+    yield 'Cycles:'
+    for timing in timings(assembly, image, start_pos):
+        start, end = assembly.instruction(timing.index)
+
+        current = bisect_right(offsets, start) - 1
+        if current != block:
+            if block is not None:
+                yield _total(shortest, longest)
+            yield f"\n  {names[current] if current >= 0 else '-'}:"
+            block = current
+            shortest = longest = 0
+
+        shortest += timing.cycles
+        longest += timing.longest
+
+        penalty = ''
+        if timing.taken:
+            penalty = f"+{timing.taken} taken"
+        elif timing.page:
+            penalty = "+1 page"
+
+        yield "\n\t{:04X}: {:<9} {:<28}{:>2} {:<9}{:>9}".format(
+            timing.address,
+            view[start:end].hex(' ').upper(),
+            assembly.sources[timing.index],
+            timing.cycles,
+            penalty,
+            _range(shortest, longest)
+        )
+
+    if block is not None:
+        yield _total(shortest, longest)
+
+    yield '\n'
+
+
+def write_cycles(assembly: Assembly, image, start_pos: int, stream):
+    stream.write(''.join(_cycles(assembly, image, start_pos)))
+
+
+def print_cycles(assembly: Assembly, image, start_pos: int):
+    write_cycles(assembly, image, start_pos, sys.stdout)
+
+
+def _total(shortest: int, longest: int) -> str:
+    return f"\n\tBlock total: {_range(shortest, longest)} cycles\n"
+
+
+def _range(shortest: int, longest: int) -> str:
+    if shortest == longest:
+        return str(shortest)
+
+    return f"{shortest}-{longest}"
+
+
+def _branch_target(address: int, displacement: int) -> int:
+    return (address + 2 + displacement - (displacement >> 7 << 8)) & 0xFFFF
+
+
+def _same_page(first: int, second: int) -> bool:
+    return first >> 8 == second >> 8
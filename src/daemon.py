@@ -0,0 +1,142 @@
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+
+# Only the standard library is imported here, so that forwarding a command
+# line with `python -m src.daemon` costs no more than starting Python
+
+
+def default_socket() -> str:
+    return os.environ.get('DANMOS_SOCKET') or os.path.join(
+        tempfile.gettempdir(),
+        f'danmos-{os.getuid()}.sock'
+    )
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        status, stdout, stderr = self.server.run(
+            request['argv'],
+            request['cwd']
+        )
+
+        header = {
+            'status': status,
+            'stdout': len(stdout),
+            'stderr': len(stderr),
+        }
+        try:
+            self.wfile.write(json.dumps(header).encode() + b'\n')
+            self.wfile.write(stdout)
+            self.wfile.write(stderr)
+        except BrokenPipeError:
+            # The client went away, nobody is left to read the result
+            pass
+
+
+class AssemblerServer(socketserver.UnixStreamServer):
+    _main: callable
+
+    def __init__(self, path: str, main: callable):
+        self._main = main
+        _remove_stale(path)
+
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)
+
+    def run(self, argv: list[str], cwd: str) -> tuple[int, bytes, bytes]:
+        stdout = io.BytesIO()
+        stderr = io.BytesIO()
+        out = io.TextIOWrapper(stdout, write_through=True)
+        err = io.TextIOWrapper(stderr, write_through=True)
+
+        directory = os.getcwd()
+        try:
+            os.chdir(cwd)
+            with redirect_stdout(out), redirect_stderr(err):
+                status = self._main(argv)
+        except SystemExit as exit:
+            status = exit.code if isinstance(exit.code, int) else 1
+        except Exception as error:
+            err.write(f"{error}\n")
+            status = 1
+        finally:
+            os.chdir(directory)
+            out.flush()
+            err.flush()
+
+        return status or 0, stdout.getvalue(), stderr.getvalue()
+
+    def server_close(self):
+        super().server_close()
+
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def _remove_stale(path: str):
+    # Only the socket of a daemon that is gone is replaced: a daemon still
+    # answers on its socket, and other files are not ours to remove
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+
+    assert stat.S_ISSOCK(mode), f'{path} exists and is not a socket'
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        running = probe.connect_ex(path) == 0
+    assert not running, f'An assembler is already running on {path}'
+
+    os.remove(path)
+
+
+def serve(path: str, main: callable) -> int:
+    with AssemblerServer(path, main) as server:
+        print(f"Listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+    return 0
+
+
+def forward(argv: list[str], path: str) -> int:
+    request = {'argv': argv, 'cwd': os.getcwd()}
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps(request).encode() + b'\n')
+
+        with connection.makefile('rb') as response:
+            header = json.loads(response.readline())
+            stdout = response.read(header['stdout'])
+            stderr = response.read(header['stderr'])
+
+    sys.stdout.buffer.write(stdout)
+    sys.stdout.buffer.flush()
+    sys.stderr.buffer.write(stderr)
+    sys.stderr.buffer.flush()
+
+    return header['status']
+
+
+def socket_argument(argv: list[str]) -> str:
+    for position, argument in enumerate(argv):
+        if argument.startswith('--socket='):
+            return argument[len('--socket='):]
+        if argument == '--socket' and position + 1 < len(argv):
+            return argv[position + 1]
+
+    return default_socket()
+
+
+if __name__ == '__main__':
+    sys.exit(forward(sys.argv[1:], socket_argument(sys.argv[1:])))
@@ -0,0 +1,798 @@
+import sys
+from bisect import bisect_right
+from typing import Callable, Iterator
+
+from .assembly import Assembly
+from .cycles import blocks
+from .layout import Layout, place
+from .opcodes import (
+    ABSOLUTE,
+    ABSOLUTE_X,
+    ABSOLUTE_Y,
+    ACCUMULATOR,
+    DECODE,
+    IMMEDIATE,
+    IMPLIED,
+    INDIRECT,
+    INDIRECT_X,
+    INDIRECT_Y,
+    PAGE_PENALTY,
+    RELATIVE,
+    ZERO_PAGE,
+    ZERO_PAGE_X,
+    ZERO_PAGE_Y,
+)
+
+# KERNAL entry points answered by the emulator instead of ROM code
+CHRIN = 0xFFCF
+CHROUT = 0xFFD2
+GETIN = 0xFFE4
+
+# The program is called like a subroutine: returning from it jumps here
+EXIT = 0xFFFF
+
+MAX_CYCLES = 10_000_000
+# Label blocks listed in the profile, hottest first
+HOT_BLOCKS = 10
+
+
+class CPU:
+    __slots__ = (
+        'memory',
+        'a',
+        'x',
+        'y',
+        'sp',
+        'pc',
+        'n',
+        'v',
+        'd',
+        'i',
+        'z',
+        'c',
+        'cycles',
+        'instructions',
+        'crossed',
+        'counts',
+        'spent',
+        'traps',
+        'input',
+        'output',
+        'stopped',
+    )
+
+    memory: bytearray
+    # Executions and cycles of the instruction at each address
+    counts: list[int]
+    spent: list[int]
+    traps: dict[int, Callable[['CPU'], None]]
+    input: bytearray
+    output: bytearray
+    stopped: str | None
+
+    def __init__(self, input: bytes = b''):
+        self.memory = bytearray(0x10000)
+        self.a = self.x = self.y = 0
+        self.sp = 0xFF
+        self.pc = 0
+        self.n = self.v = self.d = self.z = self.c = False
+        self.i = True
+        self.cycles = self.instructions = 0
+        self.crossed = False
+        self.counts = [0] * 0x10000
+        self.spent = [0] * 0x10000
+        self.traps = {
+            CHRIN: _chrin,
+            CHROUT: _chrout,
+            GETIN: _getin,
+            EXIT: _exit,
+        }
+        self.input = bytearray(input)
+        self.output = bytearray()
+        self.stopped = None
+
+    def load(self, data, address: int):
+        self.memory[address:address + len(data)] = data
+
+    def push(self, value: int):
+        self.memory[0x100 | self.sp] = value
+        self.sp = (self.sp - 1) & 0xFF
+
+    def pull(self) -> int:
+        self.sp = (self.sp + 1) & 0xFF
+        return self.memory[0x100 | self.sp]
+
+    def status(self) -> int:
+        # The break and unused bits read as set
+        return (
+            self.n << 7 | self.v << 6 | 0x30 | self.d << 3 | self.i << 2
+            | self.z << 1 | self.c
+        )
+
+    def set_status(self, value: int):
+        self.n = value & 0x80 != 0
+        self.v = value & 0x40 != 0
+        self.d = value & 0x08 != 0
+        self.i = value & 0x04 != 0
+        self.z = value & 0x02 != 0
+        self.c = value & 0x01 != 0
+
+    def call(self, address: int, max_cycles: int = MAX_CYCLES) -> 'CPU':
+        # Return address of a JSR, which RTS increments
+        self.push((EXIT - 1) >> 8)
+        self.push((EXIT - 1) & 0xFF)
+        self.pc = address
+        self.stopped = None
+
+        return self.run(max_cycles)
+
+    def run(self, max_cycles: int = MAX_CYCLES) -> 'CPU':
+        memory = self.memory
+        counts = self.counts
+        spent = self.spent
+        traps = self.traps
+        table = _TABLE
+        cycles = self.cycles
+        executed = 0
+
+        while self.stopped is None:
+            if cycles >= max_cycles:
+                self.stopped = f'cycle limit ({max_cycles})'
+                break
+
+            pc = self.pc
+            if pc in traps:
+                # Trapped routines take no cycles of their own
+                traps[pc](self)
+                continue
+
+            operation, mode, size, cost, penalized = table[memory[pc]]
+            self.pc = pc + size
+            cost += operation(self, mode(self, pc + 1))
+            if penalized and self.crossed:
+                cost += 1
+
+            counts[pc] += 1
+            spent[pc] += cost
+            cycles += cost
+            executed += 1
+
+        self.cycles = cycles
+        self.instructions += executed
+
+        return self
+
+
+def emulate(
+    image,
+    start_pos: int,
+    input: bytes = b'',
+    max_cycles: int = MAX_CYCLES,
+    layout: Layout | None = None
+) -> CPU:
+    # Placed programs are loaded region by region and entered at their
+    # first instruction
+    cpu = CPU(input)
+    if layout is None:
+        cpu.load(image, start_pos)
+        return cpu.call(start_pos, max_cycles)
+
+    view = memoryview(image)
+    for address, start, end in layout.regions:
+        cpu.load(view[start:end], address)
+
+    return cpu.call(layout.entry, max_cycles)
+
+
+def _profile(assembly: Assembly, cpu: CPU, start_pos: int) -> Iterator[str]:
+    layout = place(assembly, start_pos)
+    offsets, names = blocks(assembly)
+    block_cycles = [0] * len(names)
+    unlabelled = 0
+
+    yield (
+        f"Run: {cpu.cycles} cycles, {cpu.instructions} instructions, "
+        f"stopped by {cpu.stopped}\n"
+    )
+    if cpu.output:
+        yield f"Output: {cpu.output.decode('latin-1')!r}\n"
+
+    yield '\nInstructions:'
+    for index in range(len(assembly)):
+        start, end = assembly.instruction(index)
+        address = layout.address(start)
+        count = cpu.counts[address]
+        cycles = cpu.spent[address]
+
+        # Data only shows when it started an executed instruction
+        if assembly.is_data(index) and not (count and end > start):
+            continue
+
+        block = bisect_right(offsets, start) - 1
+        if block < 0:
+            unlabelled += cycles
+        else:
+            block_cycles[block] += cycles
+
+        yield "\n\t{:04X}: {:<28}{:>10}{:>12}".format(
+            address,
+            assembly.sources[index],
+            count,
+            cycles
+        )
+
+    yield '\n\nHot blocks:'
+    hottest = sorted(
+        ((cycles, name) for cycles, name in zip(block_cycles, names)),
+        key=lambda block: -block[0]
+    )
+    if unlabelled:
+        hottest.append((unlabelled, '-'))
+        hottest.sort(key=lambda block: -block[0])
+
+    for cycles, name in hottest[:HOT_BLOCKS]:
+        if not cycles:
+            break
+
+        share = cycles / cpu.cycles * 100 if cpu.cycles else 0
+        yield f"\n\t{name:<28}{cycles:>12}{share:>8.1f}%"
+
+    yield '\n'
+
+
+def write_profile(assembly: Assembly, cpu: CPU, start_pos: int, stream):
+    stream.write(''.join(_profile(assembly, cpu, start_pos)))
+
+
+def print_profile(assembly: Assembly, cpu: CPU, start_pos: int):
+    write_profile(assembly, cpu, start_pos, sys.stdout)
+
+
+# KERNAL traps, returning to the caller like the ROM routines would
+
+def _getin(cpu: CPU):
+    # Next key of the input, or zero when no key is pressed
+    cpu.a = cpu.input.pop(0) if cpu.input else 0
+    _load_flags(cpu, cpu.a)
+    cpu.c = False
+    _rts(cpu)
+
+
+def _chrin(cpu: CPU):
+    # Next character of the input line, RETURN once it is exhausted
+    cpu.a = cpu.input.pop(0) if cpu.input else 0x0D
+    _load_flags(cpu, cpu.a)
+    cpu.c = False
+    _rts(cpu)
+
+
+def _chrout(cpu: CPU):
+    cpu.output.append(cpu.a)
+    cpu.c = False
+    _rts(cpu)
+
+
+def _exit(cpu: CPU):
+    cpu.stopped = 'RTS'
+
+
+# Addressing modes: the address of the operand, from the address of the
+# byte after the opcode
+
+def _implied(cpu: CPU, operand: int):
+    return None
+
+
+def _immediate(cpu: CPU, operand: int) -> int:
+    return operand
+
+
+def _zero_page(cpu: CPU, operand: int) -> int:
+    return cpu.memory[operand]
+
+
+def _zero_page_x(cpu: CPU, operand: int) -> int:
+    return (cpu.memory[operand] + cpu.x) & 0xFF
+
+
+def _zero_page_y(cpu: CPU, operand: int) -> int:
+    return (cpu.memory[operand] + cpu.y) & 0xFF
+
+
+def _absolute(cpu: CPU, operand: int) -> int:
+    memory = cpu.memory
+    return memory[operand] | memory[operand + 1] << 8
+
+
+def _absolute_x(cpu: CPU, operand: int) -> int:
+    memory = cpu.memory
+    base = memory[operand] | memory[operand + 1] << 8
+    address = base + cpu.x
+    cpu.crossed = address >> 8 != base >> 8
+
+    return address & 0xFFFF
+
+
+def _absolute_y(cpu: CPU, operand: int) -> int:
+    memory = cpu.memory
+    base = memory[operand] | memory[operand + 1] << 8
+    address = base + cpu.y
+    cpu.crossed = address >> 8 != base >> 8
+
+    return address & 0xFFFF
+
+
+def _indirect(cpu: CPU, operand: int) -> int:
+    memory = cpu.memory
+    pointer = memory[operand] | memory[operand + 1] << 8
+    # The high byte is read from the same page as the low byte
+    high = (pointer & 0xFF00) | ((pointer + 1) & 0xFF)
+
+    return memory[pointer] | memory[high] << 8
+
+
+def _indirect_x(cpu: CPU, operand: int) -> int:
+    memory = cpu.memory
+    pointer = (memory[operand] + cpu.x) & 0xFF
+
+    return memory[pointer] | memory[(pointer + 1) & 0xFF] << 8
+
+
+def _indirect_y(cpu: CPU, operand: int) -> int:
+    memory = cpu.memory
+    pointer = memory[operand]
+    base = memory[pointer] | memory[(pointer + 1) & 0xFF] << 8
+    address = base + cpu.y
+    cpu.crossed = address >> 8 != base >> 8
+
+    return address & 0xFFFF
+
+
+def _relative(cpu: CPU, operand: int) -> int:
+    displacement = cpu.memory[operand]
+    return (operand + 1 + displacement - (displacement >> 7 << 8)) & 0xFFFF
+
+
+_MODES = {
+    IMPLIED: _implied,
+    ACCUMULATOR: _implied,
+    IMMEDIATE: _immediate,
+    ZERO_PAGE: _zero_page,
+    ZERO_PAGE_X: _zero_page_x,
+    ZERO_PAGE_Y: _zero_page_y,
+    ABSOLUTE: _absolute,
+    ABSOLUTE_X: _absolute_x,
+    ABSOLUTE_Y: _absolute_y,
+    INDIRECT: _indirect,
+    INDIRECT_X: _indirect_x,
+    INDIRECT_Y: _indirect_y,
+    RELATIVE: _relative,
+}
+
+
+# Operations: the extra cycles they take, from the operand address (None for
+# implied and accumulator modes)
+
+def _load_flags(cpu: CPU, value: int):
+    cpu.n = value > 0x7F
+    cpu.z = value == 0
+
+
+def _lda(cpu: CPU, address: int) -> int:
+    cpu.a = value = cpu.memory[address]
+    cpu.n = value > 0x7F
+    cpu.z = value == 0
+    return 0
+
+
+def _ldx(cpu: CPU, address: int) -> int:
+    cpu.x = value = cpu.memory[address]
+    cpu.n = value > 0x7F
+    cpu.z = value == 0
+    return 0
+
+
+def _ldy(cpu: CPU, address: int) -> int:
+    cpu.y = value = cpu.memory[address]
+    cpu.n = value > 0x7F
+    cpu.z = value == 0
+    return 0
+
+
+def _sta(cpu: CPU, address: int) -> int:
+    cpu.memory[address] = cpu.a
+    return 0
+
+
+def _stx(cpu: CPU, address: int) -> int:
+    cpu.memory[address] = cpu.x
+    return 0
+
+
+def _sty(cpu: CPU, address: int) -> int:
+    cpu.memory[address] = cpu.y
+    return 0
+
+
+def _tax(cpu: CPU, address: None) -> int:
+    cpu.x = cpu.a
+    _load_flags(cpu, cpu.x)
+    return 0
+
+
+def _tay(cpu: CPU, address: None) -> int:
+    cpu.y = cpu.a
+    _load_flags(cpu, cpu.y)
+    return 0
+
+
+def _txa(cpu: CPU, address: None) -> int:
+    cpu.a = cpu.x
+    _load_flags(cpu, cpu.a)
+    return 0
+
+
+def _tya(cpu: CPU, address: None) -> int:
+    cpu.a = cpu.y
+    _load_flags(cpu, cpu.a)
+    return 0
+
+
+def _tsx(cpu: CPU, address: None) -> int:
+    cpu.x = cpu.sp
+    _load_flags(cpu, cpu.x)
+    return 0
+
+
+def _txs(cpu: CPU, address: None) -> int:
+    cpu.sp = cpu.x
+    return 0
+
+
+def _inx(cpu: CPU, address: None) -> int:
+    cpu.x = value = (cpu.x + 1) & 0xFF
+    cpu.n = value > 0x7F
+    cpu.z = value == 0
+    return 0
+
+
+def _iny(cpu: CPU, address: None) -> int:
+    cpu.y = value = (cpu.y + 1) & 0xFF
+    cpu.n = value > 0x7F
+    cpu.z = value == 0
+    return 0
+
+
+def _dex(cpu: CPU, address: None) -> int:
+    cpu.x = value = (cpu.x - 1) & 0xFF
+    cpu.n = value > 0x7F
+    cpu.z = value == 0
+    return 0
+
+
+def _dey(cpu: CPU, address: None) -> int:
+    cpu.y = value = (cpu.y - 1) & 0xFF
+    cpu.n = value > 0x7F
+    cpu.z = value == 0
+    return 0
+
+
+def _inc(cpu: CPU, address: int) -> int:
+    cpu.memory[address] = value = (cpu.memory[address] + 1) & 0xFF
+    _load_flags(cpu, value)
+    return 0
+
+
+def _dec(cpu: CPU, address: int) -> int:
+    cpu.memory[address] = value = (cpu.memory[address] - 1) & 0xFF
+    _load_flags(cpu, value)
+    return 0
+
+
+def _and(cpu: CPU, address: int) -> int:
+    cpu.a &= cpu.memory[address]
+    _load_flags(cpu, cpu.a)
+    return 0
+
+
+def _ora(cpu: CPU, address: int) -> int:
+    cpu.a |= cpu.memory[address]
+    _load_flags(cpu, cpu.a)
+    return 0
+
+
+def _eor(cpu: CPU, address: int) -> int:
+    cpu.a ^= cpu.memory[address]
+    _load_flags(cpu, cpu.a)
+    return 0
+
+
+def _bit(cpu: CPU, address: int) -> int:
+    value = cpu.memory[address]
+    cpu.n = value > 0x7F
+    cpu.v = value & 0x40 != 0
+    cpu.z = cpu.a & value == 0
+    return 0
+
+
+def _adc(cpu: CPU, address: int) -> int:
+    _add(cpu, cpu.memory[address])
+    return 0
+
+
+def _sbc(cpu: CPU, address: int) -> int:
+    value = cpu.memory[address]
+    if cpu.d:
+        _subtract_decimal(cpu, value)
+    else:
+        _add(cpu, value ^ 0xFF)
+    return 0
+
+
+def _add(cpu: CPU, value: int):
+    a = cpu.a
+    total = a + value + cpu.c
+    if cpu.d:
+        _add_decimal(cpu, value, total)
+        return
+
+    cpu.v = ~(a ^ value) & (a ^ total) & 0x80 != 0
+    cpu.c = total > 0xFF
+    cpu.a = total = total & 0xFF
+    _load_flags(cpu, total)
+
+
+def _add_decimal(cpu: CPU, value: int, binary: int):
+    # NMOS behaviour: Z comes from the binary sum, N and V from the sum
+    # before the high digit is adjusted
+    a = cpu.a
+    low = (a & 0x0F) + (value & 0x0F) + cpu.c
+    if low > 9:
+        low += 6
+    high = (a >> 4) + (value >> 4) + (low > 0x0F)
+
+    cpu.z = binary & 0xFF == 0
+    cpu.n = high & 0x08 != 0
+    cpu.v = ~(a ^ value) & (a ^ (high << 4)) & 0x80 != 0
+    if high > 9:
+        high += 6
+    cpu.c = high > 0x0F
+    cpu.a = (high << 4 | low & 0x0F) & 0xFF
+
+
+def _subtract_decimal(cpu: CPU, value: int):
+    # Flags come from the binary difference
+    a = cpu.a
+    borrow = not cpu.c
+    binary = a - value - borrow
+    cpu.v = (a ^ value) & (a ^ binary) & 0x80 != 0
+    cpu.c = binary >= 0
+    _load_flags(cpu, binary & 0xFF)
+
+    low = (a & 0x0F) - (value & 0x0F) - borrow
+    high = (a >> 4) - (value >> 4)
+    if low & 0x10:
+        low -= 6
+        high -= 1
+    if high & 0x10:
+        high -= 6
+    cpu.a = (high << 4 | low & 0x0F) & 0xFF
+
+
+def _compare(cpu: CPU, register: int, value: int):
+    difference = register - value
+    cpu.c = difference >= 0
+    _load_flags(cpu, difference & 0xFF)
+
+
+def _cmp(cpu: CPU, address: int) -> int:
+    _compare(cpu, cpu.a, cpu.memory[address])
+    return 0
+
+
+def _cpx(cpu: CPU, address: int) -> int:
+    _compare(cpu, cpu.x, cpu.memory[address])
+    return 0
+
+
+def _cpy(cpu: CPU, address: int) -> int:
+    _compare(cpu, cpu.y, cpu.memory[address])
+    return 0
+
+
+def _shift(operation: Callable[[CPU, int], int]):
+    # Applies a shift to A in accumulator mode, or to memory
+    def shift(cpu: CPU, address: int | None) -> int:
+        if address is None:
+            cpu.a = operation(cpu, cpu.a)
+        else:
+            cpu.memory[address] = operation(cpu, cpu.memory[address])
+        return 0
+
+    return shift
+
+
+def _asl_value(cpu: CPU, value: int) -> int:
+    cpu.c = value > 0x7F
+    value = (value << 1) & 0xFF
+    _load_flags(cpu, value)
+    return value
+
+
+def _lsr_value(cpu: CPU, value: int) -> int:
+    cpu.c = value & 0x01 != 0
+    value >>= 1
+    _load_flags(cpu, value)
+    return value
+
+
+def _rol_value(cpu: CPU, value: int) -> int:
+    carry = cpu.c
+    cpu.c = value > 0x7F
+    value = (value << 1 | carry) & 0xFF
+    _load_flags(cpu, value)
+    return value
+
+
+def _ror_value(cpu: CPU, value: int) -> int:
+    carry = cpu.c
+    cpu.c = value & 0x01 != 0
+    value = value >> 1 | carry << 7
+    _load_flags(cpu, value)
+    return value
+
+
+def _branch(cpu: CPU, target: int) -> int:
+    # One more cycle when taken, two when the target is on another page
+    extra = 1 if cpu.pc >> 8 == target >> 8 else 2
+    cpu.pc = target
+    return extra
+
+
+def _bcc(cpu: CPU, target: int) -> int:
+    return 0 if cpu.c else _branch(cpu, target)
+
+
+def _bcs(cpu: CPU, target: int) -> int:
+    return _branch(cpu, target) if cpu.c else 0
+
+
+def _bne(cpu: CPU, target: int) -> int:
+    return 0 if cpu.z else _branch(cpu, target)
+
+
+def _beq(cpu: CPU, target: int) -> int:
+    return _branch(cpu, target) if cpu.z else 0
+
+
+def _bpl(cpu: CPU, target: int) -> int:
+    return 0 if cpu.n else _branch(cpu, target)
+
+
+def _bmi(cpu: CPU, target: int) -> int:
+    return _branch(cpu, target) if cpu.n else 0
+
+
+def _bvc(cpu: CPU, target: int) -> int:
+    return 0 if cpu.v else _branch(cpu, target)
+
+
+def _bvs(cpu: CPU, target: int) -> int:
+    return _branch(cpu, target) if cpu.v else 0
+
+
+def _jmp(cpu: CPU, address: int) -> int:
+    cpu.pc = address
+    return 0
+
+
+def _jsr(cpu: CPU, address: int) -> int:
+    # The return address pushed is the last byte of the JSR
+    pc = cpu.pc - 1
+    cpu.push(pc >> 8)
+    cpu.push(pc & 0xFF)
+    cpu.pc = address
+    return 0
+
+
+def _rts(cpu: CPU, address: None = None) -> int:
+    low = cpu.pull()
+    cpu.pc = ((cpu.pull() << 8 | low) + 1) & 0xFFFF
+    return 0
+
+
+def _rti(cpu: CPU, address: None) -> int:
+    cpu.set_status(cpu.pull())
+    low = cpu.pull()
+    cpu.pc = cpu.pull() << 8 | low
+    return 0
+
+
+def _brk(cpu: CPU, address: None) -> int:
+    # Nothing handles interrupts in a headless run
+    cpu.stopped = f'BRK at ${cpu.pc - 1:04X}'
+    return 0
+
+
+def _pha(cpu: CPU, address: None) -> int:
+    cpu.push(cpu.a)
+    return 0
+
+
+def _php(cpu: CPU, address: None) -> int:
+    cpu.push(cpu.status())
+    return 0
+
+
+def _pla(cpu: CPU, address: None) -> int:
+    cpu.a = cpu.pull()
+    _load_flags(cpu, cpu.a)
+    return 0
+
+
+def _plp(cpu: CPU, address: None) -> int:
+    cpu.set_status(cpu.pull())
+    return 0
+
+
+def _flag(name: str, value: bool):
+    def flag(cpu: CPU, address: None) -> int:
+        setattr(cpu, name, value)
+        return 0
+
+    return flag
+
+
+def _nop(cpu: CPU, address: None) -> int:
+    return 0
+
+
+def _illegal(cpu: CPU, address) -> int:
+    pc = cpu.pc - 1
+    assert False, (
+        f'[ERROR] Illegal opcode ${cpu.memory[pc]:02X} at ${pc:04X}'
+    )
+
+
+_OPERATIONS = {
+    'ADC': _adc, 'AND': _and, 'ASL': _shift(_asl_value), 'BCC': _bcc,
+    'BCS': _bcs, 'BEQ': _beq, 'BIT': _bit, 'BMI': _bmi, 'BNE': _bne,
+    'BPL': _bpl, 'BRK': _brk, 'BVC': _bvc, 'BVS': _bvs,
+    'CLC': _flag('c', False), 'CLD': _flag('d', False),
+    'CLI': _flag('i', False), 'CLV': _flag('v', False), 'CMP': _cmp,
+    'CPX': _cpx, 'CPY': _cpy, 'DEC': _dec, 'DEX': _dex, 'DEY': _dey,
+    'EOR': _eor, 'INC': _inc, 'INX': _inx, 'INY': _iny, 'JMP': _jmp,
+    'JSR': _jsr, 'LDA': _lda, 'LDX': _ldx, 'LDY': _ldy,
+    'LSR': _shift(_lsr_value), 'NOP': _nop, 'ORA': _ora, 'PHA': _pha,
+    'PHP': _php, 'PLA': _pla, 'PLP': _plp, 'ROL': _shift(_rol_value),
+    'ROR': _shift(_ror_value), 'RTI': _rti, 'RTS': _rts, 'SBC': _sbc,
+    'SEC': _flag('c', True), 'SED': _flag('d', True),
+    'SEI': _flag('i', True), 'STA': _sta, 'STX': _stx, 'STY': _sty,
+    'TAX': _tax, 'TAY': _tay, 'TSX': _tsx, 'TXA': _txa, 'TXS': _txs,
+    'TYA': _tya,
+}
+
+
+def _table():
+    # Opcode -> (operation, addressing mode, size, cycles, page penalty)
+    table = [(_illegal, _implied, 1, 0, False)] * 256
+    for opcode, decoded in enumerate(DECODE):
+        if decoded is None:
+            continue
+
+        mnemonic, mode, size, cycles = decoded
+        penalized = mnemonic in PAGE_PENALTY and mode in (
+            ABSOLUTE_X, ABSOLUTE_Y, INDIRECT_Y
+        )
+        table[opcode] = (
+            _OPERATIONS[mnemonic],
+            _MODES[mode],
+            size,
+            cycles,
+            penalized
+        )
+
+    return table
+
+
+_TABLE = _table()
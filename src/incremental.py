@@ -0,0 +1,239 @@
+from bisect import bisect_right, insort
+from typing import NamedTuple
+
+from .assembly import REL, Assembly
+from .opcodes import BRANCH_REACH
+
+
+class FenwickTree:
+    __slots__ = ('_tree',)
+
+    _tree: list[int]
+
+    def __init__(self, values: list[int]):
+        tree = [0, *values]
+        for index in range(1, len(tree)):
+            parent = index + (index & -index)
+            if parent < len(tree):
+                tree[parent] += tree[index]
+
+        self._tree = tree
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def add(self, index: int, delta: int):
+        tree = self._tree
+        index += 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index: int) -> int:
+        # Sum of the values before position index
+        tree = self._tree
+        total = 0
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+
+        return total
+
+
+class Edit(NamedTuple):
+    offset: int
+    removed: int
+    code: bytes
+    # (offset, kind, label offset or None, line number, label)
+    fixups: list[tuple[int, int, int | None, int, str]]
+
+
+class LineIndex:
+    __slots__ = (
+        '_code',
+        '_fixups',
+        '_sources',
+        '_labels',
+        '_label_lines',
+        '_symbol_lines',
+        '_definitions',
+        '_referrers',
+        '_sizes',
+    )
+
+    _code: list[bytes]
+    _fixups: list[tuple[tuple[int, int, int], ...]]
+    _sources: list[str | None]
+    _labels: list[int | None]
+    _label_lines: list[int]
+    _symbol_lines: dict[int, int]
+    _definitions: dict[int, list[int]]
+    _referrers: dict[int, set[int]]
+    _sizes: FenwickTree
+
+    def __init__(
+        self,
+        assembly: Assembly,
+        label_lines: dict[int, list[int]],
+        line_count: int
+    ):
+        self._code = [b''] * line_count
+        self._fixups = [()] * line_count
+        self._sources = [None] * line_count
+        self._labels = [None] * line_count
+        self._referrers = {}
+
+        for index, source in enumerate(assembly.sources):
+            line = assembly.lines[index] - 1
+            start, end = assembly.instruction(index)
+            self._code[line] = bytes(assembly.code[start:end])
+            self._sources[line] = source
+
+        for offset, kind, symbol in assembly.fixups():
+            index = assembly.instruction_at(offset)
+            line = assembly.lines[index] - 1
+            position = offset - assembly.offsets[index]
+            self._fixups[line] += ((position, kind, symbol),)
+            self._referrers.setdefault(symbol, set()).add(line)
+
+        self._symbol_lines = {}
+        self._definitions = {}
+        self._label_lines = []
+        for symbol, lines in label_lines.items():
+            for line in lines:
+                self._labels[line - 1] = symbol
+                self._label_lines.append(line - 1)
+
+            # Like a full parse, the last definition of a label wins
+            self._definitions[symbol] = [line - 1 for line in lines]
+            self._symbol_lines[symbol] = lines[-1] - 1
+
+        self._label_lines.sort()
+        self._sizes = FenwickTree([len(code) for code in self._code])
+
+    def update(self, line: int, update: Assembly) -> Edit:
+        assert 0 <= line < len(self._code), f'Line {line + 1} out of range'
+
+        offset = self._sizes.prefix(line)
+        removed = len(self._code[line])
+        code = bytes(update.code)
+        moved = len(code) != removed
+
+        for _, _, symbol in self._fixups[line]:
+            self._referrers[symbol].discard(line)
+
+        fixups = tuple(
+            (position, kind, symbol)
+            for position, kind, symbol in update.fixups()
+        )
+        for _, _, symbol in fixups:
+            self._referrers.setdefault(symbol, set()).add(line)
+
+        self._code[line] = code
+        self._fixups[line] = fixups
+        self._sources[line] = update.sources[0] if update.sources else None
+        if moved:
+            self._sizes.add(line, len(code) - removed)
+
+        affected = {(line, fixup) for fixup in fixups}
+
+        label = next(iter(update.labels), None)
+        previous = self._labels[line]
+        if label != previous:
+            self._labels[line] = label
+            if previous is not None:
+                self._undefine(previous, line)
+                affected.update(self._references(previous))
+            if label is not None:
+                self._define(label, line)
+                affected.update(self._references(label))
+
+        if moved:
+            affected.update(self._moved_references(line))
+            affected.update(self._crossing_branches(line, offset + len(code)))
+
+        return Edit(offset, removed, code, [
+            self._resolve(line, fixup, update.symbols)
+            for line, fixup in affected
+        ])
+
+    def assembly(self, symbols: list[str], symbol_ids: dict[str, int]):
+        assembly = Assembly()
+        assembly.symbols = symbols
+        assembly.symbol_ids = symbol_ids
+
+        offset = 0
+        for line, code in enumerate(self._code):
+            if (label := self._labels[line]) is not None:
+                assembly.labels[label] = offset
+
+            if (source := self._sources[line]) is not None:
+                assembly.begin(line + 1, source)
+                for position, kind, symbol in self._fixups[line]:
+                    assembly.fixup(offset + position, kind, symbol)
+
+                assembly.code += code
+                offset += len(code)
+
+        return assembly
+
+    def _define(self, symbol: int, line: int):
+        definitions = self._definitions.setdefault(symbol, [])
+        insort(definitions, line)
+        insort(self._label_lines, line)
+        self._symbol_lines[symbol] = definitions[-1]
+
+    def _undefine(self, symbol: int, line: int):
+        definitions = self._definitions[symbol]
+        definitions.remove(line)
+        self._label_lines.remove(line)
+
+        if definitions:
+            self._symbol_lines[symbol] = definitions[-1]
+        else:
+            del self._symbol_lines[symbol]
+
+    def _references(self, symbol: int):
+        for line in self._referrers.get(symbol, ()):
+            for fixup in self._fixups[line]:
+                if fixup[2] == symbol:
+                    yield line, fixup
+
+    def _moved_references(self, line: int):
+        # Labels after the edit moved: absolute references to them change
+        # everywhere, relative ones only when they come from before the edit
+        start = bisect_right(self._label_lines, line)
+        for label_line in self._label_lines[start:]:
+            symbol = self._labels[label_line]
+            if self._symbol_lines[symbol] != label_line:
+                continue
+
+            for reference in self._references(symbol):
+                if reference[1][1] != REL or reference[0] < line:
+                    yield reference
+
+    def _crossing_branches(self, line: int, offset: int):
+        # Branches after the edit pointing before it moved away from their
+        # target, and they can only sit within reach of the edit
+        limit = offset + BRANCH_REACH
+        for following in range(line + 1, len(self._code)):
+            if offset > limit:
+                break
+
+            for fixup in self._fixups[following]:
+                target = self._symbol_lines.get(fixup[2])
+                if fixup[1] == REL and target is not None and target <= line:
+                    yield following, fixup
+
+            offset += len(self._code[following])
+
+    def _resolve(self, line: int, fixup: tuple[int, int, int], symbols):
+        position, kind, symbol = fixup
+        label_line = self._symbol_lines.get(symbol)
+        label_pos = None
+        if label_line is not None:
+            label_pos = self._sizes.prefix(label_line)
+
+        offset = self._sizes.prefix(line) + position
+
+        return offset, kind, label_pos, line + 1, symbols[symbol]
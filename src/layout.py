@@ -0,0 +1,387 @@
+from bisect import bisect_right
+from typing import Iterator, NamedTuple
+
+from .assembly import Assembly
+
+# Directives placing the code that follows them. Their sources are written
+# in a canonical form: '.org $C000', '.segment CODE' and
+# '.area CODE $C000 $CFFF code'
+ORG = '.org'
+SEGMENT = '.segment'
+AREA = '.area'
+PLACEMENTS = (ORG, SEGMENT, AREA)
+# A .fill without a value only reserves memory. Its source is written in the
+# canonical form '.fill $0010', without a value
+FILL = '.fill'
+
+# Kinds of memory map areas: code areas take any segment, data areas no
+# instructions, zero page areas fit in $00-$FF and I/O areas are holes
+CODE_AREA = 'code'
+DATA_AREA = 'data'
+ZP_AREA = 'zp'
+IO_AREA = 'io'
+AREA_KINDS = (CODE_AREA, DATA_AREA, ZP_AREA, IO_AREA)
+
+MEMORY_SIZE = 0x10000
+
+
+class Area(NamedTuple):
+    name: str
+    start: int
+    # First address after the area
+    end: int
+    kind: str
+    line: int
+
+
+class Region(NamedTuple):
+    address: int
+    # Offsets of the region in the code
+    start: int
+    end: int
+
+
+class Intervals:
+    # Disjoint address ranges sorted by their start, each with its owner
+    _starts: list[int]
+    _ends: list[int]
+    _owners: list[str]
+
+    def __init__(self):
+        self._starts = []
+        self._ends = []
+        self._owners = []
+
+    def add(self, start: int, end: int, owner: str) -> str | None:
+        # Returns the owner of a range overlapping the new one, which is then
+        # left out
+        position = bisect_right(self._starts, start)
+        if position and self._ends[position - 1] > start:
+            return self._owners[position - 1]
+        if position < len(self._starts) and self._starts[position] < end:
+            return self._owners[position]
+
+        self._starts.insert(position, start)
+        self._ends.insert(position, end)
+        self._owners.insert(position, owner)
+
+        return None
+
+    def first_fit(self, size: int, start: int, end: int) -> int | None:
+        # Lowest address of size free bytes between start and end
+        address = start
+        position = bisect_right(self._starts, start)
+        if position and self._ends[position - 1] > address:
+            address = self._ends[position - 1]
+
+        starts = self._starts
+        while position < len(starts) and starts[position] < address + size:
+            address = max(address, self._ends[position])
+            position += 1
+
+        return address if address + size <= end else None
+
+
+class Layout:
+    __slots__ = (
+        'placed',
+        'regions',
+        'loaded',
+        'offsets',
+        'segments',
+        '_entry',
+        '_addresses',
+    )
+
+    # Whether the program places its code with directives
+    placed: bool
+    # Non-empty parts of the code, by address
+    regions: list[Region]
+    # The regions written to a program file: those only reserving memory,
+    # the zero page and zero filled space, are set up by the program
+    loaded: list[Region]
+    # Offsets where each part of the code starts, and the segment it belongs
+    # to: the parts of a segment are laid out one after the other
+    offsets: list[int]
+    segments: list[str | None]
+    # Offset of the first instruction in a code area
+    _entry: int
+    _addresses: list[int]
+
+    def __init__(
+        self,
+        parts: list[tuple[int, int, str | None]],
+        size: int,
+        placed: bool,
+        reserved: frozenset[int] = frozenset(),
+        entry: int = 0
+    ):
+        self.placed = placed
+        self._entry = entry
+        self.offsets = [offset for offset, _, _ in parts]
+        self.segments = [segment for _, _, segment in parts]
+        self._addresses = [address for _, address, _ in parts]
+
+        ends = self.offsets[1:] + [size]
+        regions = [
+            Region(address, offset, end)
+            for (offset, address, _), end in zip(parts, ends)
+            if end > offset
+        ]
+        self.regions = sorted(regions) or [Region(parts[0][1], 0, 0)]
+        self.loaded = [
+            region for region in self.regions if region.start not in reserved
+        ]
+
+    @property
+    def entry(self) -> int:
+        return self.address(self._entry)
+
+    @property
+    def start(self) -> int:
+        # Load address of the program file
+        return (self.loaded or self.regions)[0].address
+
+    def address(self, offset: int) -> int:
+        # Offsets where a part ends belong to the part starting there
+        if not self.placed:
+            return self._addresses[0] + offset
+
+        part = self.part(offset)
+
+        return self._addresses[part] + offset - self.offsets[part]
+
+    def part(self, offset: int) -> int:
+        # Index of the part holding the code at offset
+        return bisect_right(self.offsets, offset) - 1
+
+    def chunks(self, image) -> Iterator[bytes]:
+        # The loaded regions from the lowest address, which a program file
+        # loads in one piece: the gaps between them are zero filled
+        view = memoryview(image)
+        address = self.start
+        for region in self.loaded:
+            yield bytes(region.address - address)
+            yield view[region.start:region.end]
+            address = region.address + region.end - region.start
+
+    def flatten(self, image) -> tuple[bytes, int]:
+        # The loaded regions as one image, and its address
+        if self.regions == [Region(self.start, 0, len(image))]:
+            return image, self.start
+
+        assert self.entry == self.start, (
+            f'[ERROR] This format runs the program from its lowest address '
+            f'${self.start:04X}, not from ${self.entry:04X}'
+        )
+
+        return b''.join(self.chunks(image)), self.start
+
+
+def placed(assembly: Assembly) -> bool:
+    # Placement directives start a line of their own in the sources
+    sources = '\n' + '\n'.join(assembly.sources)
+
+    return any(f'\n{directive} ' in sources for directive in PLACEMENTS)
+
+
+def places_code(line: str) -> bool:
+    return line.lstrip().lower().startswith(PLACEMENTS)
+
+
+def place(assembly: Assembly, start_pos: int) -> Layout:
+    # Code before any placement directive starts at start_pos, .org parts
+    # at their address and segments in the first free space of the memory
+    # map area of the same name
+    size = len(assembly.code)
+    if not placed(assembly):
+        _assert(
+            start_pos + size <= MEMORY_SIZE,
+            None,
+            f'Program at ${start_pos:04X}-${start_pos + size - 1:04X} ends '
+            f'beyond ${MEMORY_SIZE - 1:04X}'
+        )
+        return Layout([(0, start_pos, None)], size, False)
+
+    parts, areas = _parts(assembly, start_pos)
+    ends = [part[0] for part in parts[1:]] + [size]
+    indexes = [part[3] for part in parts[1:]] + [len(assembly)]
+
+    used = _place_fixed(assembly, parts, ends, areas)
+    _place_segments(assembly, parts, ends, indexes, areas, used)
+
+    reserved = frozenset(
+        part[0]
+        for part, end, following in zip(parts, ends, indexes)
+        if end > part[0] and (
+            part[2] is not None and areas[part[2]].kind == ZP_AREA
+            or _reserving(assembly, part, following)
+        )
+    )
+
+    return Layout(
+        [(part[0], part[1], part[2]) for part in parts],
+        size,
+        True,
+        reserved,
+        _entry(assembly, parts, indexes, areas)
+    )
+
+
+def _parts(assembly: Assembly, start_pos: int) -> tuple[list, dict]:
+    # Offset, address, segment name, index of the directive of each part,
+    # and the memory map areas by name
+    parts = [[0, start_pos, None, None]]
+    areas = {}
+
+    for index, source in enumerate(assembly.sources):
+        if not source.startswith(PLACEMENTS):
+            continue
+
+        directive, name, *bounds = source.split()
+        offset = assembly.offsets[index]
+        if directive == ORG:
+            parts.append([offset, int(name[1:], 16), None, index])
+        elif directive == SEGMENT:
+            parts.append([offset, None, name, index])
+        else:
+            _define(areas, assembly, index, name, bounds)
+
+    return parts, areas
+
+
+def _place_fixed(
+    assembly: Assembly,
+    parts: list,
+    ends: list[int],
+    areas: dict[str, Area]
+) -> Intervals:
+    # I/O areas and parts at a fixed address, which segments are placed
+    # around
+    used = Intervals()
+
+    for area in areas.values():
+        if area.kind == IO_AREA:
+            owner = used.add(area.start, area.end, f'I/O area {area.name}')
+            _assert(owner is None, area.line, f'{area.name} overlaps {owner}')
+
+    for part, end in zip(parts, ends):
+        offset, address, _, index = part
+        if address is None or end == offset:
+            continue
+
+        line = None if index is None else assembly.lines[index]
+        where = f'${address:04X}-${address + end - offset - 1:04X}'
+        owner = f'Program at {where}'
+        if index is not None:
+            owner = f'{ORG} {where}'
+        _assert(
+            address + end - offset <= MEMORY_SIZE,
+            line,
+            f'{owner} ends beyond ${MEMORY_SIZE - 1:04X}'
+        )
+
+        clash = used.add(address, address + end - offset, owner)
+        _assert(clash is None, line, f'{owner} overlaps {clash}')
+
+    return used
+
+
+def _place_segments(
+    assembly: Assembly,
+    parts: list,
+    ends: list[int],
+    indexes: list[int],
+    areas: dict[str, Area],
+    used: Intervals
+):
+    # Every part of a segment is laid out in order, in the first free space
+    # of its area
+    segments = {}
+    for part, end, following in zip(parts, ends, indexes):
+        if part[2] is not None:
+            segments.setdefault(part[2], []).append((part, end, following))
+
+    for name, chunks in segments.items():
+        line = assembly.lines[chunks[0][0][3]]
+        area = areas.get(name)
+        _assert(area is not None, line, f'Unknown segment {name}')
+        _assert(area.kind != IO_AREA, line, f'Segment {name} is I/O space')
+
+        total = sum(end - part[0] for part, end, _ in chunks)
+        address = used.first_fit(total, area.start, area.end)
+        _assert(
+            address is not None,
+            line,
+            f'Segment {name} (${total:X} bytes) does not fit in area '
+            f'{name} (${area.start:04X}-${area.end - 1:04X})'
+        )
+        if total:
+            used.add(address, address + total, f'segment {name}')
+
+        for part, end, following in chunks:
+            part[1] = address
+            address += end - part[0]
+
+            if area.kind == DATA_AREA:
+                _data_only(assembly, part[3] + 1, following, name)
+
+
+def _define(
+    areas: dict[str, Area],
+    assembly: Assembly,
+    index: int,
+    name: str,
+    bounds: list[str]
+):
+    # Modules sharing a memory map define its areas once each
+    first, last, kind = bounds
+    line = assembly.lines[index]
+    area = Area(name, int(first[1:], 16), int(last[1:], 16) + 1, kind, line)
+
+    defined = areas.setdefault(name, area)
+    _assert(
+        defined[:4] == area[:4],
+        line,
+        f'Area {name} already defined differently at line {defined.line}'
+    )
+
+
+def _entry(assembly: Assembly, parts: list, indexes: list[int], areas):
+    # Data, zero page variables and memory map directives are not run
+    for part, following in zip(parts, indexes):
+        if part[2] is not None and areas[part[2]].kind != CODE_AREA:
+            continue
+
+        first = 0 if part[3] is None else part[3] + 1
+        for index in range(first, following):
+            if not assembly.is_data(index):
+                return assembly.offsets[index]
+
+    return 0
+
+
+def _reserving(assembly: Assembly, part: list, following: int) -> bool:
+    # Parts made of .fill directives without a value only reserve memory
+    first = 0 if part[3] is None else part[3] + 1
+    sources = assembly.sources
+
+    return all(
+        sources[index].startswith(f'{FILL} $') and ',' not in sources[index]
+        for index in range(first, following)
+    )
+
+
+def _data_only(assembly: Assembly, first: int, end: int, name: str):
+    for index in range(first, end):
+        _assert(
+            assembly.is_data(index),
+            assembly.lines[index],
+            f'Instruction "{assembly.sources[index]}" in data area {name}'
+        )
+
+
+def _assert(condition: bool, line: int | None, error: str):
+    location = '' if line is None else f'Line {line}: '
+
+    assert condition, f'[ERROR] {location}{error}'
@@ -1,56 +1,144 @@
+from typing import Iterable
+
+from .assembly import ABS, REL, ZP, Assembly
+from .incremental import Edit
+from .layout import Layout, place
+
+
 class Linker:
-    _labels: dict[str, int]
     _start_pos: int
+    # Set when the program parsed last places its code with directives
+    _layout: Layout | None
 
     def __init__(self, start_pos):
-        self._labels = {}
         self._start_pos = start_pos
+        self._layout = None
+
+    def parse(self, assembly: Assembly) -> bytearray:
+        layout = place(assembly, self._start_pos)
+        self._layout = layout if layout.placed else None
+
+        image = bytearray(assembly.code)
+        addresses = [None] * len(assembly.symbols)
+        for symbol, label_pos in assembly.labels.items():
+            addresses[symbol] = label_pos
+
+        for offset, kind, symbol in assembly.fixups():
+            label_pos = addresses[symbol]
+            if label_pos is None:
+                self._unknown_label(assembly, offset, symbol)
+
+            if not self._patch(image, offset, kind, label_pos):
+                self._out_of_range(assembly, offset, symbol, label_pos)
+
+        return image
 
-    def parse(self, labels, bytecode):
-        self._labels = labels
+    @staticmethod
+    def combine(modules: Iterable[tuple[str, Assembly]]) -> Assembly:
+        # Places named modules one after the other, sharing their labels
+        program = Assembly()
+        defined = {}
 
-        program_counter = 0
-        new_bytecode = []
+        for name, module in modules:
+            for symbol in module.labels:
+                label = module.symbols[symbol]
+                assert label not in defined, (
+                    f'[ERROR] Label {label} defined in both '
+                    f'{defined[label]} and {name}.'
+                )
+                defined[label] = name
 
-        for (bytes_list, instruction) in bytecode:
-            new_bytes = []
+            program.extend(module)
 
-            for byte in bytes_list:
-                if byte is None:
-                    continue
-                if not str(byte).isnumeric():
-                    parsed = self._parse_label(
-                        byte, program_counter, instruction)
-                    new_bytes.extend(parsed)
-                else:
-                    new_bytes.append(byte)
-                program_counter += 1
+        return program
 
-            new_bytecode.append((new_bytes, instruction))
+    def update(self, image: bytearray, edit: Edit) -> bytearray:
+        image[edit.offset:edit.offset + edit.removed] = edit.code
 
-        return new_bytecode
+        unknown = far = None
+        for offset, kind, label_pos, line, label in edit.fixups:
+            if label_pos is None:
+                unknown = unknown or (line, label)
+            elif not self._patch(image, offset, kind, label_pos):
+                far = far or (line, label, label_pos - offset - 1)
 
-    def _parse_label(self, byte, program_counter, instruction) -> list[int]:
-        reference = byte[:3]
-        label = byte[4:]
-        label_pos = self._labels.get(label)
+        if unknown:
+            line, label = unknown
+            assert False, f'[ERROR] Line {line}: Unknown label {label}'
 
-        has_label = label_pos is not None
-        assert has_label, f'[ERROR] Unknown label {label} in "{instruction}".'
+        if far:
+            line, label, distance = far
+            assert False, (
+                f'[ERROR] Line {line}: Branch to {label} out of range '
+                f'({distance} bytes)'
+            )
 
-        if reference == 'REL':
-            # TODO: Assert range -128, +127
-            if program_counter >= label_pos:
-                return [255 - (program_counter - label_pos)]
+        return image
+
+    def _patch(
+        self,
+        image: bytearray,
+        offset: int,
+        kind: int,
+        label_pos: int
+    ) -> bool:
+        # Returns False, leaving the byte untouched, for branches out of range
+        layout = self._layout
+        if kind == REL:
+            distance = label_pos - offset - 1
+            if layout is not None:
+                distance = layout.address(label_pos) - layout.address(offset)
+                distance -= 1
+            if not -128 <= distance <= 127:
+                return False
+
+            image[offset] = distance & 0xFF
+        elif kind == ABS:
+            if layout is not None:
+                address = layout.address(label_pos)
             else:
-                return [label_pos - program_counter]
+                address = self._start_pos + label_pos
 
-        if reference == 'ABS':
+                in_range = address >= self._start_pos
+                assert in_range, f'Address out of range: {address}'
+
+            image[offset] = address & 0xFF
+            image[offset + 1] = (address >> 8) & 0xFF
+        elif kind == ZP:
             address = self._start_pos + label_pos
+            if layout is not None:
+                address = layout.address(label_pos)
+
+            in_range = address <= 0xFF
+            assert in_range, f'Zero page address out of range: {address}'
+
+            image[offset] = address
+        else:
+            assert False, f'[ERROR] Reference mode "{kind}" unsupported.'
+
+        return True
+
+    def _unknown_label(self, assembly: Assembly, offset: int, symbol: int):
+        instruction = assembly.sources[assembly.instruction_at(offset)]
+        label = assembly.symbols[symbol]
 
-            in_range = address >= self._start_pos
-            assert in_range, f'Address out of range: {address}'
+        assert False, f'[ERROR] Unknown label {label} in "{instruction}".'
 
-            return [address & 0xFF, (address >> 8) & 0xFF]
+    def _out_of_range(
+        self,
+        assembly: Assembly,
+        offset: int,
+        symbol: int,
+        label_pos: int
+    ):
+        instruction = assembly.sources[assembly.instruction_at(offset)]
+        label = assembly.symbols[symbol]
+        distance = label_pos - offset - 1
+        if self._layout is not None:
+            distance = self._layout.address(label_pos)
+            distance -= self._layout.address(offset) + 1
 
-        assert False, f'[ERROR] Reference mode "{reference}" unsupported.'
+        assert False, (
+            f'[ERROR] Branch to {label} out of range in "{instruction}" '
+            f'({distance} bytes).'
+        )
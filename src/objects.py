@@ -0,0 +1,191 @@
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Iterable
+
+from .assembly import Assembly
+
+# Object files hold an assembly before linking: its code, the offsets of its
+# labels, which every other module can reference, and its fixups, patched
+# once the modules are placed
+MAGIC = b'DNMO'
+VERSION = 2
+EXTENSION = 'o'
+
+# Magic, version, flags, then the sizes of the sections that follow
+_HEADER = struct.Struct('<4sBBIIIIIIII')
+
+
+def dumps(
+    assembly: Assembly,
+    *flags: bool,
+    includes: Iterable[str] = ()
+) -> bytes:
+    # Flags are the options the object was compiled with, includes the files
+    # it was compiled from besides its source
+    includes = '\n'.join(includes).encode()
+    symbols = '\n'.join(assembly.symbols).encode()
+    sources = '\n'.join(assembly.sources).encode()
+    labels = array('I')
+    for symbol, offset in assembly.labels.items():
+        labels.append(symbol)
+        labels.append(offset)
+
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        _flags(flags),
+        len(assembly.code),
+        len(assembly.offsets),
+        len(assembly.symbols),
+        len(symbols),
+        len(sources),
+        len(assembly.labels),
+        len(assembly.fixup_offsets),
+        len(includes),
+    )
+
+    return b''.join((
+        header,
+        assembly.code,
+        _little(assembly.offsets),
+        _little(assembly.lines),
+        _little(labels),
+        _little(assembly.fixup_offsets),
+        assembly.fixup_kinds.tobytes(),
+        _little(assembly.fixup_symbols),
+        symbols,
+        sources,
+        includes,
+    ))
+
+
+def loads(data: bytes) -> Assembly:
+    (
+        magic,
+        version,
+        _,
+        code_size,
+        instructions,
+        symbol_count,
+        symbols_size,
+        sources_size,
+        label_count,
+        fixup_count,
+        _,
+    ) = _HEADER.unpack_from(data)
+
+    assert magic == MAGIC, '[ERROR] Not an object file'
+    assert version == VERSION, f'[ERROR] Unsupported object version {version}'
+
+    view = memoryview(data)
+    position = _HEADER.size
+
+    def take(size: int) -> memoryview:
+        nonlocal position
+        chunk = view[position:position + size]
+        position += size
+        return chunk
+
+    assembly = Assembly()
+    assembly.code = bytearray(take(code_size))
+    assembly.offsets = _array('I', take(instructions * 4))
+    assembly.lines = _array('I', take(instructions * 4))
+    labels = _array('I', take(label_count * 8))
+    assembly.fixup_offsets = _array('I', take(fixup_count * 4))
+    assembly.fixup_kinds = _array('B', take(fixup_count))
+    assembly.fixup_symbols = _array('I', take(fixup_count * 4))
+
+    symbols = bytes(take(symbols_size)).decode()
+    assembly.symbols = symbols.split('\n') if symbol_count else []
+    assembly.symbol_ids = {
+        name: symbol for symbol, name in enumerate(assembly.symbols)
+    }
+    sources = bytes(take(sources_size)).decode()
+    assembly.sources = sources.split('\n') if instructions else []
+    assembly.labels = dict(zip(labels[::2], labels[1::2]))
+
+    return assembly
+
+
+def save_object(
+    assembly: Assembly,
+    path,
+    *flags: bool,
+    includes: Iterable[str] = ()
+):
+    # Written aside and moved, as a link may be reading the previous object
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory)
+    with os.fdopen(descriptor, 'wb') as output:
+        output.write(dumps(assembly, *flags, includes=includes))
+
+    publish(temporary, path)
+
+
+def publish(temporary, path):
+    # Temporary files are private, the file replacing path gets the usual
+    # permissions
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(temporary, 0o666 & ~umask)
+    os.replace(temporary, path)
+
+
+def load_object(path) -> Assembly:
+    with open(path, 'rb') as source:
+        return loads(source.read())
+
+
+def up_to_date(path, source, *flags: bool) -> bool:
+    # An object can stand for its source when it is newer than the source and
+    # the files it includes, and was compiled with the same options
+    try:
+        modified = os.stat(path).st_mtime_ns
+        with open(path, 'rb') as data:
+            header = data.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return False
+
+            magic, version, compiled, *sizes = _HEADER.unpack(header)
+            if (magic, version, compiled) != (MAGIC, VERSION, _flags(flags)):
+                return False
+
+            data.seek(-sizes[-1], os.SEEK_END)
+            includes = data.read().decode().split('\n') if sizes[-1] else []
+
+        return all(
+            os.stat(file).st_mtime_ns <= modified
+            for file in (source, *includes)
+        )
+    except FileNotFoundError:
+        return False
+
+
+def is_object(file) -> bool:
+    return os.path.splitext(file)[1] == '.' + EXTENSION
+
+
+def _flags(flags: tuple[bool, ...]) -> int:
+    return sum(flag << bit for bit, flag in enumerate(flags))
+
+
+def _little(values: array) -> bytes:
+    if sys.byteorder == 'little':
+        return values.tobytes()
+
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+
+    return swapped.tobytes()
+
+
+def _array(typecode: str, data: memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    return values
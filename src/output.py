@@ -1,59 +1,122 @@
-def _labels(labels, start_pos):
-    output = 'Labels:'
+import sys
+
+from .layout import place
+
+# Number of generated pieces joined into a single write to the stream
+_CHUNK_SIZE = 4096
+
+
+def _write(stream, pieces):
+    chunk = []
+    for piece in pieces:
+        chunk.append(piece)
+
+        if len(chunk) >= _CHUNK_SIZE:
+            stream.write(''.join(chunk))
+            chunk.clear()
+
+    stream.write(''.join(chunk))
+
+
+def _labels(labels, layout):
+    yield 'Labels:'
     for label, position in labels.items():
-        position_hex = '{:04X}'.format(position + start_pos)
-        output += f"\n\t0x{position_hex}: {label}"
+        position_hex = '{:04X}'.format(layout.address(position))
+        yield f"\n\t0x{position_hex}: {label}"
 
-    return output
+    yield '\n'
 
 
-def _instructions(bytecode, start_pos, bytes_per_line):
-    output = '\nInstructions:'
-    counter = 0
-    for bytes_list, instruction in bytecode:
-        if bytes_per_line == 1:
-            output += f"\n  {instruction}"
+def _bytecode(assembly, image):
+    view = memoryview(image)
+    for index, instruction in enumerate(assembly.sources):
+        start, end = assembly.instruction(index)
 
-        for byte in bytes_list:
-            if counter % bytes_per_line == 0:
-                output += "\n\t{:04X}: ".format(counter + start_pos)
-            if isinstance(byte, str):
-                output += f"{byte} "
-            else:
-                output += '{:02X} '.format(byte)
+        yield start, view[start:end], instruction
 
-            counter += 1
 
-    return output + f"\n\n\tTotal bytes: {counter}\n"
+def _instructions(assembly, image, layout, bytes_per_line):
+    yield '\nInstructions:'
 
+    if bytes_per_line == 1:
+        for start, bytes_list, instruction in _bytecode(assembly, image):
+            yield f"\n  {instruction}"
 
-def _basic_compiler(start_pos):
-    output = '\n'
-    output += "\t3000 DATA -1\n"
-    output += f"\t3010 PC={int(start_pos)}\n"
-    output += "\t3020 X=0\n"
-    output += "\t3030 READ A:IF A=-1 THEN END\n"
-    output += "\t3040 POKE PC+X,A:X=X+1:GOTO 3030\n"
-    output += f"\n\tSYS {int(start_pos)}"
+            address = layout.address(start)
+            for counter, byte in enumerate(bytes_list, address):
+                yield "\n\t{:04X}: {:02X} ".format(counter, byte)
+    else:
+        # Rows of each region, by address
+        view = memoryview(image)
+        for address, first, end in layout.regions:
+            for start in range(first, end, bytes_per_line):
+                row = view[start:min(start + bytes_per_line, end)]
+                yield "\n\t{:04X}: {} ".format(
+                    address + start - first,
+                    row.hex(' ').upper()
+                )
 
-    return output
+    yield f"\n\n\tTotal bytes: {len(image)}\n\n"
 
 
-def _basic_output(bytecode, start_pos):
-    output = 'BASIC instructions:\n'
-    for position, (bytes_list, instruction) in enumerate(bytecode):
+def _basic_compiler(start_pos):
+    yield '\n'
+    yield "\t3000 DATA -1\n"
+    yield f"\t3010 PC={int(start_pos)}\n"
+    yield "\t3020 X=0\n"
+    yield "\t3030 READ A:IF A=-1 THEN END\n"
+    yield "\t3040 POKE PC+X,A:X=X+1:GOTO 3030\n"
+    yield f"\n\tSYS {int(start_pos)}\n"
+
+
+def _basic_output(assembly, image, start_pos):
+    yield 'BASIC instructions:\n'
+    bytecode = _bytecode(assembly, image)
+    for position, (_, bytes_list, instruction) in enumerate(bytecode):
         line = f"\t{(position + 1) * 10} DATA "
         line += ','.join([str(i) for i in bytes_list])
 
         line = line.ljust(22, " ")
         line += f":REM {instruction}\n"
 
-        output += line
+        yield line
+
+    yield from _basic_compiler(start_pos)
+
+
+def write_output(assembly, image, start_pos, stream, bytes_per_line=8):
+    layout = place(assembly, start_pos)
+    _write(stream, _labels(assembly.label_offsets(), layout))
+    _write(stream, _instructions(assembly, image, layout, bytes_per_line))
+
+    # The BASIC listing pokes the program at a single address
+    if not layout.placed:
+        _write(stream, _basic_output(assembly, image, start_pos))
+
+
+def save_output(assembly, image, start_pos, path, bytes_per_line=8):
+    with open(path, 'w') as stream:
+        write_output(assembly, image, start_pos, stream, bytes_per_line)
+
+
+def print_output(assembly, image, start_pos, bytes_per_line=8):
+    write_output(assembly, image, start_pos, sys.stdout, bytes_per_line)
+
+
+def write_binary(image, start_pos, stream, prg=False, layout=None):
+    # A placed program is written region by region, without copying it
+    chunks = [image]
+    if layout is not None:
+        chunks = layout.chunks(image)
+        start_pos = layout.start
+
+    if prg:
+        stream.write(start_pos.to_bytes(2, 'little'))
 
-    return output + _basic_compiler(start_pos)
+    for chunk in chunks:
+        stream.write(chunk)
 
 
-def print_output(labels, bytecode, start_pos, bytes_per_line=8):
-    print(_labels(labels, start_pos))
-    print(_instructions(bytecode, start_pos, bytes_per_line))
-    print(_basic_output(bytecode, start_pos))
+def save_binary(image, start_pos, path, prg=False, layout=None):
+    with open(path, 'wb') as stream:
+        write_binary(image, start_pos, stream, prg=prg, layout=layout)
@@ -0,0 +1,232 @@
+from .compiler import Program
+from .linker import Linker
+
+# Packed programs load where BASIC programs do, and start with a SYS line
+LOAD_ADDRESS = 0x0801
+# End of the memory available to BASIC programs, where the BASIC ROM starts
+_MEMORY_END = 0xA000
+
+# Stream of tokens, each starting with a control byte:
+#   0           end of the stream
+#   1-127       that many literal bytes follow
+#   128-255     copy (control & 127) + MIN_MATCH bytes from the absolute
+#               address in the two following bytes (little-endian)
+MIN_MATCH = 4
+_MAX_MATCH = 0x7F + MIN_MATCH
+_MAX_LITERALS = 0x7F
+# Earlier occurrences of a sequence tried for each match, newest first
+_CHAIN = 32
+
+# 10 SYS 2061
+_SYS_LINE = bytes([
+    0x0B, 0x08, 0x0A, 0x00, 0x9E, 0x32, 0x30, 0x36, 0x31, 0x00, 0x00, 0x00,
+])
+_STUB_ADDRESS = LOAD_ADDRESS + len(_SYS_LINE)
+
+# Decompresses the token stream at $FB into the program at $FD, using $22 to
+# point at matches, then starts the program
+_STUB = '''
+  LDA #${source_low:02X}
+  STA $FB
+  LDA #${source_high:02X}
+  STA $FC
+  LDA #${start_low:02X}
+  STA $FD
+  LDA #${start_high:02X}
+  STA $FE
+  LDY #$00
+TOKEN:
+  LDA ($FB),Y
+  INC $FB
+  BNE READ
+  INC $FC
+READ:
+  TAX
+  BEQ DONE
+  BMI MATCH
+LITERAL:
+  LDA ($FB),Y
+  STA ($FD),Y
+  INC $FB
+  BNE LITERAL_SOURCE
+  INC $FC
+LITERAL_SOURCE:
+  INC $FD
+  BNE LITERAL_NEXT
+  INC $FE
+LITERAL_NEXT:
+  DEX
+  BNE LITERAL
+  BEQ TOKEN
+MATCH:
+  AND #$7F
+  CLC
+  ADC #${min_match:02X}
+  TAX
+  LDA ($FB),Y
+  STA $22
+  INC $FB
+  BNE ADDRESS
+  INC $FC
+ADDRESS:
+  LDA ($FB),Y
+  STA $23
+  INC $FB
+  BNE COPY
+  INC $FC
+COPY:
+  LDA ($22),Y
+  STA ($FD),Y
+  INC $22
+  BNE COPY_SOURCE
+  INC $23
+COPY_SOURCE:
+  INC $FD
+  BNE COPY_NEXT
+  INC $FE
+COPY_NEXT:
+  DEX
+  BNE COPY
+  BEQ TOKEN
+DONE:
+  JMP ${start:04X}
+'''
+
+
+def compress(data: bytes, start_pos: int) -> bytes:
+    data = bytes(data)
+    size = len(data)
+    packed = bytearray()
+    chains = {}
+    literals = 0
+
+    position = 0
+    while position < size:
+        length, source = _longest_match(data, position, chains)
+
+        if length < MIN_MATCH:
+            _remember(data, position, chains)
+            position += 1
+            continue
+
+        _literals(packed, data, literals, position)
+        address = start_pos + source
+        packed += bytes([
+            0x80 | (length - MIN_MATCH),
+            address & 0xFF,
+            address >> 8,
+        ])
+
+        for skipped in range(position, position + length):
+            _remember(data, skipped, chains)
+        position += length
+        literals = position
+
+    _literals(packed, data, literals, size)
+    packed.append(0)
+
+    return bytes(packed)
+
+
+def decompress(packed: bytes, start_pos: int) -> bytearray:
+    data = bytearray()
+    position = 0
+
+    while control := packed[position]:
+        if control < 0x80:
+            data += packed[position + 1:position + 1 + control]
+            position += 1 + control
+            continue
+
+        source = packed[position + 1] | packed[position + 2] << 8
+        source -= start_pos
+        # Byte by byte like the stub, so that overlapping copies repeat
+        for index in range((control & 0x7F) + MIN_MATCH):
+            data.append(data[source + index])
+        position += 3
+
+    return data
+
+
+def stub(source: int, start_pos: int) -> bytes:
+    text = _STUB.format(
+        source_low=source & 0xFF,
+        source_high=source >> 8,
+        start_low=start_pos & 0xFF,
+        start_high=start_pos >> 8,
+        start=start_pos,
+        min_match=MIN_MATCH
+    )
+
+    program = Program()
+    for line in text.splitlines():
+        program.next_instruction(line)
+
+    return bytes(Linker(_STUB_ADDRESS).parse(program.assembly()))
+
+
+def pack(image, start_pos: int) -> bytes:
+    # Loaded at LOAD_ADDRESS and started with RUN: the SYS line calls the
+    # stub, which unpacks the image to start_pos and jumps to it
+    packed = compress(image, start_pos)
+    # The stub has the same size wherever the stream is
+    source = _STUB_ADDRESS + len(stub(0, start_pos))
+    end = source + len(packed)
+
+    assert end <= _MEMORY_END, f'Packed program too large: {len(packed)}'
+
+    overlaps = start_pos < end and LOAD_ADDRESS < start_pos + len(image)
+    assert not overlaps, (
+        f'Packed program (${LOAD_ADDRESS:04X}-${end - 1:04X}) overlaps the '
+        f'start position ${start_pos:04X}'
+    )
+
+    return _SYS_LINE + stub(source, start_pos) + packed
+
+
+def _longest_match(data: bytes, position: int, chains) -> tuple[int, int]:
+    limit = min(len(data) - position, _MAX_MATCH)
+    if limit < MIN_MATCH:
+        return 0, 0
+
+    best = best_source = 0
+    candidates = chains.get(data[position:position + MIN_MATCH], ())
+    for source in reversed(candidates[-_CHAIN:]):
+        # Only a longer match is worth comparing
+        if best and data[source + best] != data[position + best]:
+            continue
+
+        length = _common_length(data, source, position, limit)
+        if length > best:
+            best, best_source = length, source
+            if best == limit:
+                break
+
+    return best, best_source
+
+
+def _common_length(data: bytes, source: int, position: int, limit: int):
+    # The first MIN_MATCH bytes are known equal: bisect on slice equality
+    low, high = MIN_MATCH, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if data[source:source + middle] == data[position:position + middle]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def _remember(data: bytes, position: int, chains):
+    key = data[position:position + MIN_MATCH]
+    if len(key) == MIN_MATCH:
+        chains.setdefault(key, []).append(position)
+
+
+def _literals(packed: bytearray, data: bytes, start: int, end: int):
+    while start < end:
+        count = min(end - start, _MAX_LITERALS)
+        packed.append(count)
+        packed += data[start:start + count]
+        start += count
@@ -0,0 +1,75 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .assembly import Assembly
+from .compiler import Program, Stamp
+
+# Sources smaller than this are not worth the process start-up cost
+MIN_CHUNK_BYTES = 256 * 1024
+
+
+def split_source(
+    data: bytes,
+    chunks: int,
+    min_size: int = MIN_CHUNK_BYTES
+) -> list[tuple[int, int, int]]:
+    size = max(len(data) // max(chunks, 1), min_size)
+    ranges = []
+    start = 0
+    line_offset = 0
+
+    while start < len(data):
+        end = data.find(b'\n', start + size)
+        end = len(data) if end == -1 else end + 1
+
+        ranges.append((start, end, line_offset))
+        line_offset += data.count(b'\n', start, end)
+        start = end
+
+    return ranges
+
+
+def _parse_chunk(
+    file,
+    start: int,
+    end: int,
+    line_offset: int
+) -> tuple[Assembly, dict[str, Stamp]]:
+    with open(file, 'rb') as source:
+        source.seek(start)
+        lines = source.read(end - start).decode().splitlines()
+
+    program = Program(line_offset, file)
+    for line in lines:
+        program.next_instruction(line)
+
+    return program.assembly(), program.includes
+
+
+def parse_parallel(
+    file,
+    jobs: int | None = None,
+    includes: dict[str, Stamp] | None = None
+) -> Assembly:
+    with open(file, 'rb') as source:
+        data = source.read()
+
+    ranges = split_source(data, jobs or os.cpu_count() or 1)
+    del data
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(_parse_chunk, file, *bounds)
+            for bounds in ranges
+        ]
+
+        # Each chunk is rebased after the code of the previous ones, then the
+        # linker resolves all the fixups in a single global pass
+        assembly = Assembly()
+        for future in futures:
+            chunk, chunk_includes = future.result()
+            assembly.extend(chunk)
+            if includes is not None:
+                includes.update(chunk_includes)
+
+    return assembly
@@ -0,0 +1,260 @@
+from bisect import bisect_left
+from typing import Iterator, NamedTuple
+
+from .assembly import Assembly
+from .layout import places_code
+from .opcodes import ABSOLUTE, BRANCHES, DECODE, IMMEDIATE, IMPLIED, OPCODES
+
+_JSR = OPCODES[('JSR', ABSOLUTE)][0]
+_JMP = OPCODES[('JMP', ABSOLUTE)][0]
+_RTS = OPCODES[('RTS', IMPLIED)][0]
+
+# Instructions leaving A, X, Y and the N/Z flags untouched
+_NEUTRAL = frozenset((
+    'STA', 'STX', 'STY', 'NOP', 'CLC', 'SEC', 'CLI', 'SEI', 'CLD', 'SED',
+    'CLV', 'PHA', 'PHP', 'TXS', *BRANCHES,
+))
+# Instructions changing the N/Z flags but none of A, X and Y
+_FLAGS = frozenset(('CMP', 'CPX', 'CPY', 'BIT', 'INC', 'DEC'))
+_SHIFTS = frozenset(('ASL', 'LSR', 'ROL', 'ROR'))
+_TRANSFERS = {'TAX': 'XA', 'TAY': 'YA', 'TXA': 'AX', 'TYA': 'AY'}
+_STEPS = {'INX': ('X', 1), 'DEX': ('X', -1), 'INY': ('Y', 1), 'DEY': ('Y', -1)}
+
+
+class Rewrite(NamedTuple):
+    line: int
+    rule: str
+    removed: list[str]
+    added: list[str]
+
+
+class _Instruction(NamedTuple):
+    line: int
+    source: str
+    code: bytes
+    # (position in the instruction, kind, symbol)
+    fixups: tuple[tuple[int, int, int], ...]
+    labels: list[int]
+    data: bool
+
+
+class _State:
+    # Known values of the registers, and the value the N/Z flags were last
+    # set from, in straight-line code
+    __slots__ = ('A', 'X', 'Y', 'flags')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.A = self.X = self.Y = self.flags = None
+
+    def redundant(self, register: str, value: int) -> bool:
+        return getattr(self, register) == value and self.flags == value
+
+    def step(self, mnemonic: str, mode: str, code: bytes):
+        if mnemonic in _NEUTRAL:
+            return
+
+        if mnemonic in ('LDA', 'LDX', 'LDY'):
+            value = code[1] if mode == IMMEDIATE else None
+            setattr(self, mnemonic[2], value)
+            self.flags = value
+        elif mnemonic in _TRANSFERS:
+            target, source = _TRANSFERS[mnemonic]
+            value = getattr(self, source)
+            setattr(self, target, value)
+            self.flags = value
+        elif mnemonic in _STEPS:
+            register, delta = _STEPS[mnemonic]
+            value = getattr(self, register)
+            if value is not None:
+                value = (value + delta) & 0xFF
+
+            setattr(self, register, value)
+            self.flags = value
+        elif mnemonic in _FLAGS or (mnemonic in _SHIFTS and len(code) > 1):
+            self.flags = None
+        else:
+            # Calls, returns, arithmetic and anything else: forget everything
+            self.reset()
+
+
+def optimize(assembly: Assembly) -> tuple[Assembly, list[Rewrite]]:
+    instructions, trailing = _instructions(assembly)
+    rewrites = []
+
+    # A rewrite can expose another one, such as a tail call to the next
+    # instruction: repeat until a pass changes nothing
+    while True:
+        count = len(rewrites)
+        instructions, trailing = _pass(instructions, trailing, rewrites)
+        if len(rewrites) == count:
+            break
+
+    if not rewrites:
+        return assembly, rewrites
+
+    return _assembly(assembly, instructions, trailing), rewrites
+
+
+def diff(rewrites: list[Rewrite]) -> Iterator[str]:
+    for rewrite in rewrites:
+        yield f"@@ line {rewrite.line}: {rewrite.rule} @@\n"
+        for source in rewrite.removed:
+            yield f"-\t{source}\n"
+        for source in rewrite.added:
+            yield f"+\t{source}\n"
+
+
+def _instructions(assembly: Assembly):
+    labels = {}
+    for symbol, offset in assembly.labels.items():
+        index = bisect_left(assembly.offsets, offset)
+        labels.setdefault(index, []).append(symbol)
+
+    fixups = {}
+    for offset, kind, symbol in assembly.fixups():
+        index = assembly.instruction_at(offset)
+        position = offset - assembly.offsets[index]
+        fixups.setdefault(index, []).append((position, kind, symbol))
+
+    instructions = []
+    for index, source in enumerate(assembly.sources):
+        start, end = assembly.instruction(index)
+        instructions.append(_Instruction(
+            assembly.lines[index],
+            source,
+            bytes(assembly.code[start:end]),
+            tuple(fixups.get(index, ())),
+            labels.get(index, []),
+            assembly.is_data(index)
+        ))
+
+    return instructions, labels.get(len(instructions), [])
+
+
+def _pass(instructions: list[_Instruction], trailing: list[int], rewrites):
+    result = []
+    # Labels of removed instructions move to the next one kept
+    moved = []
+    state = _State()
+
+    index = 0
+    while index < len(instructions):
+        instruction = instructions[index]
+        following = None
+        if index + 1 < len(instructions):
+            following = instructions[index + 1]
+
+        if moved:
+            instruction = instruction._replace(
+                labels=moved + instruction.labels
+            )
+            moved = []
+
+        # Any label can be jumped to: nothing is known about its registers
+        if instruction.labels:
+            state = _State()
+
+        # Data is left alone, and can be code reached in any state
+        if instruction.data:
+            result.append(instruction)
+            state = _State()
+            index += 1
+            continue
+
+        opcode = instruction.code[0]
+        mnemonic, mode, _, _ = DECODE[opcode]
+
+        returns = following and not following.data
+        if opcode == _JSR and returns and following.code[0] == _RTS:
+            jump = instruction._replace(
+                source=f"JMP{instruction.source[3:]}",
+                code=bytes([_JMP]) + instruction.code[1:]
+            )
+            result.append(jump)
+            index += 1
+
+            removed = [instruction.source]
+            if not following.labels:
+                # Nothing else returns through this RTS
+                removed.append(following.source)
+                index += 1
+
+            rewrites.append(Rewrite(
+                instruction.line,
+                'tail call',
+                removed,
+                [jump.source]
+            ))
+            state = _State()
+            continue
+
+        if opcode == _JMP and _jumps_to(instruction, following, trailing):
+            rewrites.append(Rewrite(
+                instruction.line,
+                'jump to the next instruction',
+                [instruction.source],
+                []
+            ))
+            moved = instruction.labels
+            index += 1
+            continue
+
+        if mnemonic in ('LDA', 'LDX', 'LDY') and mode == IMMEDIATE:
+            if state.redundant(mnemonic[2], instruction.code[1]):
+                rewrites.append(Rewrite(
+                    instruction.line,
+                    'redundant load',
+                    [instruction.source],
+                    []
+                ))
+                moved = instruction.labels
+                index += 1
+                continue
+
+        state.step(mnemonic, mode, instruction.code)
+        result.append(instruction)
+        index += 1
+
+    return result, moved + trailing
+
+
+def _jumps_to(instruction: _Instruction, following, trailing) -> bool:
+    # Code placed elsewhere by a directive does not follow the jump
+    if len(instruction.fixups) != 1 or (
+        following is not None and places_code(following.source)
+    ):
+        return False
+
+    symbol = instruction.fixups[0][2]
+    labels = trailing if following is None else following.labels
+
+    return symbol in labels
+
+
+def _assembly(
+    original: Assembly,
+    instructions: list[_Instruction],
+    trailing: list[int]
+) -> Assembly:
+    assembly = Assembly()
+    assembly.symbols = original.symbols
+    assembly.symbol_ids = original.symbol_ids
+
+    for instruction in instructions:
+        offset = len(assembly.code)
+        for symbol in instruction.labels:
+            assembly.labels[symbol] = offset
+
+        assembly.begin(instruction.line, instruction.source)
+        for position, kind, symbol in instruction.fixups:
+            assembly.fixup(offset + position, kind, symbol)
+
+        assembly.code += instruction.code
+
+    for symbol in trailing:
+        assembly.labels[symbol] = len(assembly.code)
+
+    return assembly
@@ -0,0 +1,306 @@
+from bisect import bisect_left
+
+from .assembly import ABS, REL, ZP, Assembly
+from .incremental import FenwickTree
+from .layout import place, placed
+from .opcodes import (
+    ABSOLUTE,
+    BRANCH_REACH,
+    DECODE,
+    NARROW_MODES,
+    OPCODES,
+    RELATIVE,
+)
+
+_INVERSE_BRANCHES = {
+    'BCC': 'BCS',
+    'BCS': 'BCC',
+    'BEQ': 'BNE',
+    'BNE': 'BEQ',
+    'BMI': 'BPL',
+    'BPL': 'BMI',
+    'BVC': 'BVS',
+    'BVS': 'BVC',
+}
+_JMP = OPCODES[('JMP', ABSOLUTE)][0]
+
+# Size of an inverted branch over a JMP
+_LONG_BRANCH = 5
+
+
+def relax(assembly: Assembly, start_pos: int) -> Assembly:
+    if placed(assembly):
+        return _relax_placed(assembly, start_pos)
+
+    # Only programs starting in the zero page have labels that fit in it
+    if start_pos > 0xFF:
+        return assembly
+
+    # Start from every reference in its zero page form and widen the ones
+    # whose label does not fit. Widening only moves labels up, so the
+    # remaining ones are checked again until none changes
+    shrunk = _candidates(assembly)
+    changed = True
+    while changed:
+        starts = sorted(assembly.offsets[index] for index in shrunk)
+        changed = False
+        for index, (symbol, _) in list(shrunk.items()):
+            label_pos = assembly.labels[symbol]
+            if start_pos + label_pos - bisect_left(starts, label_pos) > 0xFF:
+                del shrunk[index]
+                changed = True
+
+    if not shrunk:
+        return assembly
+
+    return _rebuild(assembly, shrunk, starts)
+
+
+def _relax_placed(assembly: Assembly, start_pos: int) -> Assembly:
+    # Narrowing only moves code down: fixed parts keep their address and
+    # smaller segments fit at the same place or lower in their area. Labels
+    # placed in the zero page, such as those of a zp area, stay there
+    layout = place(assembly, start_pos)
+    shrunk = {
+        index: (symbol, opcode)
+        for index, (symbol, opcode) in _candidates(assembly).items()
+        if layout.address(assembly.labels[symbol]) <= 0xFF
+    }
+    if not shrunk:
+        return assembly
+
+    starts = sorted(assembly.offsets[index] for index in shrunk)
+
+    return _rebuild(assembly, shrunk, starts)
+
+
+def _candidates(assembly: Assembly) -> dict[int, tuple[int, int]]:
+    # Absolute references to known labels from instructions having a zero
+    # page form
+    candidates = {}
+    for offset, kind, symbol in assembly.fixups():
+        if kind != ABS or symbol not in assembly.labels:
+            continue
+
+        index = assembly.instruction_at(offset)
+        if assembly.is_data(index):
+            continue
+
+        mnemonic, mode, _, _ = DECODE[assembly.code[offset - 1]]
+        narrow = OPCODES.get((mnemonic, NARROW_MODES.get(mode)))
+        if narrow is not None:
+            candidates[index] = (symbol, narrow[0])
+
+    return candidates
+
+
+def _rebuild(
+    assembly: Assembly,
+    shrunk: dict[int, tuple[int, int]],
+    starts: list[int]
+) -> Assembly:
+    relaxed = Assembly()
+    relaxed.symbols = assembly.symbols
+    relaxed.symbol_ids = assembly.symbol_ids
+
+    code = assembly.code
+    for index, source in enumerate(assembly.sources):
+        start, end = assembly.instruction(index)
+        relaxed.begin(assembly.lines[index], source)
+
+        if index in shrunk:
+            relaxed.code += bytes([shrunk[index][1], 0])
+        else:
+            relaxed.code += code[start:end]
+
+    for symbol, offset in assembly.labels.items():
+        relaxed.labels[symbol] = offset - bisect_left(starts, offset)
+
+    for offset, kind, symbol in assembly.fixups():
+        index = assembly.instruction_at(offset)
+        if index in shrunk:
+            kind = ZP
+
+        start = assembly.offsets[index]
+        relaxed.fixup(offset - bisect_left(starts, start), kind, symbol)
+
+    return relaxed
+
+
+def relax_branches(assembly: Assembly, start_pos: int = 0) -> Assembly:
+    # Branches out of range become an inverted branch over a JMP. Growing
+    # one only moves the code after it, so only the branches still in
+    # range around it are revisited, until none is left to grow
+    if placed(assembly):
+        return _relax_placed_branches(assembly, start_pos)
+
+    offsets = assembly.offsets
+    count = len(offsets)
+    sizes = [
+        end - start
+        for start, end in map(assembly.instruction, range(count))
+    ]
+    branches = {}
+    for offset, kind, symbol in assembly.fixups():
+        label_pos = assembly.labels.get(symbol)
+        if kind == REL and label_pos is not None:
+            index = assembly.instruction_at(offset)
+            branches[index] = (label_pos, bisect_left(offsets, label_pos))
+
+    growth = FenwickTree([0] * count)
+    grown = set()
+    worklist = list(branches)
+
+    while worklist:
+        index = worklist.pop()
+        if index in grown:
+            continue
+
+        label_pos, target = branches[index]
+        address = offsets[index] + growth.prefix(index)
+        distance = label_pos + growth.prefix(target) - address - 2
+        if -128 <= distance <= 127:
+            continue
+
+        grown.add(index)
+        sizes[index] += _LONG_BRANCH - 2
+        growth.add(index, _LONG_BRANCH - 2)
+        worklist.extend(_around(index, address, sizes, branches, grown))
+
+    if not grown:
+        return assembly
+
+    return _lengthen(assembly, sorted(grown))
+
+
+def _relax_placed_branches(assembly: Assembly, start_pos: int) -> Assembly:
+    # The program is placed once: growing a branch moves the code after it
+    # in its part, and the later parts of its segment. Branches between
+    # parts are revisited whenever one grows, since parts move apart
+    layout = place(assembly, start_pos)
+    offsets = assembly.offsets
+    count = len(offsets)
+    sizes = [
+        end - start
+        for start, end in map(assembly.instruction, range(count))
+    ]
+    firsts = [bisect_left(offsets, offset) for offset in layout.offsets]
+    runs = _runs(layout.segments, firsts + [count])
+
+    def address(offset: int, index: int) -> int:
+        part = layout.part(offset)
+        moved = growth.prefix(index) - growth.prefix(firsts[part])
+        for first, end in runs[part]:
+            moved += growth.prefix(end) - growth.prefix(first)
+
+        return layout.address(offset) + moved
+
+    branches = {}
+    crossing = set()
+    for offset, kind, symbol in assembly.fixups():
+        label_pos = assembly.labels.get(symbol)
+        if kind == REL and label_pos is not None:
+            index = assembly.instruction_at(offset)
+            branches[index] = (label_pos, bisect_left(offsets, label_pos))
+            if layout.part(label_pos) != layout.part(offsets[index]):
+                crossing.add(index)
+
+    growth = FenwickTree([0] * count)
+    grown = set()
+    worklist = list(branches)
+
+    while worklist:
+        index = worklist.pop()
+        if index in grown:
+            continue
+
+        label_pos, target = branches[index]
+        origin = address(offsets[index], index)
+        distance = address(label_pos, target) - origin - 2
+        if -128 <= distance <= 127:
+            continue
+
+        grown.add(index)
+        sizes[index] += _LONG_BRANCH - 2
+        growth.add(index, _LONG_BRANCH - 2)
+        worklist.extend(_around(index, origin, sizes, branches, grown))
+        worklist.extend(crossing - grown)
+
+    if not grown:
+        return assembly
+
+    return _lengthen(assembly, sorted(grown))
+
+
+def _runs(segments: list[str | None], firsts: list[int]) -> list[list]:
+    # Instructions of the earlier parts of the same segment, whose growth
+    # moves each part
+    runs = []
+    earlier = {}
+    for part, segment in enumerate(segments):
+        before = earlier.setdefault(segment, [])
+        runs.append(list(before) if segment is not None else [])
+        before.append((firsts[part], firsts[part + 1]))
+
+    return runs
+
+
+def _around(index: int, address: int, sizes, branches, grown):
+    # Branches in range spanning the grown one sit within reach of it
+    before = index - 1
+    distance = 0
+    while before >= 0 and distance <= BRANCH_REACH:
+        distance += sizes[before]
+        if before in branches and before not in grown:
+            yield before
+        before -= 1
+
+    after = index + 1
+    distance = sizes[index]
+    while after < len(sizes) and distance <= BRANCH_REACH:
+        if after in branches and after not in grown:
+            yield after
+        distance += sizes[after]
+        after += 1
+
+
+def _lengthen(assembly: Assembly, grown: list[int]) -> Assembly:
+    relaxed = Assembly()
+    relaxed.symbols = assembly.symbols
+    relaxed.symbol_ids = assembly.symbol_ids
+
+    extra = _LONG_BRANCH - 2
+    long = set(grown)
+    jumps = {}
+
+    code = assembly.code
+    for index, source in enumerate(assembly.sources):
+        start, end = assembly.instruction(index)
+        line = assembly.lines[index]
+
+        if index in long:
+            mnemonic = source[:3]
+            inverse = _INVERSE_BRANCHES[mnemonic]
+            relaxed.begin(line, f"{inverse} *+{_LONG_BRANCH}")
+            relaxed.code += bytes([OPCODES[(inverse, RELATIVE)][0], 3])
+
+            jumps[index] = len(relaxed.code) + 1
+            relaxed.begin(line, f"JMP{source[3:]}")
+            relaxed.code += bytes([_JMP, 0, 0])
+        else:
+            relaxed.begin(line, source)
+            relaxed.code += code[start:end]
+
+    for symbol, offset in assembly.labels.items():
+        index = bisect_left(assembly.offsets, offset)
+        relaxed.labels[symbol] = offset + extra * bisect_left(grown, index)
+
+    for offset, kind, symbol in assembly.fixups():
+        index = assembly.instruction_at(offset)
+        if index in long:
+            relaxed.fixup(jumps[index], ABS, symbol)
+        else:
+            shift = extra * bisect_left(grown, index)
+            relaxed.fixup(offset + shift, kind, symbol)
+
+    return relaxed
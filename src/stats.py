@@ -0,0 +1,104 @@
+import cProfile
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+
+
+class Stats:
+    stages: dict[str, tuple[float, float, int | None]]
+    counters: dict[str, int]
+    _memory: bool
+    _profile: str | None
+    _profiler: cProfile.Profile | None
+
+    def __init__(self, memory: bool = True, profile: str | None = None):
+        self.stages = {}
+        self.counters = {}
+        self._memory = memory
+        self._profile = profile
+        self._profiler = None
+
+    def __enter__(self) -> 'Stats':
+        if self._memory:
+            tracemalloc.start()
+        if self._profile is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+        return self
+
+    def __exit__(self, *_):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self._profile)
+            self._profiler = None
+        if self._memory:
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            peak = None
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+
+            # Stages entered several times add up, keeping the highest peak
+            if name in self.stages:
+                total_wall, total_cpu, total_peak = self.stages[name]
+                wall += total_wall
+                cpu += total_cpu
+                if peak is not None and total_peak is not None:
+                    peak = max(peak, total_peak)
+
+            self.stages[name] = (wall, cpu, peak)
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> Iterator[str]:
+        yield f"{'Stage':<10}{'Wall ms':>12}{'CPU ms':>12}{'Peak KiB':>12}\n"
+
+        total_wall = total_cpu = 0.0
+        for name, (wall, cpu, peak) in self.stages.items():
+            total_wall += wall
+            total_cpu += cpu
+            peak = '-' if peak is None else f"{peak / 1024:.1f}"
+            yield f"{name:<10}{wall * 1000:>12.3f}{cpu * 1000:>12.3f}"
+            yield f"{peak:>12}\n"
+
+        yield f"{'total':<10}{total_wall * 1000:>12.3f}"
+        yield f"{total_cpu * 1000:>12.3f}\n\n"
+
+        parse = self.stages.get('parse')
+        lines = self.counters.get('lines')
+        if parse and lines and parse[0] > 0:
+            yield f"{'lines/s':<14}{round(lines / parse[0]):>10}\n"
+
+        for name, value in self.counters.items():
+            yield f"{name:<14}{value:>10}\n"
+
+
+class _Disabled:
+    # Stand-in when statistics are off: no clock reads, no bookkeeping
+    _stage = nullcontext()
+
+    def stage(self, name: str):
+        return self._stage
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+
+DISABLED = _Disabled()
@@ -0,0 +1,219 @@
+import os
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from . import peephole
+from .assembly import Assembly
+from .basic import write_basic
+from .build import BASIC_FORMATS, parse_lines
+from .compiler import Program, includes_file, stamp
+from .layout import place, placed, places_code
+from .linker import Linker
+from .objects import publish
+from .output import write_binary, write_output
+from .relax import relax, relax_branches
+
+# Seconds between two checks of the watched files
+POLL_INTERVAL = 0.2
+
+
+class Watcher:
+    _file: str
+    _start_pos: int
+    _format: str
+    _output: str
+    _bytes_per_line: int
+    _optimize: bool
+    _long_branches: bool
+    # Peephole rewrites applied by the last build
+    rewrites: list[peephole.Rewrite]
+    _lines: list[str] | None
+    _program: Program | None
+    # Set only when optimizing, relaxing or lengthening branches changed the
+    # parsed program
+    _assembly: Assembly | None
+    _linker: Linker
+    _image: bytearray | None
+    # Whether the program places its code with directives
+    _placed: bool
+
+    def __init__(
+        self,
+        file: str,
+        start_pos: int,
+        format: str,
+        output: str,
+        bytes_per_line: int = 8,
+        optimize: bool = False,
+        long_branches: bool = False
+    ):
+        self._file = file
+        self._start_pos = start_pos
+        self._format = format
+        self._output = output
+        self._bytes_per_line = bytes_per_line
+        self._optimize = optimize
+        self._long_branches = long_branches
+        self.rewrites = []
+        self._lines = None
+        self._program = None
+        self._assembly = None
+        self._linker = Linker(start_pos)
+        self._image = None
+        self._placed = False
+
+    def files(self) -> list[str]:
+        # The source, then the files it includes
+        if self._program is None:
+            return [self._file]
+
+        return [self._file, *self._program.includes]
+
+    def build(self) -> int:
+        # Returns the number of lines re-assembled, every line on a full build
+        with open(self._file, 'r') as source:
+            lines = source.read().splitlines()
+
+        try:
+            changed = self._changed_lines(lines)
+            if changed is None:
+                self._rebuild(lines)
+            else:
+                for line in changed:
+                    edit = self._program.update_line(line + 1, lines[line])
+                    self._linker.update(self._image, edit)
+        except Exception:
+            # The in-memory state can be half updated: start over next time
+            self._lines = None
+            raise
+
+        self._lines = lines
+        self._save()
+
+        return len(lines) if changed is None else len(changed)
+
+    def _changed_lines(self, lines: list[str]) -> list[int] | None:
+        # Lines can only be re-assembled in place while none is added or
+        # removed, otherwise the whole file is parsed again
+        if self._lines is None or len(lines) != len(self._lines):
+            return None
+
+        # Optimized, relaxed and placed programs are laid out differently
+        # from the parsed lines, and included files can change without any
+        # line changing. An edit can also make a peephole rewrite apply or
+        # a branch go out of range
+        if self._assembly is not None or self._placed:
+            return None
+        if self._optimize or self._long_branches:
+            return None
+        if self._program.includes:
+            return None
+
+        changed = [
+            line
+            for line, (old, new) in enumerate(zip(self._lines, lines))
+            if old != new
+        ]
+
+        # A line starting to include a file or to place the code is not
+        # assembled in place
+        for line in changed:
+            if includes_file(lines[line]) or places_code(lines[line]):
+                return None
+
+        return changed
+
+    def _rebuild(self, lines: list[str]):
+        self._program = parse_lines(lines, self._file)
+        assembly = self._program.assembly()
+        parsed = assembly
+        self.rewrites = []
+        if self._optimize:
+            assembly, self.rewrites = peephole.optimize(assembly)
+        relaxed = relax(assembly, self._start_pos)
+        if self._long_branches:
+            relaxed = relax_branches(relaxed, self._start_pos)
+        self._assembly = None if relaxed is parsed else relaxed
+        self._image = self._linker.parse(relaxed)
+        self._placed = placed(relaxed)
+
+    def _save(self):
+        # The artifact is replaced in one step, so that an emulator loading
+        # it never reads a partial file
+        directory = os.path.dirname(os.path.abspath(self._output))
+        binary = self._format in ('prg', 'bin')
+        assembly = self._assembly
+        if assembly is None:
+            assembly = self._program.assembly()
+        layout = None
+        if self._placed:
+            layout = place(assembly, self._start_pos)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+
+        try:
+            with os.fdopen(descriptor, 'wb' if binary else 'w') as stream:
+                if binary:
+                    write_binary(
+                        self._image,
+                        self._start_pos,
+                        stream,
+                        prg=self._format == 'prg',
+                        layout=layout
+                    )
+                elif self._format in BASIC_FORMATS:
+                    image, start_pos = self._image, self._start_pos
+                    if layout is not None:
+                        image, start_pos = layout.flatten(image)
+                    write_basic(
+                        image,
+                        start_pos,
+                        stream,
+                        fast=self._format == 'basic-fast'
+                    )
+                else:
+                    write_output(
+                        assembly,
+                        self._image,
+                        self._start_pos,
+                        stream,
+                        self._bytes_per_line
+                    )
+
+            publish(temporary, self._output)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+
+def watch(
+    watcher: Watcher,
+    interval: float = POLL_INTERVAL,
+    running: Callable[[], bool] = lambda: True
+) -> int:
+    stamps = None
+
+    while running():
+        files = watcher.files()
+        current = [stamp(file) for file in files]
+        if current != stamps:
+            try:
+                lines = watcher.build()
+                sys.stderr.write(''.join(peephole.diff(watcher.rewrites)))
+                print(f"Rebuilt {lines} line(s)", file=sys.stderr)
+            except Exception as error:
+                print(error, file=sys.stderr)
+
+            # Files are compared with their stamps from before the build, so
+            # that an edit saved meanwhile builds again. Dependencies found
+            # by the build are stamped now
+            known = dict(zip(files, current))
+            stamps = [
+                known[file] if file in known else stamp(file)
+                for file in watcher.files()
+            ]
+
+        time.sleep(interval)
+
+    return 0
@@ -0,0 +1,22 @@
+import unittest
+
+from src.assembly import Assembly
+from src.build import parse_lines
+from src.linker import Linker
+from src.relax import relax
+
+
+class LinkedProgramTestCase(unittest.TestCase):
+    # Whether the code is relaxed before linking, as the assembler does
+    relaxed: bool = False
+
+    def _assemble(
+        self,
+        lines: list[str],
+        start_pos: int = 0xC000
+    ) -> tuple[Assembly, bytearray]:
+        assembly = parse_lines(lines).assembly()
+        if self.relaxed:
+            assembly = relax(assembly, start_pos)
+
+        return assembly, Linker(start_pos).parse(assembly)
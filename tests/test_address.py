@@ -1,6 +1,16 @@
 import unittest
 
-from src.address import AddressResolver
+from src.address import AddressResolver, Operand, classify
+from src.opcodes import (
+    ABSOLUTE,
+    ABSOLUTE_X,
+    ACCUMULATOR,
+    IMPLIED,
+    INDIRECT,
+    INDIRECT_X,
+    INDIRECT_Y,
+    ZERO_PAGE_Y,
+)
 
 
 class TestAddressResolver(unittest.TestCase):
@@ -15,8 +25,7 @@ class TestAddressResolver(unittest.TestCase):
         self.assertEqual(False, address.is_zero_page())
         self.assertEqual(False, address.is_label())
 
-    # TODO: fix this bug
-    def BUG_test_resolves_hex_absolute_address_with_partial_value(self):
+    def test_resolves_hex_absolute_address_with_partial_value(self):
         address = AddressResolver('$140', 1)
 
         # Resolve as little endian
@@ -56,8 +65,7 @@ class TestAddressResolver(unittest.TestCase):
         self.assertEqual(True, address.is_zero_page())
         self.assertEqual(False, address.is_label())
 
-    # TODO: fix this bug
-    def BUG_test_resolves_hex_zero_page_address_with_partial_value(self):
+    def test_resolves_hex_zero_page_address_with_partial_value(self):
         address = AddressResolver('$8', 1)
 
         self.assertEqual([0x08], address.value())
@@ -92,3 +100,51 @@ class TestAddressResolver(unittest.TestCase):
             'ABS|THIS_IS_A_LABEL',
             None
         ], address.absolute_label())
+
+
+class TestClassify(unittest.TestCase):
+    def test_missing_parameter_is_implied(self):
+        self.assertEqual(Operand(IMPLIED), classify(''))
+
+    def test_accumulator(self):
+        self.assertEqual(Operand(ACCUMULATOR), classify('A'))
+
+    def test_indexed_absolute(self):
+        self.assertEqual(Operand(ABSOLUTE_X, 0xD000), classify('$D000,X'))
+
+    def test_indexed_zero_page(self):
+        self.assertEqual(Operand(ZERO_PAGE_Y, 0x10), classify('$10, y'))
+
+    def test_indexed_label(self):
+        self.assertEqual(
+            Operand(ABSOLUTE_X, label='TABLE'),
+            classify('TABLE,X')
+        )
+
+    def test_indirect(self):
+        self.assertEqual(Operand(INDIRECT, 0x5597), classify('($5597)'))
+
+    def test_indexed_indirect(self):
+        self.assertEqual(Operand(INDIRECT_X, 0x44), classify('($44,X)'))
+
+    def test_indirect_indexed(self):
+        self.assertEqual(Operand(INDIRECT_Y, 0x44), classify('($44),Y'))
+
+    def test_label(self):
+        self.assertEqual(Operand(ABSOLUTE, label='LOOP'), classify('LOOP'))
+
+    def test_repeated_operands_share_the_same_result(self):
+        self.assertIs(classify('#$00'), classify('#$00'))
+
+    def test_invalid_index_is_rejected(self):
+        with self.assertRaises(AssertionError):
+            classify('$10,Z')
+
+    def test_resolver_reports_line_number(self):
+        with self.assertRaises(AssertionError) as context:
+            AddressResolver('#$GG', 7)
+
+        self.assertEqual(
+            '[ERROR] Line 7: Invalid hex value "GG"',
+            str(context.exception)
+        )
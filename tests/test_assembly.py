@@ -0,0 +1,42 @@
+import unittest
+
+from src.assembly import ABS, REL, Assembly
+from src.compiler import Program
+
+
+class TestAssembly(unittest.TestCase):
+    def test_symbols_are_interned(self):
+        assembly = Assembly()
+
+        self.assertEqual(0, assembly.symbol('LOOP'))
+        self.assertEqual(1, assembly.symbol('END'))
+        self.assertEqual(0, assembly.symbol('LOOP'))
+        self.assertEqual(['LOOP', 'END'], assembly.symbols)
+
+    def test_program_emits_into_compact_tables(self):
+        program = Program()
+        for line in ['START:', 'LDX #$01', '', 'JMP START', 'BNE START']:
+            program.next_instruction(line)
+
+        assembly = program.assembly()
+
+        self.assertEqual(
+            bytes([0xA2, 0x01, 0x4C, 0x00, 0x00, 0xD0, 0x00]),
+            assembly.code
+        )
+        self.assertEqual([0, 2, 5], list(assembly.offsets))
+        self.assertEqual([2, 4, 5], list(assembly.lines))
+        self.assertEqual({0: 0}, assembly.labels)
+        self.assertEqual([(3, ABS, 0), (6, REL, 0)], list(assembly.fixups()))
+
+    def test_instruction_bounds(self):
+        program = Program()
+        for line in ['NOP', 'LDA $0400', 'RTS']:
+            program.next_instruction(line)
+
+        assembly = program.assembly()
+
+        self.assertEqual(3, len(assembly))
+        self.assertEqual((1, 4), assembly.instruction(1))
+        self.assertEqual((4, 5), assembly.instruction(2))
+        self.assertEqual(1, assembly.instruction_at(3))
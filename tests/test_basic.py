@@ -0,0 +1,75 @@
+import io
+import unittest
+
+from src.basic import (
+    BOOTSTRAP_ADDRESS,
+    LINE_LIMIT,
+    bootstrap,
+    write_basic,
+)
+
+IMAGE = bytes(range(256)) * 2
+
+
+class TestBasic(unittest.TestCase):
+    def _lines(self, fast: bool) -> list[str]:
+        stream = io.StringIO()
+        write_basic(IMAGE, 0xC000, stream, fast=fast)
+
+        return stream.getvalue().splitlines()
+
+    def _data(self, lines: list[str], first: int) -> list[str]:
+        return [
+            line.partition(' DATA')[2]
+            for line in lines
+            if ' DATA' in line and int(line.split()[0]) >= first
+        ]
+
+    def test_lines_fit_the_screen_editor(self):
+        for fast in (False, True):
+            for line in self._lines(fast):
+                self.assertLessEqual(len(line), LINE_LIMIT)
+
+    def test_poke_loader_packs_decimal_values(self):
+        lines = self._lines(fast=False)
+        values = ','.join(self._data(lines, 1000)).split(',')
+
+        self.assertEqual(
+            '10 FOR I=49152 TO 49663:READ A:POKE I,A:NEXT',
+            lines[0]
+        )
+        self.assertEqual('20 PRINT "SYS 49152"', lines[1])
+        self.assertEqual(list(IMAGE), [int(value) for value in values])
+        self.assertLess(len(lines), len(IMAGE) // 10)
+
+    def test_fast_loader_packs_hex_digits(self):
+        lines = self._lines(fast=True)
+
+        self.assertEqual('20 SYS 828', lines[1])
+        self.assertEqual('25 PRINT "SYS 49152"', lines[2])
+        self.assertEqual(
+            IMAGE,
+            bytes.fromhex(''.join(self._data(lines, 768)))
+        )
+
+    def test_bootstrap_lines_are_skipped_by_the_decoder(self):
+        lines = self._lines(fast=True)
+        decoder = ','.join(
+            line.partition(' DATA')[2]
+            for line in lines
+            if ' DATA' in line and int(line.split()[0]) < 768
+        )
+
+        self.assertEqual(
+            list(bootstrap(0xC000)),
+            [int(value) for value in decoder.split(',')]
+        )
+
+    def test_bootstrap_fits_the_cassette_buffer(self):
+        self.assertLessEqual(BOOTSTRAP_ADDRESS + len(bootstrap(0xC000)), 1020)
+
+    def test_bootstrap_writes_to_the_start_position(self):
+        self.assertEqual(
+            bytes([0xA9, 0x34, 0x85, 0xFD, 0xA9, 0x12, 0x85, 0xFE]),
+            bootstrap(0x1234)[8:16]
+        )
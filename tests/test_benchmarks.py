@@ -0,0 +1,45 @@
+import unittest
+
+from benchmarks.generate import PROGRAM_LINES, generate
+from benchmarks.run import STAGES, benchmark
+from src.assembly import REL
+from src.build import parse_lines
+from src.linker import Linker
+
+
+class TestGenerate(unittest.TestCase):
+    def test_exact_number_of_lines(self):
+        self.assertEqual(1000, len(list(generate(1000))))
+
+    def test_same_seed_same_source(self):
+        self.assertEqual(list(generate(300)), list(generate(300)))
+        self.assertNotEqual(list(generate(300)), list(generate(300, seed=1)))
+
+    def test_generated_source_assembles(self):
+        assembly = parse_lines(generate(5000)).assembly()
+        image = Linker(0xC000).parse(assembly)
+
+        self.assertEqual(len(assembly.code), len(image))
+
+    def test_large_sources_are_programs_fitting_in_memory(self):
+        lines = list(generate(PROGRAM_LINES + 1000))
+
+        for first in (0, PROGRAM_LINES):
+            program = lines[first:first + PROGRAM_LINES]
+            Linker(0xC000).parse(parse_lines(program).assembly())
+
+    def test_branches_stay_in_range(self):
+        assembly = parse_lines(generate(5000)).assembly()
+        addresses = dict(assembly.labels)
+
+        for offset, kind, symbol in assembly.fixups():
+            if kind == REL:
+                self.assertLessEqual(abs(addresses[symbol] - offset - 1), 127)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_every_stage_is_timed(self):
+        result = benchmark(200, memory=False)
+
+        self.assertEqual(200, result['lines'])
+        self.assertEqual(set(STAGES), set(result['stages']))
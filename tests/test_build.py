@@ -0,0 +1,61 @@
+import os
+
+from directories import DirectoryTestCase
+from src.build import artifact_path, build_batch, build_file
+from src.peephole import Rewrite
+
+
+class TestBuild(DirectoryTestCase):
+    def test_artifact_is_written_next_to_the_source(self):
+        source = self._source('nop.s', 'NOP\n')
+
+        output = build_file(source, 0xC000, 'prg')
+
+        self.assertEqual(os.path.join(self.directory, 'nop.prg'), output)
+        with open(output, 'rb') as artifact:
+            self.assertEqual(bytes([0x00, 0xC0, 0xEA]), artifact.read())
+
+    def test_text_artifact_uses_txt_extension(self):
+        self.assertEqual('a/b.txt', artifact_path('a/b.s', 'text'))
+
+    def test_batch_reports_failures_per_file(self):
+        good = self._source('good.s', 'RTS\n')
+        bad = self._source('bad.s', 'FOO\n')
+
+        results = {
+            file: (output, error)
+            for file, output, error in build_batch(
+                [good, bad],
+                0xC000,
+                'bin',
+                jobs=2
+            )
+        }
+
+        self.assertEqual((artifact_path(good, 'bin'), None), results[good])
+        self.assertEqual(
+            (None, '[ERROR] Line 1: Unknown instruction "FOO"'),
+            results[bad]
+        )
+        self.assertTrue(os.path.exists(artifact_path(good, 'bin')))
+
+    def test_batch_records_the_rewrites_of_each_file(self):
+        source = self._source('tail.s', 'JSR $FFD2\nRTS\n')
+        rewrites = {}
+
+        for _ in build_batch(
+            [source],
+            0xC000,
+            'prg',
+            jobs=1,
+            optimize=True,
+            rewrites=rewrites
+        ):
+            pass
+
+        self.assertEqual(
+            {source: [
+                Rewrite(1, 'tail call', ['JSR $FFD2', 'RTS'], ['JMP $FFD2'])
+            ]},
+            rewrites
+        )
@@ -0,0 +1,98 @@
+import os
+
+from directories import DirectoryTestCase
+from src.build import assemble_file
+from src.cache import AssemblyCache
+
+
+class TestAssemblyCache(DirectoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self._write_source('START:\n  LDX #$01\n  JMP START\n')
+
+    def _write_source(self, content: str) -> str:
+        return self._source('program.s', content)
+
+    def _cache(self, max_bytes: int = 1024 * 1024) -> AssemblyCache:
+        return AssemblyCache(os.path.join(self.directory, 'cache'), max_bytes)
+
+    def test_second_assembly_is_a_hit(self):
+        cache = self._cache()
+
+        first = assemble_file(self.source, 0xC000, cache)
+        second = assemble_file(self.source, 0xC000, cache)
+
+        self.assertEqual((1, 1), (cache.misses, cache.hits))
+        self.assertEqual(first[1], second[1])
+        self.assertEqual(
+            first[0].label_offsets(),
+            second[0].label_offsets()
+        )
+
+    def test_hits_log_the_rewrites_again(self):
+        self._write_source('  JSR $FFD2\n  RTS\n')
+        cache = self._cache()
+        logs = [[], []]
+
+        for rewrites in logs:
+            assemble_file(
+                self.source,
+                0xC000,
+                cache,
+                optimize=True,
+                rewrites=rewrites
+            )
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(['tail call'], [rewrite.rule for rewrite in logs[1]])
+        self.assertEqual(logs[0], logs[1])
+
+    def test_changed_source_is_a_miss(self):
+        cache = self._cache()
+
+        assemble_file(self.source, 0xC000, cache)
+        self._write_source('NOP\n')
+        _, image = assemble_file(self.source, 0xC000, cache)
+
+        self.assertEqual((2, 0), (cache.misses, cache.hits))
+        self.assertEqual(bytes([0xEA]), image)
+
+    def test_start_position_is_part_of_the_key(self):
+        cache = self._cache()
+
+        assemble_file(self.source, 0xC000, cache)
+        _, image = assemble_file(self.source, 0x1000, cache)
+
+        self.assertEqual(0, cache.hits)
+        self.assertEqual(bytes([0xA2, 0x01, 0x4C, 0x00, 0x10]), image)
+
+    def test_corrupt_entry_is_rebuilt(self):
+        cache = self._cache()
+        key = cache.key(b'NOP\n', 0)
+        os.makedirs(os.path.join(self.directory, 'cache'))
+        with open(cache._path(key), 'wb') as entry:
+            entry.write(b'garbage')
+
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(os.path.exists(cache._path(key)))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self._cache()
+        assemble_file(self.source, 0x1000, cache)
+        size = os.path.getsize(cache._path(next(iter(self._keys(cache)))))
+
+        cache = self._cache(max_bytes=size * 2)
+        first = cache.key(b'first', 0)
+        cache.put(first, *assemble_file(self.source, 0x1000))
+        os.utime(cache._path(first), (0, 0))
+        cache.put(cache.key(b'second', 0), *assemble_file(self.source, 0))
+
+        self.assertFalse(os.path.exists(cache._path(first)))
+        self.assertEqual(2, len(self._keys(cache)))
+
+    def _keys(self, cache: AssemblyCache) -> list[str]:
+        return [
+            name[:-len('.pickle')]
+            for name in os.listdir(os.path.join(self.directory, 'cache'))
+            if name.endswith('.pickle')
+        ]
@@ -0,0 +1,85 @@
+import io
+
+from linking import LinkedProgramTestCase
+from src.cycles import page_warnings, timings, write_cycles
+
+
+class TestCycles(LinkedProgramTestCase):
+    def _timings(self, lines: list[str], start_pos: int = 0xC000):
+        assembly, image = self._assemble(lines, start_pos)
+
+        return list(timings(assembly, image, start_pos))
+
+    def test_base_cycles_come_from_the_opcode(self):
+        timing = self._timings(['LDA $D020'])[0]
+
+        self.assertEqual((4, 0, 0), timing[2:])
+
+    def test_taken_branch_costs_one_more_cycle(self):
+        timing = self._timings(['LOOP:', 'DEX', 'BNE LOOP'])[1]
+
+        self.assertEqual((2, 1, 0), timing[2:])
+        self.assertEqual(3, timing.longest)
+
+    def test_branch_to_another_page_costs_two_more_cycles(self):
+        timing = self._timings(['LOOP:', 'DEX', 'BNE LOOP'], 0xC0FD)[1]
+
+        self.assertEqual(2, timing.taken)
+
+    def test_indexed_read_can_cross_a_page(self):
+        self.assertEqual(1, self._timings(['LDA $0401,X'])[0].page)
+        self.assertEqual(1, self._timings(['LDA ($FB),Y'])[0].page)
+
+    def test_page_aligned_indexed_read_never_crosses(self):
+        self.assertEqual(0, self._timings(['LDA $0400,X'])[0].page)
+
+    def test_indexed_write_has_fixed_cycles(self):
+        timing = self._timings(['STA $0401,X'])[0]
+
+        self.assertEqual((5, 0, 0), timing[2:])
+
+    def test_report_totals_each_label_block(self):
+        assembly, image = self._assemble([
+            'LDX #$08',
+            'LOOP:',
+            'DEX',
+            'BNE LOOP',
+            'RTS',
+        ])
+        stream = io.StringIO()
+
+        write_cycles(assembly, image, 0xC000, stream)
+
+        self.assertEqual(
+            'Cycles:'
+            '\n  -:'
+            '\n\tC000: A2 08     LDX #$08                     2           '
+            '       2'
+            '\n\tBlock total: 2 cycles\n'
+            '\n  LOOP:'
+            '\n\tC002: CA        DEX                          2           '
+            '       2'
+            '\n\tC003: D0 FD     BNE LOOP                     2 +1 taken  '
+            '     4-5'
+            '\n\tC005: 60        RTS                          6           '
+            '   10-11'
+            '\n\tBlock total: 10-11 cycles\n'
+            '\n',
+            stream.getvalue()
+        )
+
+    def test_page_crossing_branch_in_critical_block_is_reported(self):
+        lines = ['LOOP:', 'DEX', 'BNE LOOP', 'OTHER:', 'BNE OTHER']
+        assembly, image = self._assemble(lines, 0xC0FD)
+
+        warnings = list(page_warnings(assembly, image, 0xC0FD, ['LOOP']))
+
+        self.assertEqual(
+            ['[WARNING] Line 3: "BNE LOOP" in LOOP crosses a page boundary '
+             '($C0FE -> $C0FD)'],
+            warnings
+        )
+        self.assertEqual(
+            [],
+            list(page_warnings(assembly, image, 0xC0FD, ['OTHER']))
+        )
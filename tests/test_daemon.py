@@ -0,0 +1,99 @@
+import os
+import socket
+import sys
+import threading
+from unittest import mock
+
+from directories import DirectoryTestCase
+from src.daemon import AssemblerServer, forward, socket_argument
+
+
+def _main(argv):
+    if argv == ['fail']:
+        raise AssertionError('[ERROR] Line 1: broken')
+    if argv == ['exit']:
+        sys.exit(2)
+
+    print(' '.join(argv))
+    print(os.getcwd(), file=sys.stderr)
+
+    return 0
+
+
+class TestDaemon(DirectoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.directory, 'test.sock')
+        self.server = AssemblerServer(self.path, _main)
+
+    def tearDown(self):
+        self.server.server_close()
+        super().tearDown()
+
+    def test_output_and_status_are_captured(self):
+        status, stdout, stderr = self.server.run(['a', 'b'], self.directory)
+
+        self.assertEqual(0, status)
+        self.assertEqual(b'a b\n', stdout)
+        self.assertEqual(
+            os.path.realpath(self.directory),
+            os.path.realpath(stderr.decode().strip())
+        )
+
+    def test_errors_become_a_failing_status(self):
+        status, stdout, stderr = self.server.run(['fail'], self.directory)
+
+        self.assertEqual(1, status)
+        self.assertEqual(b'', stdout)
+        self.assertEqual(b'[ERROR] Line 1: broken\n', stderr)
+
+    def test_exit_code_is_kept(self):
+        status, _, _ = self.server.run(['exit'], self.directory)
+
+        self.assertEqual(2, status)
+
+    def test_request_is_forwarded_over_the_socket(self):
+        thread = threading.Thread(target=self.server.handle_request)
+        thread.start()
+
+        with mock.patch('sys.stdout') as stdout, mock.patch('sys.stderr'):
+            status = forward(['hello'], self.path)
+        thread.join()
+
+        self.assertEqual(0, status)
+        stdout.buffer.write.assert_called_once_with(b'hello\n')
+
+    def test_running_daemon_is_not_replaced(self):
+        with self.assertRaises(AssertionError) as context:
+            AssemblerServer(self.path, _main)
+
+        self.assertEqual(
+            f'An assembler is already running on {self.path}',
+            str(context.exception)
+        )
+
+    def test_other_files_are_not_removed(self):
+        path = self._source('notes.txt', 'keep me')
+
+        with self.assertRaises(AssertionError) as context:
+            AssemblerServer(path, _main)
+
+        self.assertEqual(
+            f'{path} exists and is not a socket',
+            str(context.exception)
+        )
+        self.assertTrue(os.path.exists(path))
+
+    def test_stale_socket_is_replaced(self):
+        path = os.path.join(self.directory, 'stale.sock')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+            stale.bind(path)
+
+        server = AssemblerServer(path, _main)
+        server.server_close()
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_socket_argument_is_read_from_the_command_line(self):
+        self.assertEqual('x', socket_argument(['a.s', '--socket', 'x']))
+        self.assertEqual('y', socket_argument(['--socket=y', 'a.s']))
@@ -0,0 +1,128 @@
+import io
+import os
+
+from directories import DirectoryTestCase
+from src.build import assemble_file, parse_file, parse_lines
+from src.cache import AssemblyCache
+from src.cycles import write_cycles
+from src.linker import Linker
+from src.peephole import optimize
+from src.relax import relax
+
+
+class TestDirectives(DirectoryTestCase):
+    def _image(self, lines: list[str], start_pos: int = 0xC000):
+        return Linker(start_pos).parse(parse_lines(lines).assembly())
+
+    def _error(self, lines: list[str]) -> str:
+        with self.assertRaises(AssertionError) as context:
+            parse_lines(lines)
+
+        return str(context.exception)
+
+    def test_data_directives(self):
+        image = self._image([
+            'START:',
+            '  .byte $01, $FF',
+            '  .word START, $1234',
+            '  .fill $3, $AA',
+            '  .fill $2',
+            '  .text "HI"',
+        ])
+
+        self.assertEqual(
+            bytes.fromhex('01FF 00C0 3412 AAAAAA 0000 4849'),
+            image
+        )
+
+    def test_directives_keep_their_source(self):
+        assembly = parse_lines(['.byte $01 ; one', 'NOP']).assembly()
+
+        self.assertEqual(['.byte $01', 'NOP'], assembly.sources)
+        self.assertEqual([True, False], [
+            assembly.is_data(index) for index in range(2)
+        ])
+
+    def test_semicolons_in_strings_are_not_comments(self):
+        self.assertEqual(b'A;B', self._image(['.text "A;B" ; comment']))
+
+    def test_invalid_directives(self):
+        self.assertEqual(
+            '[ERROR] Line 1: Unknown directive ".dword"',
+            self._error(['.dword $01'])
+        )
+        self.assertIn('out of range', self._error(['.byte $100']))
+        self.assertIn('Expected a hex value', self._error(['.byte START']))
+        self.assertIn('Missing value', self._error(['.word $01,']))
+        self.assertIn('quoted string', self._error(['.text HI']))
+        self.assertIn('at least one byte', self._error(['.fill $0']))
+
+    def test_incbin_copies_a_file(self):
+        data = self._source('sprite.bin', bytes(range(64)))
+        source = self._source('main.s', b'\n'.join([
+            b'  .incbin "sprite.bin"',
+            b'  .incbin "sprite.bin", $10, $4',
+            b'  .incbin "sprite.bin", $3E',
+        ]))
+
+        program = parse_file(source)
+
+        self.assertEqual(
+            bytes(range(64)) + bytes([16, 17, 18, 19, 62, 63]),
+            program.assembly().code
+        )
+        self.assertEqual([os.path.realpath(data)], list(program.includes))
+
+    def test_incbin_range_must_be_in_the_file(self):
+        self._source('short.bin', bytes(4))
+        source = self._source('main.s', b'.incbin "short.bin", $2, $3')
+
+        with self.assertRaises(AssertionError) as context:
+            parse_file(source)
+
+        self.assertIn('range $2-$5 outside', str(context.exception))
+
+    def test_large_incbin(self):
+        content = os.urandom(0xC000)
+        self._source('music.bin', content)
+        source = self._source('main.s', b'.incbin "music.bin"\nRTS\n')
+
+        image = Linker(0x1000).parse(parse_file(source).assembly())
+
+        self.assertEqual(content + b'\x60', image)
+
+    def test_cached_programs_include_the_files_of_their_directory(self):
+        cache = AssemblyCache(os.path.join(self.directory, 'cache'))
+        images = []
+        for directory in ('a', 'b'):
+            self._source(f'{directory}/d.bin', directory.encode())
+            source = self._source(f'{directory}/m.s', b'.incbin "d.bin"\n')
+            images.append(assemble_file(source, 0xC000, cache)[1])
+
+        self.assertEqual([b'a', b'b'], images)
+
+    def test_data_is_not_timed(self):
+        lines = ['.byte $EA, $EA', 'NOP']
+        assembly = parse_lines(lines).assembly()
+        stream = io.StringIO()
+        write_cycles(assembly, self._image(lines), 0xC000, stream)
+
+        self.assertNotIn('.byte', stream.getvalue())
+        self.assertIn('C002: EA', stream.getvalue())
+
+    def test_data_is_not_optimized(self):
+        assembly = parse_lines([
+            'JSR $FFD2',
+            '.byte $60',
+            'LDA #$00',
+            '.byte $EA',
+            'LDA #$00',
+        ]).assembly()
+
+        self.assertEqual([], optimize(assembly)[1])
+
+    def test_words_are_not_narrowed(self):
+        assembly = parse_lines(['.word PTR', 'PTR:', 'LDA PTR']).assembly()
+        image = Linker(0x10).parse(relax(assembly, 0x10))
+
+        self.assertEqual(bytes.fromhex('1200 A512'), image)
@@ -0,0 +1,164 @@
+import io
+
+from linking import LinkedProgramTestCase
+from src.basic import BOOTSTRAP_ADDRESS, bootstrap, write_basic
+from src.emulator import CPU, emulate, write_profile
+from src.pack import LOAD_ADDRESS, pack
+
+
+class TestEmulator(LinkedProgramTestCase):
+    def _run(self, lines: list[str], start_pos: int = 0xC000, **options):
+        _, image = self._assemble(lines, start_pos)
+
+        return emulate(image, start_pos, **options)
+
+    def test_loop_runs_to_the_final_rts(self):
+        cpu = self._run([
+            'LDX #$00',
+            'LOOP:',
+            'INC $C100,X',
+            'INX',
+            'BNE LOOP',
+            'RTS',
+        ])
+
+        self.assertEqual('RTS', cpu.stopped)
+        self.assertEqual(b'\x01' * 256, cpu.memory[0xC100:0xC200])
+        self.assertEqual(256, cpu.counts[0xC002])
+        # LDX, then INC/INX/BNE taken 255 times and not taken once, then RTS
+        self.assertEqual(2 + 256 * (7 + 2 + 2) + 255 + 6, cpu.cycles)
+        self.assertEqual(cpu.cycles, sum(cpu.spent))
+
+    def test_indexed_read_crossing_a_page_costs_a_cycle(self):
+        near = self._run(['LDX #$01', 'LDA $C0FE,X', 'RTS'])
+        across = self._run(['LDX #$02', 'LDA $C0FE,X', 'RTS'])
+
+        self.assertEqual(4, near.spent[0xC002])
+        self.assertEqual(5, across.spent[0xC002])
+
+    def test_binary_arithmetic_flags(self):
+        cpu = self._run(['CLC', 'LDA #$7F', 'ADC #$01', 'RTS'])
+        self.assertEqual(
+            (0x80, True, True, False),
+            (cpu.a, cpu.v, cpu.n, cpu.c)
+        )
+
+        cpu = self._run(['SEC', 'LDA #$00', 'SBC #$01', 'RTS'])
+        self.assertEqual((0xFF, False, True), (cpu.a, cpu.c, cpu.n))
+
+    def test_decimal_arithmetic(self):
+        cpu = self._run(['SED', 'CLC', 'LDA #$58', 'ADC #$46', 'RTS'])
+        self.assertEqual((0x04, True), (cpu.a, cpu.c))
+
+        cpu = self._run(['SED', 'SEC', 'LDA #$12', 'SBC #$21', 'RTS'])
+        self.assertEqual((0x91, False), (cpu.a, cpu.c))
+
+    def test_subroutines_and_stack(self):
+        cpu = self._run([
+            'LDA #$05',
+            'PHA',
+            'JSR DOUBLE',
+            'PLA',
+            'RTS',
+            'DOUBLE:',
+            'ASL',
+            'STA $02',
+            'RTS',
+        ])
+
+        self.assertEqual(0x0A, cpu.memory[0x02])
+        self.assertEqual(0x05, cpu.a)
+        self.assertEqual(0xFF, cpu.sp)
+
+    def test_kernal_calls_are_trapped(self):
+        cpu = self._run([
+            'LOOP:',
+            'JSR $FFE4',
+            'BEQ DONE',
+            'JSR $FFD2',
+            'JMP LOOP',
+            'DONE:',
+            'RTS',
+        ], input=b'HI')
+
+        self.assertEqual(b'HI', cpu.output)
+        self.assertEqual('RTS', cpu.stopped)
+
+    def test_run_stops(self):
+        self.assertEqual('BRK at $C002', self._run(['NOP', 'NOP']).stopped)
+        self.assertEqual(
+            'cycle limit (100)',
+            self._run(['LOOP:', 'JMP LOOP'], max_cycles=100).stopped
+        )
+
+        cpu = CPU()
+        cpu.load(b'\x02', 0xC000)
+        with self.assertRaises(AssertionError):
+            cpu.call(0xC000)
+
+    def test_profile_lists_the_hottest_blocks(self):
+        lines = [
+            'LDY #$10',
+            'OUTER:',
+            'LDX #$00',
+            'INNER:',
+            'DEX',
+            'BNE INNER',
+            'DEY',
+            'BNE OUTER',
+            'RTS',
+        ]
+        assembly, image = self._assemble(lines)
+        cpu = emulate(image, 0xC000)
+        stream = io.StringIO()
+        write_profile(assembly, cpu, 0xC000, stream)
+        report = stream.getvalue()
+
+        self.assertIn(f"Run: {cpu.cycles} cycles", report)
+        self.assertIn('\tC004: DEX' + ' ' * 31 + '4096        8192', report)
+        hot = report.partition('Hot blocks:')[2].split('\n')
+        self.assertTrue(hot[1].lstrip().startswith('INNER'))
+        self.assertTrue(hot[2].lstrip().startswith('OUTER'))
+
+    def test_basic_fast_loader_decoder(self):
+        image = bytes(range(256))
+        stream = io.StringIO()
+        write_basic(image, 0xC000, stream, fast=True)
+
+        cpu = CPU()
+        cpu.load(_tokenize(stream.getvalue(), LOAD_ADDRESS), LOAD_ADDRESS)
+        cpu.load(b'\x01\x08', 0x2B)
+        cpu.load(bootstrap(0xC000), BOOTSTRAP_ADDRESS)
+        cpu.call(BOOTSTRAP_ADDRESS)
+
+        self.assertEqual('RTS', cpu.stopped)
+        self.assertEqual(image, cpu.memory[0xC000:0xC100])
+
+    def test_packed_program_unpacks_and_runs(self):
+        _, program = self._assemble(['LDA #$2A', 'STA $02', 'RTS'])
+        image = bytes(program) + bytes(range(64)) * 8
+
+        cpu = CPU()
+        cpu.load(pack(image, 0xC000), LOAD_ADDRESS)
+        # The stub after the SYS line
+        cpu.call(LOAD_ADDRESS + 12)
+
+        self.assertEqual('RTS', cpu.stopped)
+        self.assertEqual(image, cpu.memory[0xC000:0xC000 + len(image)])
+        self.assertEqual(0x2A, cpu.memory[0x02])
+
+
+def _tokenize(program: str, address: int) -> bytes:
+    # DATA lines of a BASIC program as the C64 stores them
+    text = bytearray()
+    for line in program.splitlines():
+        number, _, rest = line.partition(' ')
+        body = rest.encode('ascii')
+        if body.startswith(b'DATA'):
+            body = b'\x83' + body[4:]
+
+        address += 5 + len(body)
+        text += address.to_bytes(2, 'little')
+        text += int(number).to_bytes(2, 'little') + body + b'\x00'
+
+    return bytes(text + b'\x00\x00')
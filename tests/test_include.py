@@ -0,0 +1,154 @@
+import os
+
+from directories import DirectoryTestCase
+from src import compiler
+from src.build import artifact_path, assemble_file, load_module, parse_file
+from src.cache import AssemblyCache
+from src.linker import Linker
+
+
+class TestInclude(DirectoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self._touched = 0
+        self.main = self._source('main.s', [
+            'START:',
+            '  .include "lib/print.s"',
+            '  JMP PRINT',
+        ])
+        self.library = self._source('lib/print.s', [
+            'PRINT:',
+            '  LDA #$41',
+            '  .include "chrout.s"',
+            '  RTS',
+        ])
+        self.chrout = self._source('lib/chrout.s', ['  JSR $FFD2'])
+
+    def _source(self, name: str, lines: list[str]) -> str:
+        path = super()._source(name, '\n'.join(lines) + '\n')
+
+        # Later writes get a later modification time
+        self._touched += 1
+        modified = 10 ** 18 + self._touched * 10 ** 9
+        os.utime(path, ns=(modified, modified))
+
+        return path
+
+    def _image(self, file: str, start_pos: int = 0xC000) -> bytearray:
+        return Linker(start_pos).parse(parse_file(file).assembly())
+
+    def test_included_code_is_assembled_in_place(self):
+        self.assertEqual(
+            bytes([0xA9, 0x41, 0x20, 0xD2, 0xFF, 0x60, 0x4C, 0x00, 0xC0]),
+            self._image(self.main)
+        )
+
+    def test_included_code_takes_the_line_of_the_include(self):
+        assembly = parse_file(self.main).assembly()
+
+        self.assertEqual([2, 2, 2, 3], list(assembly.lines))
+        self.assertEqual(
+            ['LDA #$41', 'JSR $FFD2', 'RTS', 'JMP PRINT'],
+            assembly.sources
+        )
+
+    def test_program_lists_every_included_file(self):
+        program = parse_file(self.main)
+
+        self.assertEqual(
+            [os.path.realpath(self.library), os.path.realpath(self.chrout)],
+            list(program.includes)
+        )
+
+    def test_included_files_are_parsed_once(self):
+        first = parse_file(self.main)
+        second = parse_file(self.main)
+        path = os.path.realpath(self.library)
+
+        self.assertIs(
+            compiler._included[path][1],
+            compiler._parse_included(self.library, path, ())[1]
+        )
+        self.assertEqual(first.assembly().code, second.assembly().code)
+
+    def test_changed_included_files_are_parsed_again(self):
+        self._image(self.main)
+        self._source('lib/chrout.s', ['  JSR $FFCF'])
+
+        self.assertEqual(0xCF, self._image(self.main)[3])
+
+    def test_circular_includes_are_reported(self):
+        self._source('lib/chrout.s', ['  .include "print.s"'])
+
+        with self.assertRaises(AssertionError) as context:
+            parse_file(self.main)
+
+        self.assertIn(
+            'Circular .include of "print.s" '
+            '(print.s -> chrout.s -> print.s)',
+            str(context.exception)
+        )
+
+    def test_errors_in_included_files_name_the_file(self):
+        self._source('lib/chrout.s', ['  NOP', '  FOO'])
+
+        with self.assertRaises(AssertionError) as context:
+            parse_file(self.main)
+
+        location = os.path.join(self.directory, 'lib', 'chrout.s')
+        self.assertEqual(
+            f'[ERROR] {location}, line 2: Unknown instruction "FOO"',
+            str(context.exception)
+        )
+
+    def test_missing_included_files_are_reported(self):
+        main = self._source('missing.s', ['.include "nowhere.s"'])
+
+        with self.assertRaises(AssertionError) as context:
+            parse_file(main)
+
+        self.assertIn('[ERROR] Line 1: Included file', str(context.exception))
+
+    def test_file_names_are_quoted(self):
+        main = self._source('unquoted.s', ['.include lib/print.s'])
+
+        with self.assertRaises(AssertionError):
+            parse_file(main)
+
+    def test_cached_programs_depend_on_their_includes(self):
+        cache = AssemblyCache(os.path.join(self.directory, 'cache'))
+        assemble_file(self.main, 0xC000, cache)
+        assemble_file(self.main, 0xC000, cache)
+        self.assertEqual(1, cache.hits)
+
+        self._source('lib/chrout.s', ['  JSR $FFCF'])
+        _, image = assemble_file(self.main, 0xC000, cache)
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(0xCF, image[3])
+
+    def test_cached_programs_depend_on_their_directory(self):
+        # The same text includes the file of its own directory
+        cache = AssemblyCache(os.path.join(self.directory, 'cache'))
+        images = []
+        for directory, value in (('a', '01'), ('b', '02')):
+            self._source(f'{directory}/defs.s', [f'  LDA #${value}'])
+            main = self._source(f'{directory}/main.s', [
+                '  .include "defs.s"',
+                '  RTS',
+            ])
+            images.append(assemble_file(main, 0xC000, cache)[1])
+
+        self.assertEqual(0, cache.hits)
+        self.assertEqual(bytes.fromhex('A90160'), images[0])
+        self.assertEqual(bytes.fromhex('A90260'), images[1])
+
+    def test_objects_depend_on_their_includes(self):
+        load_module(self.main)
+        written = os.stat(artifact_path(self.main, 'object')).st_mtime_ns
+
+        with open(self.chrout, 'w') as source:
+            source.write('  JSR $FFCF\n')
+        os.utime(self.chrout, ns=(written + 10 ** 9, written + 10 ** 9))
+
+        self.assertEqual(0xCF, load_module(self.main).code[3])
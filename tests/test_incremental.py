@@ -0,0 +1,141 @@
+import random
+import unittest
+
+from src.build import parse_lines
+from src.compiler import Program
+from src.incremental import FenwickTree
+from src.linker import Linker
+
+SOURCE = [
+    'START:',
+    '  LDX #$00',
+    'LOOP:',
+    '  LDA TABLE,X',
+    '  BEQ DONE',
+    '  STA $0400,X',
+    '  INX',
+    '  BNE LOOP',
+    '  JMP START',
+    '; a comment',
+    'DONE:',
+    '  RTS',
+    'TABLE:',
+    '  NOP',
+]
+
+EDITS = [
+    '',
+    '  NOP',
+    '  JSR DONE',
+    '  LDA $D020',
+    '  LDA #$01',
+    '  BNE LOOP',
+    'EXTRA:',
+    '  JMP EXTRA',
+    '; comment',
+]
+
+
+class TestFenwickTree(unittest.TestCase):
+    def test_prefix_sums(self):
+        tree = FenwickTree([1, 2, 3, 4])
+
+        self.assertEqual([0, 1, 3, 6, 10], [tree.prefix(i) for i in range(5)])
+
+    def test_add_updates_following_prefixes(self):
+        tree = FenwickTree([1, 2, 3, 4])
+
+        tree.add(1, 5)
+
+        self.assertEqual([0, 1, 8, 11, 15], [tree.prefix(i) for i in range(5)])
+
+
+class TestUpdateLine(unittest.TestCase):
+    def setUp(self):
+        self.lines = list(SOURCE)
+        self.program = parse_lines(self.lines)
+        self.linker = Linker(0xC000)
+        self.image = self.linker.parse(self.program.assembly())
+
+    def _update(self, line_no: int, text: str):
+        self.lines[line_no - 1] = text
+        edit = self.program.update_line(line_no, text)
+        self.linker.update(self.image, edit)
+
+    def _expect_fresh_assembly(self):
+        expected = parse_lines(self.lines)
+        assembly = self.program.assembly()
+
+        self.assertEqual(expected.bytecode(), assembly.bytecode())
+        self.assertEqual(expected.labels(), assembly.label_offsets())
+        self.assertEqual(list(expected.assembly().lines), list(assembly.lines))
+        self.assertEqual(
+            Linker(0xC000).parse(expected.assembly()),
+            self.image
+        )
+
+    def test_resized_instruction_shifts_following_code(self):
+        self._update(2, '  LDX $1234')
+
+        self._expect_fresh_assembly()
+
+    def test_label_can_be_moved(self):
+        self._update(10, 'DONE:')
+        self._update(11, '; no more label')
+
+        self._expect_fresh_assembly()
+
+    def test_comment_can_become_an_instruction(self):
+        self._update(10, '  JSR TABLE')
+
+        self._expect_fresh_assembly()
+
+    def test_unknown_label_is_reported_after_patching(self):
+        with self.assertRaises(AssertionError) as context:
+            self._update(7, '  JMP MISSING')
+
+        self.assertEqual(
+            '[ERROR] Line 7: Unknown label MISSING',
+            str(context.exception)
+        )
+
+        self._update(7, '  INX')
+        self._expect_fresh_assembly()
+
+    def test_parse_errors_leave_the_program_untouched(self):
+        with self.assertRaises(AssertionError):
+            self.program.update_line(2, '  FOO')
+
+        self._expect_fresh_assembly()
+
+    def test_random_edits_match_full_reassembly(self):
+        generator = random.Random(6502)
+
+        for _ in range(200):
+            line_no = generator.randrange(1, len(self.lines) + 1)
+            if self.lines[line_no - 1].endswith(':'):
+                continue
+
+            text = generator.choice(EDITS)
+            self.lines[line_no - 1] = text
+            edit = self.program.update_line(line_no, text)
+
+            try:
+                self.linker.update(self.image, edit)
+            except AssertionError:
+                # References to labels not defined yet are patched as soon
+                # as a later edit defines them
+                pass
+
+            try:
+                Linker(0xC000).parse(parse_lines(self.lines).assembly())
+            except AssertionError:
+                continue
+
+            self._expect_fresh_assembly()
+
+    def test_program_without_edits_is_not_indexed(self):
+        program = Program()
+        program.next_instruction('NOP')
+
+        self.assertIsNone(program._index)
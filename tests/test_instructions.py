@@ -127,3 +127,103 @@ class TestInstruction_STX(InstructionTestCase.AbsoluteAddressing):
 class TestInstruction_TSX(InstructionTestCase.ImpliedAddressing):
     operand = 'TSX'
     bytecode = 0xBA
+
+
+class TestInstruction_LDA(InstructionTestCase.ImmediateAddressing):
+    operand = 'LDA'
+    immediate_bytecode = 0xA9
+
+
+class TestInstruction_STA_Absolute(InstructionTestCase.AbsoluteAddressing):
+    operand = 'STA'
+    absolute_bytecode = 0x8D
+
+
+class TestInstruction_INX(InstructionTestCase.ImpliedAddressing):
+    operand = 'INX'
+    bytecode = 0xE8
+
+
+class TestInstruction_ASL(ProgramTestCase):
+    def test_is_resolved_as_accumulator_without_parameter(self):
+        self.program.next_instruction('ASL')
+
+        self._expect_bytecode([0x0A])
+
+    def test_is_resolved_as_accumulator_with_explicit_register(self):
+        self.program.next_instruction('ASL A')
+
+        self._expect_bytecode([0x0A])
+
+    def test_is_resolved_with_zero_page_addressing(self):
+        self.program.next_instruction('ASL $10')
+
+        self._expect_bytecode([0x06, 0x10])
+
+
+class TestInstruction_BNE(ProgramTestCase):
+    def test_requires_label(self):
+        self._expect_error_message(
+            lambda: self.program.next_instruction('BNE #$01'),
+            '[BNE] Only labels allowed'
+        )
+
+    def test_is_parsed_with_relative_label(self):
+        self.program.next_instruction('BNE BACK')
+
+        self._expect_bytecode([0xD0, 'REL|BACK'])
+
+
+class TestInstruction_LDA_Modes(ProgramTestCase):
+    def test_is_resolved_with_indexed_absolute_addressing(self):
+        self.program.next_instruction('LDA $0400,X')
+
+        self._expect_bytecode([0xBD, 0x00, 0x04])
+
+    def test_is_resolved_with_indirect_indexed_addressing(self):
+        self.program.next_instruction('LDA ($FB),Y')
+
+        self._expect_bytecode([0xB1, 0xFB])
+
+    def test_zero_page_index_falls_back_to_absolute(self):
+        self.program.next_instruction('LDA $10,Y')
+
+        self._expect_bytecode([0xB9, 0x10, 0x00])
+
+    def test_is_resolved_with_indexed_label(self):
+        self.program.next_instruction('LDA TABLE,X')
+
+        self._expect_bytecode([0xBD, 'ABS|TABLE', None])
+
+    def test_short_absolute_address_uses_zero_page(self):
+        self.program.next_instruction('LDA $0010')
+
+        self._expect_bytecode([0xA5, 0x10])
+
+    def test_short_indexed_address_uses_zero_page(self):
+        self.program.next_instruction('LDA $00FB,X')
+
+        self._expect_bytecode([0xB5, 0xFB])
+
+    def test_short_address_without_zero_page_form_stays_absolute(self):
+        self.program.next_instruction('LDA $0010,Y')
+
+        self._expect_bytecode([0xB9, 0x10, 0x00])
+
+    def test_indirect_label_must_be_in_zero_page(self):
+        self.program.next_instruction('LDA (POINTER),Y')
+
+        self._expect_bytecode([0xB1, 'ZP|POINTER'])
+
+    def test_indexed_label_without_absolute_form_uses_zero_page(self):
+        self.program.next_instruction('STX VAR,Y')
+        self.program.next_instruction('STY VAR,X')
+
+        self._expect_full_bytecode([0x96, 'ZP|VAR', 0x94, 'ZP|VAR'])
+
+
+class TestInstruction_JMP_Indirect(ProgramTestCase):
+    def test_is_resolved_with_indirect_addressing(self):
+        self.program.next_instruction('JMP ($FFFC)')
+
+        self._expect_bytecode([0x6C, 0xFC, 0xFF])
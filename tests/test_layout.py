@@ -0,0 +1,333 @@
+import io
+import unittest
+
+from linking import LinkedProgramTestCase
+from src.build import parse_lines
+from src.emulator import emulate
+from src.layout import Intervals, Region, place
+from src.linker import Linker
+from src.output import write_binary, write_output
+from src.peephole import optimize
+from src.relax import relax, relax_branches
+
+MAP = [
+    '.area ZP, $02, $8F, zp',
+    '.area MAIN, $C000, $CFFF',
+    '.area IO, $D000, $DFFF, io',
+    '.area TABLES, $E000, $FFF9, data',
+]
+
+
+class TestIntervals(unittest.TestCase):
+    def test_overlaps_are_reported_with_their_owner(self):
+        intervals = Intervals()
+
+        self.assertIsNone(intervals.add(0x1000, 0x1100, 'first'))
+        self.assertIsNone(intervals.add(0x1100, 0x1200, 'second'))
+        self.assertEqual('first', intervals.add(0x0F00, 0x1001, 'third'))
+        self.assertEqual('second', intervals.add(0x11FF, 0x1300, 'fourth'))
+
+    def test_first_fit_skips_used_ranges(self):
+        intervals = Intervals()
+        intervals.add(0x1000, 0x1010, 'a')
+        intervals.add(0x1014, 0x1020, 'b')
+
+        self.assertEqual(0x1010, intervals.first_fit(0x4, 0x1000, 0x2000))
+        self.assertEqual(0x1020, intervals.first_fit(0x5, 0x1000, 0x2000))
+        self.assertEqual(0x0F00, intervals.first_fit(0x100, 0x0F00, 0x2000))
+        self.assertIsNone(intervals.first_fit(0x10, 0x1000, 0x102F))
+
+
+class TestLayout(LinkedProgramTestCase):
+    def _link(self, lines: list[str]):
+        assembly, image = self._assemble(lines)
+
+        return assembly, image, place(assembly, 0xC000)
+
+    def _error(self, lines: list[str]) -> str:
+        with self.assertRaises(AssertionError) as context:
+            self._link(lines)
+
+        return str(context.exception)
+
+    def test_programs_without_directives_start_at_start_pos(self):
+        _, image, layout = self._link(['NOP', 'RTS'])
+
+        self.assertFalse(layout.placed)
+        self.assertEqual([Region(0xC000, 0, 2)], layout.regions)
+        self.assertEqual(0xC001, layout.address(1))
+
+    def test_org_places_the_code_that_follows(self):
+        assembly, image, layout = self._link([
+            'JMP FAR',
+            '.org $1000',
+            'FAR:',
+            '  JMP $C000',
+        ])
+
+        self.assertEqual(bytes.fromhex('4C0010 4C00C0'), image)
+        self.assertEqual(
+            [Region(0x1000, 3, 6), Region(0xC000, 0, 3)],
+            layout.regions
+        )
+        self.assertEqual(0xC000, layout.entry)
+
+    def test_segments_fill_their_area_around_fixed_code(self):
+        assembly, image, layout = self._link([
+            *MAP,
+            'START:',
+            '  LDA (PTR),Y',
+            '  LDA MESSAGE',
+            '  JMP MORE',
+            '.segment ZP',
+            'PTR:',
+            '  .fill $2',
+            '.segment TABLES',
+            'MESSAGE:',
+            '  .text "HI"',
+            '.segment MAIN',
+            'MORE:',
+            '  RTS',
+            '.segment TABLES',
+            '  .byte $00',
+        ])
+        labels = {
+            label: layout.address(offset)
+            for label, offset in assembly.label_offsets().items()
+        }
+
+        self.assertEqual(
+            {'START': 0xC000, 'PTR': 0x02, 'MESSAGE': 0xE000, 'MORE': 0xC008},
+            labels
+        )
+        self.assertEqual(
+            bytes.fromhex('B102 AD00E0 4C08C0'),
+            image[:8]
+        )
+        # Both parts of TABLES are laid out one after the other
+        self.assertEqual(0xE002, layout.address(len(image) - 1))
+
+    def test_branches_between_parts_use_addresses(self):
+        _, image = self._assemble(
+            ['.org $1000', 'BNE NEAR', '.org $1010', 'NEAR:']
+        )
+
+        self.assertEqual(bytes.fromhex('D00E'), image)
+
+    def test_zero_page_labels_are_narrowed(self):
+        assembly = parse_lines([
+            *MAP,
+            'LDA VAR',
+            'LDA MESSAGE',
+            'STX VAR,Y',
+            '.segment ZP',
+            'VAR:',
+            '  .fill $1',
+            '.segment TABLES',
+            'MESSAGE:',
+            '  .byte $00',
+        ]).assembly()
+        relaxed = relax(assembly, 0xC000)
+        image = Linker(0xC000).parse(relaxed)
+
+        self.assertEqual(bytes.fromhex('A502 AD00E0 9602'), image[:7])
+
+    def test_branches_are_relaxed_on_placed_addresses(self):
+        lines = [
+            '.org $C000',
+            'BEQ FAR',
+            'BNE NEAR',
+            '.org $E000',
+            *['NOP'] * 200,
+            '.org $C007',
+            'NEAR:',
+            '  RTS',
+            '.org $D000',
+            'FAR:',
+            '  RTS',
+        ]
+        assembly = relax_branches(parse_lines(lines).assembly(), 0xC000)
+        image = Linker(0xC000).parse(assembly)
+
+        # Only the branch far in address space grows, not the one whose
+        # target is far in the code only
+        self.assertEqual(
+            ['BNE *+5', 'JMP FAR', 'BNE NEAR'],
+            assembly.sources[1:4]
+        )
+        self.assertEqual(bytes.fromhex('D003 4C00D0 D000'), image[:7])
+
+    def test_grown_branches_move_later_parts_of_their_segment(self):
+        lines = [
+            '.area MAIN, $C000, $CFFF',
+            '.segment MAIN',
+            'BEQ END',
+            'BNE FAR',
+            '.org $E000',
+            'FAR:',
+            '  RTS',
+            '.segment MAIN',
+            *['NOP'] * 125,
+            'END:',
+            '  RTS',
+        ]
+        assembly = relax_branches(parse_lines(lines).assembly(), 0xC000)
+        image = Linker(0xC000).parse(assembly)
+
+        # END is in reach until the branch to FAR grows before it
+        self.assertEqual(
+            ['BNE *+5', 'JMP END', 'BEQ *+5', 'JMP FAR'],
+            assembly.sources[2:6]
+        )
+        self.assertEqual(bytes.fromhex('D003 4C87C0'), image[:5])
+
+    def test_placement_errors(self):
+        self.assertEqual(
+            '[ERROR] Line 3: .org $1001-$1001 overlaps .org $1000-$1001',
+            self._error(['.org $1000', '.byte $01, $02', '.org $1001', 'NOP'])
+        )
+        self.assertIn(
+            'overlaps I/O area IO',
+            self._error([*MAP, '.org $CFFF', '.byte $01, $02'])
+        )
+        self.assertIn(
+            'ends beyond $FFFF',
+            self._error(['.org $FFFF', '.byte $01, $02'])
+        )
+        self.assertIn(
+            'Segment ZP ($8F bytes) does not fit in area ZP ($0002-$008F)',
+            self._error([*MAP, '.segment ZP', '.fill $8F'])
+        )
+        self.assertIn('Unknown segment CODE', self._error(['.segment CODE']))
+        self.assertIn(
+            'Instruction "NOP" in data area TABLES',
+            self._error([*MAP, '.segment TABLES', 'NOP'])
+        )
+        self.assertIn(
+            'Area MAIN already defined differently at line 2',
+            self._error([*MAP, '.area MAIN, $C000, $C0FF'])
+        )
+
+    def test_invalid_directives(self):
+        for lines, error in (
+            (['.area ZP, $00, $100, zp'], 'Zero page area ZP ends at $0100'),
+            (['.area RAM, $00, $10, rom'], 'Unknown area kind "rom"'),
+            (['.area RAM, $10, $00'], 'Area RAM ends before it starts'),
+            (['.segment 1A'], 'Invalid segment name "1A"'),
+            (['.org'], 'Expected a hex value'),
+        ):
+            with self.assertRaises(AssertionError) as context:
+                parse_lines(lines)
+
+            self.assertIn(error, str(context.exception))
+
+    def test_programs_without_directives_end_within_memory(self):
+        with self.assertRaises(AssertionError) as context:
+            self._assemble(['LOOP:', 'DEX', 'BNE LOOP', 'END:'], 0xFFFE)
+
+        self.assertEqual(
+            '[ERROR] Program at $FFFE-$10000 ends beyond $FFFF',
+            str(context.exception)
+        )
+
+    def test_shared_memory_maps_are_defined_once(self):
+        _, _, layout = self._link([*MAP, *MAP, '.segment MAIN', 'NOP'])
+
+        self.assertEqual([Region(0xC000, 0, 1)], layout.regions)
+
+    def test_binaries_are_written_by_region(self):
+        _, image, layout = self._link([
+            '.area ZP, $02, $8F, zp',
+            'NOP',
+            '.segment ZP',
+            '  .byte $01',
+            '.org $BFFF',
+            'RTS',
+            '.org $C001',
+            '  .fill $20',
+        ])
+        stream = io.BytesIO()
+        write_binary(image, 0xC000, stream, prg=True, layout=layout)
+
+        # Zero page variables and zero filled space are not loaded
+        self.assertEqual(bytes.fromhex('FFBF 60EA'), stream.getvalue())
+
+    def test_fills_with_a_value_are_loaded(self):
+        _, image, layout = self._link(
+            ['JMP DATA', '.org $C003', 'DATA:', '.fill $4, $00']
+        )
+        stream = io.BytesIO()
+        write_binary(image, 0xC000, stream, prg=True, layout=layout)
+
+        self.assertEqual(
+            bytes.fromhex('00C0 4C03C0 00000000'),
+            stream.getvalue()
+        )
+
+    def test_gaps_between_regions_are_zero_filled(self):
+        _, image, layout = self._link([
+            *MAP,
+            '.segment MAIN',
+            '  NOP',
+            '.org $C003',
+            '  RTS',
+            '.segment TABLES',
+            '  .byte $01',
+        ])
+        stream = io.BytesIO()
+        write_binary(image, 0xC000, stream, prg=True, layout=layout)
+
+        self.assertEqual(
+            bytes.fromhex('00C0 EA0000 60') + bytes(0x1FFC) + b'\x01',
+            stream.getvalue()
+        )
+
+    def test_flat_formats_need_the_entry_first(self):
+        _, image, layout = self._link(['NOP', '.org $1000', 'RTS'])
+
+        with self.assertRaises(AssertionError):
+            layout.flatten(image)
+
+    def test_listing_shows_each_region(self):
+        assembly, image, _ = self._link(['NOP', '.org $1000', 'RTS'])
+        stream = io.StringIO()
+        write_output(assembly, image, 0xC000, stream)
+
+        self.assertIn('\t1000: 60 \n\tC000: EA ', stream.getvalue())
+        self.assertNotIn('BASIC', stream.getvalue())
+
+    def test_emulator_enters_at_the_first_instruction(self):
+        _, image, layout = self._link([
+            'JSR SHOW',
+            'RTS',
+            '.org $1000',
+            'SHOW:',
+            '  LDA #$41',
+            '  JMP $FFD2',
+        ])
+
+        cpu = emulate(image, 0xC000, layout=layout)
+
+        self.assertEqual(b'A', cpu.output)
+        self.assertEqual('RTS', cpu.stopped)
+
+    def test_data_placed_first_is_not_entered(self):
+        _, image, layout = self._link([
+            *MAP,
+            '.segment ZP',
+            'COUNT:',
+            '  .fill $1',
+            '.segment MAIN',
+            '  LDA #$41',
+            '  JMP $FFD2',
+        ])
+
+        cpu = emulate(image, 0xC000, layout=layout)
+
+        self.assertEqual(0xC000, layout.entry)
+        self.assertEqual(b'A', cpu.output)
+
+    def test_jumps_over_placed_code_are_kept(self):
+        assembly = parse_lines(['JMP NEXT', '.org $1000', 'NEXT:', 'RTS'])
+
+        self.assertEqual([], optimize(assembly.assembly())[1])
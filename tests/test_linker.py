@@ -0,0 +1,65 @@
+from linking import LinkedProgramTestCase
+
+
+class TestLinker(LinkedProgramTestCase):
+
+    def test_program_without_labels_is_copied(self):
+        _, image = self._assemble(['LDX #$01', 'STX $0400'])
+
+        self.assertEqual(bytes([0xA2, 0x01, 0x8E, 0x00, 0x04]), image)
+
+    def test_absolute_label_is_patched_little_endian(self):
+        _, image = self._assemble(['NOP', 'TARGET:', 'JMP TARGET'])
+
+        self.assertEqual(bytes([0xEA, 0x4C, 0x01, 0xC0]), image)
+
+    def test_backward_branch_is_patched(self):
+        _, image = self._assemble(['LOOP:', 'DEX', 'BNE LOOP'])
+
+        self.assertEqual(bytes([0xCA, 0xD0, 0xFD]), image)
+
+    def test_forward_branch_is_relative_to_next_instruction(self):
+        _, image = self._assemble(['BEQ SKIP', 'NOP', 'SKIP:', 'RTS'])
+
+        self.assertEqual(bytes([0xF0, 0x01, 0xEA, 0x60]), image)
+
+    def test_offsets_after_absolute_label_are_not_shifted(self):
+        _, image = self._assemble(['JSR SUB', 'BEQ SUB', 'SUB:', 'RTS'])
+
+        self.assertEqual(
+            bytes([0x20, 0x05, 0xC0, 0xF0, 0x00, 0x60]),
+            image
+        )
+
+    def test_program_is_not_modified_by_linking(self):
+        assembly, _ = self._assemble(['JMP END', 'END:'])
+
+        self.assertEqual(bytes([0x4C, 0x00, 0x00]), assembly.code)
+
+    def test_unknown_label_is_reported(self):
+        with self.assertRaises(AssertionError) as context:
+            self._assemble(['NOP', 'JMP NOWHERE'])
+
+        self.assertEqual(
+            '[ERROR] Unknown label NOWHERE in "JMP NOWHERE".',
+            str(context.exception)
+        )
+
+    def test_branch_reaching_127_bytes_forward_is_patched(self):
+        _, image = self._assemble(['BNE END', *['NOP'] * 127, 'END:'])
+
+        self.assertEqual(0x7F, image[1])
+
+    def test_branch_reaching_128_bytes_back_is_patched(self):
+        _, image = self._assemble(['START:', *['NOP'] * 126, 'BNE START'])
+
+        self.assertEqual(0x80, image[-1])
+
+    def test_branch_out_of_range_is_reported(self):
+        with self.assertRaises(AssertionError) as context:
+            self._assemble(['BNE END', *['NOP'] * 128, 'END:'])
+
+        self.assertEqual(
+            '[ERROR] Branch to END out of range in "BNE END" (128 bytes).',
+            str(context.exception)
+        )
@@ -0,0 +1,116 @@
+import os
+import time
+
+from directories import DirectoryTestCase
+from src.build import (
+    artifact_path,
+    build_file,
+    link_files,
+    load_module,
+    parse_lines,
+)
+from src.linker import Linker
+from src.objects import dumps, load_object, loads
+
+MAIN = 'START:\nLDX #$05\nJSR PRINT\nJMP START\n'
+PRINT = 'PRINT:\nLDA MESSAGE\nJSR $FFD2\nRTS\nMESSAGE:\nRTS\n'
+
+
+class TestObjects(DirectoryTestCase):
+    def test_round_trip(self):
+        assembly = parse_lines(PRINT.splitlines()).assembly()
+        loaded = loads(dumps(assembly))
+
+        for field in assembly.__slots__:
+            self.assertEqual(
+                getattr(assembly, field),
+                getattr(loaded, field),
+                field
+            )
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(AssertionError):
+            loads(bytes(64))
+
+    def test_modules_reference_each_other(self):
+        main = self._source('main.s', MAIN)
+        other = self._source('print.s', PRINT)
+
+        assembly, image = link_files([main, other], 0xC000)
+
+        self.assertEqual(
+            bytes([
+                0xA2, 0x05, 0x20, 0x08, 0xC0, 0x4C, 0x00, 0xC0,
+                0xAD, 0x0F, 0xC0, 0x20, 0xD2, 0xFF, 0x60, 0x60,
+            ]),
+            image
+        )
+        self.assertEqual(8, assembly.label_offsets()['PRINT'])
+
+    def test_modules_link_at_the_start_position(self):
+        main = self._source('main.s', MAIN)
+        other = self._source('print.s', PRINT)
+
+        _, image = link_files([other, main], 0x1000)
+
+        self.assertEqual(bytes([0x20, 0x00, 0x10]), image[10:13])
+
+    def test_linked_objects_match_a_single_source(self):
+        single = self._source('all.s', MAIN + PRINT)
+        main = self._source('main.s', MAIN)
+        other = self._source('print.s', PRINT)
+        build_file(other, 0xC000, 'object')
+
+        _, expected = link_files([single], 0xC000)
+        _, image = link_files([main, artifact_path(other, 'object')], 0xC000)
+
+        self.assertEqual(expected, image)
+
+    def test_unchanged_sources_reuse_their_object(self):
+        main = self._source('main.s', MAIN)
+        output = artifact_path(main, 'object')
+
+        load_module(main)
+        written = os.stat(output).st_mtime_ns
+        load_module(main)
+
+        self.assertEqual(written, os.stat(output).st_mtime_ns)
+
+        # Compiled with other options
+        load_module(main, optimize=True)
+        self.assertNotEqual(written, os.stat(output).st_mtime_ns)
+
+    def test_changed_sources_are_compiled_again(self):
+        main = self._source('main.s', MAIN)
+        load_module(main)
+
+        self._source('main.s', 'START:\nRTS\n')
+        os.utime(main, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+
+        self.assertEqual(
+            bytearray([0x60]),
+            load_module(main).code
+        )
+        self.assertEqual(
+            bytearray([0x60]),
+            load_object(artifact_path(main, 'object')).code
+        )
+
+    def test_labels_defined_twice_are_rejected(self):
+        first = parse_lines(['START:', 'RTS']).assembly()
+        second = parse_lines(['START:', 'NOP']).assembly()
+
+        with self.assertRaises(AssertionError) as context:
+            Linker.combine([('a.o', first), ('b.o', second)])
+
+        self.assertIn(
+            'START defined in both a.o and b.o',
+            str(context.exception)
+        )
+
+    def test_unknown_labels_fail_at_link_time(self):
+        main = self._source('main.s', MAIN)
+
+        build_file(main, 0xC000, 'object')
+        with self.assertRaises(AssertionError):
+            link_files([main], 0xC000)
@@ -0,0 +1,33 @@
+import unittest
+
+from src.opcodes import (
+    ABSOLUTE,
+    DECODE,
+    IMPLIED,
+    MNEMONICS,
+    OPCODES,
+    RELATIVE,
+)
+
+
+class TestOpcodeTable(unittest.TestCase):
+    def test_covers_all_legal_mnemonics(self):
+        self.assertEqual(56, len(MNEMONICS))
+
+    def test_covers_all_legal_opcodes(self):
+        self.assertEqual(151, len(OPCODES))
+        self.assertEqual(151, len([op for op in DECODE if op is not None]))
+
+    def test_opcodes_are_unique(self):
+        opcodes = [opcode for opcode, _, _ in OPCODES.values()]
+
+        self.assertEqual(len(opcodes), len(set(opcodes)))
+
+    def test_entry_contains_opcode_size_and_cycles(self):
+        self.assertEqual((0x8D, 3, 4), OPCODES[('STA', ABSOLUTE)])
+        self.assertEqual((0xEA, 1, 2), OPCODES[('NOP', IMPLIED)])
+        self.assertEqual((0xF0, 2, 2), OPCODES[('BEQ', RELATIVE)])
+
+    def test_decode_is_the_inverse_of_the_table(self):
+        self.assertEqual(('JSR', ABSOLUTE, 3, 6), DECODE[0x20])
+        self.assertIsNone(DECODE[0x02])
@@ -0,0 +1,76 @@
+import io
+from contextlib import redirect_stdout
+
+from linking import LinkedProgramTestCase
+from src.output import print_output, write_binary, write_output
+
+
+class TestBinaryOutput(LinkedProgramTestCase):
+    def test_raw_binary_is_the_linked_image(self):
+        _, image = self._assemble(['LDX #$01', 'RTS'])
+        stream = io.BytesIO()
+
+        write_binary(image, 0xC000, stream)
+
+        self.assertEqual(bytes([0xA2, 0x01, 0x60]), stream.getvalue())
+
+    def test_prg_starts_with_load_address(self):
+        _, image = self._assemble(['LDX #$01', 'RTS'])
+        stream = io.BytesIO()
+
+        write_binary(image, 0xC000, stream, prg=True)
+
+        self.assertEqual(
+            bytes([0x00, 0xC0, 0xA2, 0x01, 0x60]),
+            stream.getvalue()
+        )
+
+
+class TestTextOutput(LinkedProgramTestCase):
+    def test_listing(self):
+        assembly, image = self._assemble(['START:', 'LDX #$01', 'JMP START'])
+        stream = io.StringIO()
+
+        with redirect_stdout(stream):
+            print_output(assembly, image, 0xC000)
+
+        self.assertEqual(
+            'Labels:\n'
+            '\t0xC000: START\n'
+            '\n'
+            'Instructions:\n'
+            '\tC000: A2 01 4C 00 C0 \n'
+            '\n'
+            '\tTotal bytes: 5\n'
+            '\n'
+            'BASIC instructions:\n'
+            '\t10 DATA 162,1        :REM LDX #$01\n'
+            '\t20 DATA 76,0,192     :REM JMP START\n'
+            '\n'
+            '\t3000 DATA -1\n'
+            '\t3010 PC=49152\n'
+            '\t3020 X=0\n'
+            '\t3030 READ A:IF A=-1 THEN END\n'
+            '\t3040 POKE PC+X,A:X=X+1:GOTO 3030\n'
+            '\n'
+            '\tSYS 49152\n',
+            stream.getvalue()
+        )
+
+    def test_listing_grouped_by_instruction_is_streamed(self):
+        assembly, image = self._assemble(['LDX #$01', 'RTS'])
+        stream = io.StringIO()
+
+        write_output(assembly, image, 0xC000, stream, bytes_per_line=1)
+
+        self.assertIn(
+            '\nInstructions:\n'
+            '  LDX #$01\n'
+            '\tC000: A2 \n'
+            '\tC001: 01 \n'
+            '  RTS\n'
+            '\tC002: 60 \n'
+            '\n'
+            '\tTotal bytes: 3\n',
+            stream.getvalue()
+        )
@@ -0,0 +1,71 @@
+import random
+import unittest
+
+from src.pack import LOAD_ADDRESS, compress, decompress, pack, stub
+
+
+class TestPack(unittest.TestCase):
+    def _round_trip(self, data: bytes, start_pos: int = 0xC000) -> bytes:
+        packed = compress(data, start_pos)
+        self.assertEqual(data, decompress(packed, start_pos))
+
+        return packed
+
+    def test_round_trip(self):
+        generator = random.Random(0)
+        samples = [
+            b'',
+            b'\xA9',
+            bytes(range(256)) * 3,
+            bytes(generator.randrange(4) for _ in range(5000)),
+            bytes(generator.randrange(256) for _ in range(5000)),
+        ]
+
+        for data in samples:
+            self._round_trip(data)
+
+    def test_runs_copy_overlapping_matches(self):
+        packed = self._round_trip(bytes(1000))
+
+        self.assertLess(len(packed), 40)
+
+    def test_matches_point_at_the_unpacked_program(self):
+        packed = compress(b'\xA9\x00\x8D\x20' * 2, 0x1000)
+
+        self.assertEqual(
+            b'\x04\xA9\x00\x8D\x20\x80\x00\x10\x00',
+            packed
+        )
+
+    def test_64k_image_of_repeated_chunks(self):
+        generator = random.Random(1)
+        chunks = [bytes(generator.randrange(256) for _ in range(64))]
+        for _ in range(1023):
+            chunk = bytearray(generator.choice(chunks))
+            chunk[generator.randrange(64)] = generator.randrange(256)
+            chunks.append(bytes(chunk))
+        image = b''.join(chunks)
+
+        packed = self._round_trip(image, 0)
+
+        self.assertLess(len(packed), len(image) // 2)
+
+    def test_stub_unpacks_and_jumps_to_the_start(self):
+        code = stub(0x0900, 0xC000)
+
+        self.assertEqual(b'\xA9\x00\x85\xFB\xA9\x09\x85\xFC', code[:8])
+        self.assertEqual(b'\x4C\x00\xC0', code[-3:])
+        self.assertEqual(len(code), len(stub(0x1234, 0x2000)))
+
+    def test_packed_program_starts_with_a_sys_line(self):
+        program = pack(bytes(100), 0xC000)
+
+        self.assertEqual(LOAD_ADDRESS + 10, program[0] | program[1] << 8)
+        self.assertEqual(b'\x0A\x00\x9E2061\x00\x00\x00', program[2:12])
+
+    def test_packed_program_cannot_overlap_its_destination(self):
+        with self.assertRaises(AssertionError):
+            pack(bytes(100), 0x0810)
+
+        with self.assertRaises(AssertionError):
+            pack(random.Random(2).randbytes(0xA000), 0xA000)
@@ -0,0 +1,57 @@
+from directories import DirectoryTestCase
+from src.assembly import Assembly
+from src.build import parse_file
+from src.linker import Linker
+from src.parallel import _parse_chunk, parse_parallel, split_source
+
+SOURCE = '''START:
+  LDX #$00
+LOOP:
+  LDA TABLE,X
+  BEQ DONE
+  STA $0400,X
+  INX
+  JMP LOOP
+DONE:
+  RTS
+TABLE:
+  NOP
+'''
+
+
+class TestParallel(DirectoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self._source('program.s', SOURCE)
+
+    def test_source_is_split_on_line_boundaries(self):
+        data = SOURCE.encode()
+
+        ranges = split_source(data, 4, min_size=1)
+
+        self.assertEqual(0, ranges[0][0])
+        self.assertEqual(len(data), ranges[-1][1])
+        for (_, end, _), (start, _, line_offset) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(b'\n', data[end - 1:end])
+            self.assertEqual(data.count(b'\n', 0, start), line_offset)
+
+    def test_merged_chunks_match_sequential_assembly(self):
+        expected = parse_file(self.source).assembly()
+        merged = Assembly()
+        for bounds in split_source(SOURCE.encode(), 4, min_size=1):
+            merged.extend(_parse_chunk(self.source, *bounds)[0])
+
+        self.assertEqual(expected.label_offsets(), merged.label_offsets())
+        self.assertEqual(list(expected.lines), list(merged.lines))
+        self.assertEqual(
+            Linker(0xC000).parse(expected),
+            Linker(0xC000).parse(merged)
+        )
+
+    def test_parse_parallel(self):
+        expected = parse_file(self.source).assembly()
+
+        assembly = parse_parallel(self.source, jobs=2)
+
+        self.assertEqual(expected.bytecode(), assembly.bytecode())
@@ -0,0 +1,118 @@
+import unittest
+
+from src.build import parse_lines
+from src.linker import Linker
+from src.peephole import Rewrite, diff, optimize
+
+
+class TestPeephole(unittest.TestCase):
+    def _optimize(self, lines: list[str]):
+        assembly, rewrites = optimize(parse_lines(lines).assembly())
+
+        return Linker(0xC000).parse(assembly), assembly, rewrites
+
+    def test_tail_call_becomes_a_jump(self):
+        image, _, rewrites = self._optimize(['JSR $FFD2', 'RTS'])
+
+        self.assertEqual(bytes([0x4C, 0xD2, 0xFF]), image)
+        self.assertEqual(
+            [Rewrite(1, 'tail call', ['JSR $FFD2', 'RTS'], ['JMP $FFD2'])],
+            rewrites
+        )
+
+    def test_return_reached_by_a_label_is_kept(self):
+        image, _, _ = self._optimize(['JSR $FFD2', 'EXIT:', 'RTS'])
+
+        self.assertEqual(bytes([0x4C, 0xD2, 0xFF, 0x60]), image)
+
+    def test_jump_to_the_next_instruction_is_removed(self):
+        image, assembly, _ = self._optimize([
+            'START:',
+            'JMP NEXT',
+            'NEXT:',
+            'INX',
+            'JMP START',
+        ])
+
+        self.assertEqual(bytes([0xE8, 0x4C, 0x00, 0xC0]), image)
+        self.assertEqual({'START': 0, 'NEXT': 0}, assembly.label_offsets())
+
+    def test_rewrites_expose_further_rewrites(self):
+        image, _, rewrites = self._optimize([
+            'JSR DONE',
+            'RTS',
+            'DONE:',
+            'RTS',
+        ])
+
+        self.assertEqual(bytes([0x60]), image)
+        self.assertEqual(
+            ['tail call', 'jump to the next instruction'],
+            [rewrite.rule for rewrite in rewrites]
+        )
+
+    def test_redundant_immediate_load_is_dropped(self):
+        image, _, _ = self._optimize([
+            'LDA #$00',
+            'STA $D020',
+            'LDA #$00',
+            'STA $D021',
+        ])
+
+        self.assertEqual(
+            bytes([0xA9, 0x00, 0x8D, 0x20, 0xD0, 0x8D, 0x21, 0xD0]),
+            image
+        )
+
+    def test_values_are_followed_through_transfers_and_steps(self):
+        image, _, _ = self._optimize(['LDX #$05', 'DEX', 'TXA', 'LDA #$04'])
+
+        self.assertEqual(bytes([0xA2, 0x05, 0xCA, 0x8A]), image)
+
+    def test_load_setting_different_flags_is_kept(self):
+        lines = ['LDA #$01', 'CMP #$02', 'LDA #$01', 'BEQ END', 'END:']
+        image, _, rewrites = self._optimize(lines)
+
+        self.assertEqual([], rewrites)
+        self.assertEqual(8, len(image))
+
+    def test_load_after_a_label_is_kept(self):
+        lines = ['LDA #$01', 'LOOP:', 'LDA #$01', 'JMP LOOP']
+
+        _, _, rewrites = self._optimize(lines)
+
+        self.assertEqual([], rewrites)
+
+    def test_load_after_a_call_is_kept(self):
+        _, _, rewrites = self._optimize(['LDA #$01', 'JSR $FFD2', 'LDA #$01'])
+
+        self.assertEqual([], rewrites)
+
+    def test_program_without_rewrites_is_unchanged(self):
+        assembly = parse_lines(['INX', 'RTS']).assembly()
+
+        self.assertIs(assembly, optimize(assembly)[0])
+
+    def test_fixups_follow_removed_instructions(self):
+        image, _, _ = self._optimize([
+            'LDA #$00',
+            'LDA #$00',
+            'LOOP:',
+            'DEX',
+            'BNE LOOP',
+            'JSR LOOP',
+            'RTS',
+        ])
+
+        self.assertEqual(
+            bytes([0xA9, 0x00, 0xCA, 0xD0, 0xFD, 0x4C, 0x02, 0xC0]),
+            image
+        )
+
+    def test_diff_log(self):
+        rewrites = [Rewrite(3, 'tail call', ['JSR X', 'RTS'], ['JMP X'])]
+
+        self.assertEqual(
+            '@@ line 3: tail call @@\n-\tJSR X\n-\tRTS\n+\tJMP X\n',
+            ''.join(diff(rewrites))
+        )
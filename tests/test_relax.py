@@ -0,0 +1,161 @@
+import random
+import unittest
+from bisect import bisect_left
+
+from linking import LinkedProgramTestCase
+from src.assembly import REL, ZP
+from src.build import parse_lines
+from src.linker import Linker
+from src.relax import relax, relax_branches
+
+
+class TestRelax(LinkedProgramTestCase):
+    relaxed = True
+
+    def test_program_outside_zero_page_is_unchanged(self):
+        assembly = parse_lines(['VAR:', 'LDA VAR']).assembly()
+
+        self.assertIs(assembly, relax(assembly, 0xC000))
+
+    def test_label_in_zero_page_uses_zero_page_form(self):
+        _, image = self._assemble(
+            ['JMP MAIN', 'VAR:', 'BRK', 'MAIN:', 'LDA VAR'],
+            0
+        )
+
+        self.assertEqual(bytes([0x4C, 0x04, 0x00, 0x00, 0xA5, 0x03]), image)
+
+    def test_jumps_keep_their_absolute_form(self):
+        _, image = self._assemble(['LOOP:', 'JMP LOOP'], 0x80)
+
+        self.assertEqual(bytes([0x4C, 0x80, 0x00]), image)
+
+    def test_forward_references_settle_on_the_shortest_form(self):
+        # Only fits when both references are shrunk: $FB + 2 + 2
+        _, image = self._assemble(['LDA END', 'STA END', 'END:', 'BRK'], 0xFB)
+
+        self.assertEqual(bytes([0xA5, 0xFF, 0x85, 0xFF, 0x00]), image)
+
+    def test_references_widen_when_labels_do_not_fit(self):
+        _, image = self._assemble(['LDA END', 'STA END', 'END:', 'BRK'], 0xFC)
+
+        self.assertEqual(
+            bytes([0xAD, 0x02, 0x01, 0x8D, 0x02, 0x01, 0x00]),
+            image
+        )
+
+    def test_layout_follows_the_shrunk_instructions(self):
+        lines = ['LDX VAR,Y', 'BNE DONE', 'VAR:', 'BRK', 'DONE:', 'RTS']
+        assembly = relax(parse_lines(lines).assembly(), 0x10)
+
+        self.assertEqual([0, 2, 4, 5], list(assembly.offsets))
+        self.assertEqual({'VAR': 4, 'DONE': 5}, assembly.label_offsets())
+        self.assertEqual(
+            [(1, ZP, 0), (3, REL, 1)],
+            sorted(assembly.fixups())
+        )
+        self.assertEqual(
+            bytes([0xB6, 0x14, 0xD0, 0x01, 0x00, 0x60]),
+            Linker(0x10).parse(assembly)
+        )
+
+
+class TestZeroPageLinking(unittest.TestCase):
+    def test_zero_page_label_out_of_range_is_reported(self):
+        assembly = parse_lines(['LDA (POINTER),Y', 'POINTER:']).assembly()
+
+        with self.assertRaises(AssertionError) as context:
+            Linker(0xC000).parse(assembly)
+
+        self.assertEqual(
+            f'Zero page address out of range: {0xC002}',
+            str(context.exception)
+        )
+
+
+class TestRelaxBranches(unittest.TestCase):
+    def _naive(self, assembly) -> set[int]:
+        # Grow every branch out of range and lay out again, until stable
+        grown = set()
+        while True:
+            address = {}
+            position = 0
+            for index in range(len(assembly)):
+                address[index] = position
+                start, end = assembly.instruction(index)
+                position += 5 if index in grown else end - start
+
+            def moved(offset):
+                index = bisect_left(assembly.offsets, offset)
+                return address.get(index, position)
+
+            far = set()
+            for offset, kind, symbol in assembly.fixups():
+                index = assembly.instruction_at(offset)
+                if kind != REL or index in grown:
+                    continue
+
+                label = moved(assembly.labels[symbol])
+                if not -128 <= label - address[index] - 2 <= 127:
+                    far.add(index)
+
+            if not far:
+                return grown
+            grown |= far
+
+    def test_branches_in_range_are_unchanged(self):
+        assembly = parse_lines(['LOOP:', 'DEX', 'BNE LOOP']).assembly()
+
+        self.assertIs(assembly, relax_branches(assembly))
+
+    def test_far_branch_becomes_inverted_branch_over_jump(self):
+        lines = ['BNE FAR', *['NOP'] * 200, 'FAR:', 'RTS']
+        assembly = relax_branches(parse_lines(lines).assembly())
+        image = Linker(0xC000).parse(assembly)
+
+        self.assertEqual(['BEQ *+5', 'JMP FAR'], assembly.sources[:2])
+        self.assertEqual([1, 1], list(assembly.lines[:2]))
+        self.assertEqual(bytes([0xF0, 0x03, 0x4C, 0xCD, 0xC0]), image[:5])
+        self.assertEqual(0x60, image[0xCD])
+
+    def test_growth_pushes_other_branches_out_of_range(self):
+        # The second branch fits until the first one grows in between
+        lines = [
+            'START:',
+            'BCC FAR',
+            *['NOP'] * 124,
+            'BCS START',
+            *['NOP'] * 10,
+            'FAR:',
+        ]
+        assembly = relax_branches(parse_lines(lines).assembly())
+
+        self.assertEqual(
+            ['BCS *+5', 'JMP FAR'],
+            assembly.sources[:2]
+        )
+        self.assertEqual('JMP START', assembly.sources[127])
+        Linker(0xC000).parse(assembly)
+
+    def test_matches_relinking_until_stable(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            lines = []
+            for block in range(40):
+                lines.append(f'L{block}:')
+                for _ in range(rng.randrange(20)):
+                    if rng.random() < 0.3:
+                        target = rng.randrange(40)
+                        lines.append(f'BNE L{target}')
+                    else:
+                        lines.append(rng.choice(['NOP', 'LDA $D020']))
+
+            assembly = parse_lines(lines).assembly()
+            expected = self._naive(assembly)
+            relaxed = relax_branches(assembly)
+
+            self.assertEqual(
+                len(assembly.code) + 3 * len(expected),
+                len(relaxed.code)
+            )
+            Linker(0xC000).parse(relaxed)
@@ -0,0 +1,82 @@
+import os
+
+from directories import DirectoryTestCase
+from src.build import assemble_file
+from src.cache import AssemblyCache
+from src.stats import DISABLED, Stats
+
+
+class TestStats(DirectoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self._source('main.s', 'START:\n  NOP\n  JMP START\n')
+
+    def test_every_stage_is_timed(self):
+        with Stats() as stats:
+            assemble_file(self.source, 0xC000, stats=stats)
+
+        self.assertEqual(['read', 'parse', 'link'], list(stats.stages))
+        for wall, cpu, peak in stats.stages.values():
+            self.assertGreaterEqual(wall, 0)
+            self.assertGreaterEqual(cpu, 0)
+            self.assertGreaterEqual(peak, 0)
+
+    def test_program_is_counted(self):
+        with Stats(memory=False) as stats:
+            assemble_file(self.source, 0xC000, stats=stats)
+
+        self.assertEqual(
+            {
+                'lines': 3,
+                'instructions': 2,
+                'labels': 1,
+                'fixups': 1,
+                'bytes': 4,
+            },
+            stats.counters
+        )
+        self.assertIsNone(stats.stages['parse'][2])
+
+    def test_cache_hits_are_counted(self):
+        cache = AssemblyCache(os.path.join(self.directory, 'cache'))
+        assemble_file(self.source, 0xC000, cache)
+
+        with Stats(memory=False) as stats:
+            assemble_file(self.source, 0xC000, cache, stats=stats)
+
+        self.assertEqual(1, stats.counters['cache hits'])
+        self.assertNotIn('parse', stats.stages)
+
+    def test_repeated_stages_add_up(self):
+        stats = Stats(memory=False)
+        stats.stages['parse'] = (1.0, 2.0, None)
+
+        with stats.stage('parse'):
+            pass
+
+        wall, cpu, _ = stats.stages['parse']
+        self.assertGreaterEqual(wall, 1.0)
+        self.assertGreaterEqual(cpu, 2.0)
+
+    def test_profile_is_dumped(self):
+        profile = os.path.join(self.directory, 'run.prof')
+
+        with Stats(memory=False, profile=profile):
+            assemble_file(self.source, 0xC000)
+
+        self.assertTrue(os.path.getsize(profile) > 0)
+
+    def test_report_includes_throughput(self):
+        with Stats(memory=False) as stats:
+            assemble_file(self.source, 0xC000, stats=stats)
+
+        report = ''.join(stats.report())
+
+        self.assertIn('lines/s', report)
+        self.assertIn('fixups', report)
+
+    def test_disabled_stats_do_nothing(self):
+        with DISABLED.stage('parse'):
+            DISABLED.count('lines', 10)
+
+        assemble_file(self.source, 0xC000, stats=DISABLED)
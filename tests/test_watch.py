@@ -0,0 +1,209 @@
+import os
+import tempfile
+
+from directories import DirectoryTestCase
+from src.build import parse_lines
+from src.linker import Linker
+from src.output import write_output
+from src.watch import Watcher, watch
+
+SOURCE = [
+    'START:',
+    '  LDX #$00',
+    'LOOP:',
+    '  INX',
+    '  BNE LOOP',
+    '  JMP START',
+]
+
+
+class TestWatcher(DirectoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = os.path.join(self.directory, 'main.s')
+        self.output = os.path.join(self.directory, 'main.prg')
+
+    def _write(self, lines: list[str]):
+        self._source('main.s', '\n'.join(lines) + '\n')
+
+    def _artifact(self) -> bytes:
+        with open(self.output, 'rb') as artifact:
+            return artifact.read()
+
+    def _expected(self, lines: list[str]) -> bytes:
+        image = Linker(0xC000).parse(parse_lines(lines).assembly())
+
+        return bytes([0x00, 0xC0]) + image
+
+    def test_first_build_assembles_every_line(self):
+        self._write(SOURCE)
+        watcher = Watcher(self.source, 0xC000, 'prg', self.output)
+
+        self.assertEqual(len(SOURCE), watcher.build())
+        self.assertEqual(self._expected(SOURCE), self._artifact())
+
+    def test_edited_lines_are_reassembled_in_place(self):
+        self._write(SOURCE)
+        watcher = Watcher(self.source, 0xC000, 'prg', self.output)
+        watcher.build()
+
+        lines = [*SOURCE]
+        lines[1] = '  LDX $1000'
+        self._write(lines)
+
+        self.assertEqual(1, watcher.build())
+        self.assertEqual(self._expected(lines), self._artifact())
+
+    def test_added_lines_rebuild_the_whole_file(self):
+        self._write(SOURCE)
+        watcher = Watcher(self.source, 0xC000, 'prg', self.output)
+        watcher.build()
+
+        lines = ['  NOP', *SOURCE]
+        self._write(lines)
+
+        self.assertEqual(len(lines), watcher.build())
+        self.assertEqual(self._expected(lines), self._artifact())
+
+    def test_placed_programs_rebuild_the_whole_file(self):
+        lines = [*SOURCE, '.org $BFFF', '  RTS']
+        self._write(lines)
+        watcher = Watcher(self.source, 0xC000, 'bin', self.output)
+        watcher.build()
+
+        lines[1] = '  LDX #$01'
+        self._write(lines)
+
+        self.assertEqual(len(lines), watcher.build())
+        self.assertEqual(b'\x60', self._artifact()[:1])
+
+    def test_optimized_programs_rebuild_the_whole_file(self):
+        lines = ['  JSR $FFD2', '  RTS']
+        self._write(lines)
+        watcher = Watcher(
+            self.source,
+            0xC000,
+            'bin',
+            self.output,
+            optimize=True
+        )
+        watcher.build()
+
+        self.assertEqual(1, len(watcher.rewrites))
+        self.assertEqual(bytes([0x4C, 0xD2, 0xFF]), self._artifact())
+
+        lines[0] = '  JSR $FFE4'
+        self._write(lines)
+
+        self.assertEqual(len(lines), watcher.build())
+        self.assertEqual(bytes([0x4C, 0xE4, 0xFF]), self._artifact())
+
+    def test_far_branches_are_lengthened(self):
+        lines = ['START:', '  .fill $80', '  BNE START']
+        self._write(lines)
+        watcher = Watcher(
+            self.source,
+            0xC000,
+            'bin',
+            self.output,
+            long_branches=True
+        )
+        watcher.build()
+
+        self.assertEqual(bytes.fromhex('F0034C00C0'), self._artifact()[-5:])
+
+        lines[2] = '  BEQ START'
+        self._write(lines)
+
+        self.assertEqual(len(lines), watcher.build())
+        self.assertEqual(bytes.fromhex('D0034C00C0'), self._artifact()[-5:])
+
+    def test_included_files_are_watched(self):
+        library = self._source('library.s', '  INX\n')
+        self._write(['START:', '  .include "library.s"', '  JMP START'])
+        watcher = Watcher(self.source, 0xC000, 'prg', self.output)
+        watcher.build()
+
+        self.assertEqual(
+            [self.source, os.path.realpath(library)],
+            watcher.files()
+        )
+
+        self._source('library.s', '  INY\n  INY\n')
+        os.utime(library, ns=(10 ** 18, 10 ** 18))
+
+        self.assertEqual(3, watcher.build())
+        self.assertEqual(
+            bytes([0x00, 0xC0, 0xC8, 0xC8, 0x4C, 0x00, 0xC0]),
+            self._artifact()
+        )
+
+    def test_failed_build_keeps_the_previous_artifact(self):
+        self._write(SOURCE)
+        watcher = Watcher(self.source, 0xC000, 'prg', self.output)
+        watcher.build()
+
+        lines = [*SOURCE]
+        lines[5] = '  JMP NOWHERE'
+        self._write(lines)
+
+        with self.assertRaises(AssertionError):
+            watcher.build()
+        self.assertEqual(self._expected(SOURCE), self._artifact())
+        self.assertEqual(['main.prg', 'main.s'], sorted(os.listdir(
+            self.directory
+        )))
+
+        self._write(SOURCE)
+        self.assertEqual(len(SOURCE), watcher.build())
+        self.assertEqual(self._expected(SOURCE), self._artifact())
+
+    def test_text_listing_follows_edits(self):
+        self._write(SOURCE)
+        output = os.path.join(self.directory, 'main.txt')
+        watcher = Watcher(self.source, 0xC000, 'text', output)
+        watcher.build()
+
+        lines = [*SOURCE]
+        lines[3] = '  INY'
+        self._write(lines)
+        watcher.build()
+
+        assembly = parse_lines(lines).assembly()
+        expected = tempfile.TemporaryFile('w+')
+        image = Linker(0xC000).parse(assembly)
+        write_output(assembly, image, 0xC000, expected)
+        expected.seek(0)
+
+        with open(output) as artifact:
+            self.assertEqual(expected.read(), artifact.read())
+
+    def test_watch_builds_until_stopped(self):
+        self._write(SOURCE)
+        watcher = Watcher(self.source, 0xC000, 'prg', self.output)
+        checks = iter([True, False])
+
+        watch(watcher, interval=0, running=lambda: next(checks))
+
+        self.assertEqual(self._expected(SOURCE), self._artifact())
+
+    def test_edits_saved_during_a_build_build_again(self):
+        self._write(SOURCE)
+        watcher = Watcher(self.source, 0xC000, 'prg', self.output)
+        build = watcher.build
+        edited = [*SOURCE]
+        edited[1] = '  LDX #$01'
+
+        def edit_while_building() -> int:
+            lines = build()
+            if lines == len(SOURCE):
+                self._write(edited)
+                os.utime(self.source, ns=(10 ** 18, 10 ** 18))
+            return lines
+
+        watcher.build = edit_while_building
+        checks = iter([True, True, False])
+
+        watch(watcher, interval=0, running=lambda: next(checks))
+
+        self.assertEqual(self._expected(edited), self._artifact())